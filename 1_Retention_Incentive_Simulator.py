@@ -1,10 +1,38 @@
+import tracemalloc
+
 import streamlit as st
-import pandas as pd
 import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
 
+from simulator import charts, engine
+from simulator.agents import simulate_agents
+from simulator.cache import memoize, shared_cache
+from simulator.formatting import format_row, format_summary
+from simulator.montecarlo import Normal, monte_carlo
+from simulator.pipeline import Pipeline
+from simulator.profiling import shared_tracer
+from simulator.results import ScenarioResults
+from simulator.scenarios import Offer, Scenario, compile_offers
+from simulator.sensitivity import sensitivity, tornado
+from simulator.sweep import sweep
+
 st.set_page_config(page_title="Retention Incentive Simulator", layout="wide")
 
+# Every rerun is one trace; the developer panel shows where its time goes
+tracer = shared_tracer()
+tracer.begin("retention-simulator")
+
+MAX_SCENARIOS = 10
+# Sidebar title and default retention improvement / redeem rate (%) per incentive scenario
+SCENARIO_PRESETS = {
+    1: ("Intervention, no effect", 0, 50),
+    2: ("Intervention, improved retention", 100, 100),
+}
+LINE_DASHES = ("solid", "dot", "dash", "dashdot", "longdash", "longdashdot")
+REVENUE_COLORS = ("#6baed6", "#9ecae1", "#74c476", "#c6dbef", "#a1d99b", "#3182bd", "#31a354")
+LIABILITY_COLORS = ("#fcae91", "#fc9272", "#fb6a4a", "#fcbba1", "#de2d26", "#fee0d2")
+
 st.title("Retention Incentive Simulator")
 st.markdown("""
 This app models learner retention across baseline and incentive scenarios,
@@ -24,115 +52,246 @@ organic_drop_pre = st.sidebar.slider("Organic drop-off rate before incentive (%)
 organic_drop_post = st.sidebar.slider("Organic drop-off rate after incentive (%)", 0, 100, 0)
 
 st.sidebar.subheader("SCENARIO SETTINGS")
-st.sidebar.subheader("Scenario 1. Intervention, no effect")
-incentive_effect_1 = st.sidebar.slider("Retention improvement from incentive (%)", 0, 100, 0)
-redeem_rate_1 = st.sidebar.slider("% of eligible learners who redeem reward", 0, 100, 50)
-
-
-st.sidebar.subheader("Scenario 2. Intervention, improved retention")
-incentive_effect_2 = (st.sidebar.slider("Retention improvement from incentive (%)", 0, 100, 100))
-redeem_rate_2 = st.sidebar.slider("% of eligible learners who redeem reward", 0, 100, 100)
-
-# Dropoff Setup
-monthly_drop = ([organic_drop_pre / 100] 
-                * (drop_month - 1) 
-                + [drop_off_rate / 100] 
-                + [organic_drop_post / 100] 
-                * (duration_months - drop_month - 1))
+n_scenarios = st.sidebar.number_input("Number of incentive scenarios", 1, MAX_SCENARIOS, value=2)
+scenario_names = ["Baseline"]
+incentive_effects, incentive_redeem_rates = [0], [0]
+for i in range(1, n_scenarios + 1):
+    title, effect_default, redeem_default = SCENARIO_PRESETS.get(i, ("Intervention", 50, 50))
+    st.sidebar.subheader(f"Scenario {i}. {title}")
+    scenario_names.append(f"Scenario {i}")
+    incentive_effects.append(st.sidebar.slider("Retention improvement from incentive (%)", 0, 100, effect_default,
+                                               key=f"incentive_effect_{i}"))
+    incentive_redeem_rates.append(st.sidebar.slider("% of eligible learners who redeem reward", 0, 100,
+                                                    redeem_default, key=f"redeem_rate_{i}"))
+
+cache = shared_cache()
+
+# Every scenario offers the sidebar incentive in the incentive month; more offers can be added below
+with st.expander("Additional incentive offers"):
+    st.caption("Add offers in other months, each with its own cost, retention improvement and redeem rate. "
+               "They reach every learner active in that month.")
+    extra_offers = st.data_editor(
+        pd.DataFrame({
+            "Scenario": pd.Series(dtype=str),
+            "Month": pd.Series(dtype=int),
+            "Incentive cost ($)": pd.Series(dtype=float),
+            "Retention improvement (%)": pd.Series(dtype=float),
+            "Redeem rate (%)": pd.Series(dtype=float),
+        }),
+        column_config={
+            "Scenario": st.column_config.SelectboxColumn(options=scenario_names[1:], required=True),
+            "Month": st.column_config.NumberColumn(min_value=1, max_value=duration_months - 1, step=1, required=True),
+            "Incentive cost ($)": st.column_config.NumberColumn(min_value=0.0, required=True),
+            "Retention improvement (%)": st.column_config.NumberColumn(min_value=0, max_value=100, required=True),
+            "Redeem rate (%)": st.column_config.NumberColumn(min_value=0, max_value=100, required=True),
+        },
+        num_rows="dynamic",
+        use_container_width=True,
+        key="extra_offers",
+    )
 
 # Scenario Simulations
-def simulate_learners(effect, rate):
-    learners = [initial_learners]
-    for i in range(1, duration_months):
-        drop = monthly_drop[i - 1] * (1 - effect / 100) if i == drop_month - 1 else monthly_drop[i - 1]
-        retained = learners[-1] * (1 - drop)
-        if redeemers_stay_full and i == drop_month:
-            retained += learners[-1] * monthly_drop[i - 1] * (effect / 100) * (rate / 100)
-        learners.append(retained)
-    return learners
-
-learners_base = simulate_learners(0, 0)
-learners_s1 = simulate_learners(incentive_effect_1, redeem_rate_1)
-learners_s2 = simulate_learners(incentive_effect_2, redeem_rate_2)
-
-# -----------------------------
-# Financial Calculations
-# -----------------------------
-def compute_summary(name, learners, effect, rate):
-    revenue = sum([x * revenue_per_month for x in learners])
-    redeemers = learners[drop_month - 1] * rate / 100
-    cost = redeemers * incentive_cost if effect > 0 else 0
-    net = revenue - cost
-    gain = learners[-1] - learners_base[-1]
-    pct_gain = (gain / learners_base[-1]) * 100 if learners_base[-1] > 0 else 0
-    break_even = cost / (revenue_per_month * (duration_months - drop_month)) if (duration_months - drop_month) > 0 else 0
-    return {
-        "Scenario": name,
-        "Total Revenue": f"${revenue:,.0f}",
-        "Incentive Cost": f"${cost:,.0f}",
-        "Net Revenue": f"${net:,.0f}",
-        "Retention Gain": f"{gain:.0f} learners",
-        "Retention Gain (%)": f"{pct_gain:.1f}%",
-        "Break-Even Learners Needed": f"{break_even:.0f}"
+scenario_offers = {name: [Offer(drop_month, incentive_cost, incentive_effects[i] / 100, incentive_redeem_rates[i] / 100)]
+                   for i, name in enumerate(scenario_names) if i > 0}
+for name, month, cost, effect, redeem_rate in extra_offers.dropna().itertuples(index=False, name=None):
+    if name in scenario_offers:
+        scenario_offers[name].append(Offer(int(month), cost, effect / 100, redeem_rate / 100))
+try:
+    offers = compile_offers([Scenario(name, tuple(scenario_offers.get(name, ()))) for name in scenario_names],
+                            duration_months)
+except ValueError as exc:
+    st.error(f"Invalid incentive offer – {exc}")
+    st.stop()
+has_extra_offers = offers.mask.sum(axis=1) > 1
+
+# The sidebar offer of each scenario, used by the single-offer analyses below
+effects = np.array(incentive_effects) / 100
+redeem_rates = np.array(incentive_redeem_rates) / 100
+
+PARAMETER_LABELS = {
+    "effect": "Retention improvement (%)",
+    "redeem_rate": "Redeem rate (%)",
+    "incentive_cost": "Incentive cost per learner ($)",
+    "revenue_per_month": "Revenue per learner/month ($)",
+    "initial_learners": "Initial learners",
+    "drop_off_rate": "Major drop-off rate (%)",
+    "organic_drop_pre": "Organic drop-off before incentive (%)",
+    "organic_drop_post": "Organic drop-off after incentive (%)",
+}
+RATE_PARAMETERS = ("effect", "redeem_rate", "drop_off_rate", "organic_drop_pre", "organic_drop_post")
+
+pipeline = Pipeline("retention-simulator", cache, tracer)
+
+# Each stage is recomputed only when its own inputs or an upstream stage change,
+# so financial edits rescale the cached trajectories instead of re-simulating them
+@pipeline.stage(inputs=("duration_months", "drop_month", "drop_off_rate", "organic_drop_pre", "organic_drop_post"),
+                category="simulate")
+def schedule(duration_months, drop_month, drop_off_rate, organic_drop_pre, organic_drop_post):
+    # Dropoff Setup
+    monthly_drop = engine.drop_schedule(duration_months, drop_month, drop_off_rate / 100,
+                                        organic_drop_pre / 100, organic_drop_post / 100)
+    offer_mask = engine.incentive_mask(duration_months, drop_month)
+    return monthly_drop, offer_mask
+
+# All scenarios and all of their offers are simulated as one batch of per-month offer arrays
+@pipeline.stage(after=("schedule",), inputs=("initial_learners", "offer_mask", "offer_effects", "offer_redeem_rates",
+                                          "redeemers_stay_full"), category="simulate")
+def trajectories(schedule, initial_learners, offer_mask, offer_effects, offer_redeem_rates, redeemers_stay_full):
+    monthly_drop, _ = schedule
+    learners = engine.simulate_learners(initial_learners, monthly_drop, offer_effects, offer_redeem_rates,
+                                        offer_mask, redeemers_stay_full)
+    redeemers = engine.incentive_redeemers(learners, monthly_drop, offer_redeem_rates, offer_mask)
+    return learners, redeemers
+
+@pipeline.stage(after=("trajectories",), inputs=("revenue_per_month", "offer_costs"), category="financials")
+def financials(trajectories, revenue_per_month, offer_costs):
+    learners, redeemers = trajectories
+    return engine.monthly_financials(learners, redeemers, revenue_per_month, offer_costs)
+
+@pipeline.stage(after=("trajectories", "financials"), inputs=("scenario_names", "offer_mask", "offer_effects",
+                                                             "revenue_per_month"), category="summary")
+def summary(trajectories, financials, scenario_names, offer_mask, offer_effects, revenue_per_month):
+    (learners, _), (revenue, cost) = trajectories, financials
+    return ScenarioResults.from_financials(scenario_names, learners, revenue, cost, offer_effects, offer_mask,
+                                           revenue_per_month)
+
+# Figures are cached as plain dicts, which the shared cache copies cheaply for every session
+@pipeline.stage(after=("summary",), category="render")
+def financial_figure(summary):
+    fin_fig = go.Figure()
+    fin_fig.add_bar(x=summary.names, y=summary.total_revenue, name="Total Revenue", marker_color="#6baed6")
+    fin_fig.add_bar(x=summary.names, y=summary.incentive_cost, name="Incentive Cost", marker_color="#fc9272")
+    fin_fig.add_bar(x=summary.names, y=summary.net_revenue, name="Net Revenue", marker_color="#74c476")
+
+    # Add horizontal line for the best incentive scenario's Net Revenue
+    best_net = summary.net_revenue[summary.best(exclude=[0])]
+    fin_fig.add_shape(
+        type="line",
+        xref="paper",
+        yref="y",
+        x0=0,
+        x1=1,
+        y0=best_net,
+        y1=best_net,
+        line=dict(color="#74c476", width=2, dash="dash")
+    )
+
+    fin_fig.update_layout(
+        barmode="group",
+        xaxis_title="Scenario",
+        yaxis_title="USD ($)",
+        height=400
+    )
+    return fin_fig.to_dict()
+
+@pipeline.stage(after=("trajectories",), inputs=("duration_months", "scenario_names"), category="render")
+def retention_figure(trajectories, duration_months, scenario_names):
+    months = list(range(1, duration_months + 1))
+    # One line for every scenario and the Baseline, even at the scenario limit
+    fig = go.Figure(charts.scenario_traces(months, trajectories[0], scenario_names, [
+        dict(line=dict(width=3, dash=LINE_DASHES[i % len(LINE_DASHES)])) for i in range(len(scenario_names))
+    ], max_lines=MAX_SCENARIOS + 1))
+    fig.update_layout(xaxis_title="Month", yaxis_title="Active Learners")
+    return fig.to_dict()
+
+@pipeline.stage(after=("financials",), inputs=("duration_months", "scenario_names"), category="render")
+def monthly_figure(financials, duration_months, scenario_names):
+    months = list(range(1, duration_months + 1))
+    monthly_rev, monthly_liab = financials
+    # Long horizons are averaged into bins so the bar count stays bounded
+    months, binned_values, bin_width = charts.binned(months, [*monthly_rev, *monthly_liab[1:]])
+    monthly_rev, monthly_liab = binned_values[:len(scenario_names)], binned_values[len(scenario_names):]
+
+    bar_fig = go.Figure()
+    for i, (name, values) in enumerate(zip(scenario_names, monthly_rev)):
+        bar_fig.add_bar(x=months, y=values, name=f"{name} Revenue", marker_color=REVENUE_COLORS[i % len(REVENUE_COLORS)])
+    for i, (name, values) in enumerate(zip(scenario_names[1:], monthly_liab)):
+        bar_fig.add_bar(x=months, y=values, name=f"{name} Liability",
+                        marker_color=LIABILITY_COLORS[i % len(LIABILITY_COLORS)])
+    bar_fig.update_layout(barmode="group", height=400, yaxis_title="USD ($)",
+                          xaxis_title="Month" if bin_width == 1 else f"Month ({bin_width}-month average)")
+    return bar_fig.to_dict()
+
+@pipeline.stage(after=("schedule",), inputs=("initial_learners", "drop_month", "effects", "redeem_rates",
+                                          "redeemers_stay_full", "revenue_per_month", "incentive_cost"),
+                category="sensitivity")
+def sensitivities(schedule, initial_learners, drop_month, effects, redeem_rates, redeemers_stay_full,
+                  revenue_per_month, incentive_cost):
+    monthly_drop, offer_mask = schedule
+    month = np.arange(len(monthly_drop))
+    drop_groups = {
+        "drop_off_rate": offer_mask,
+        "organic_drop_pre": month < drop_month - 1,
+        "organic_drop_post": month > drop_month - 1,
     }
-
-summary = pd.DataFrame([
-    compute_summary("Baseline", learners_base, 0, 0),
-    compute_summary("Scenario 1", learners_s1, incentive_effect_1, redeem_rate_1),
-    compute_summary("Scenario 2", learners_s2, incentive_effect_2, redeem_rate_2)
-])
-
-# st.subheader("Executive Summary")
-# st.dataframe(summary, use_container_width=True)
+    solved = sensitivity(initial_learners, monthly_drop, effects[1:], redeem_rates[1:], offer_mask,
+                         revenue_per_month, incentive_cost, redeemers_stay_full, drop_groups)
+    swings = [tornado(initial_learners, monthly_drop, effects[i], redeem_rates[i], offer_mask, revenue_per_month,
+                      incentive_cost, redeemers_stay_full, drop_groups) for i in range(1, len(effects))]
+    return solved, swings
+
+@pipeline.stage(after=("sensitivities",), inputs=("scenario_names",), category="render")
+def tornado_figures(sensitivities, scenario_names):
+    solved, swings = sensitivities
+    figures = []
+    for i, swing in enumerate(swings):
+        labels = [PARAMETER_LABELS[name] for name in swing]
+        net = solved.net_revenue[i]
+        tornado_fig = go.Figure()
+        tornado_fig.add_bar(y=labels, x=[low - net for low, _ in swing.values()], base=net, orientation="h",
+                            name="-10%", marker_color="#fc9272")
+        tornado_fig.add_bar(y=labels, x=[high - net for _, high in swing.values()], base=net, orientation="h",
+                            name="+10%", marker_color="#74c476")
+        tornado_fig.update_layout(barmode="overlay", title=f"{scenario_names[i + 1]}: Net Revenue Sensitivity (±10%)",
+                                  xaxis_title="Net Revenue ($)", yaxis=dict(autorange="reversed"), height=400)
+        figures.append(tornado_fig.to_dict())
+    return figures
+
+stages = pipeline.run({
+    "initial_learners": initial_learners,
+    "duration_months": duration_months,
+    "drop_month": drop_month,
+    "drop_off_rate": drop_off_rate,
+    "organic_drop_pre": organic_drop_pre,
+    "organic_drop_post": organic_drop_post,
+    "effects": effects,
+    "redeem_rates": redeem_rates,
+    "scenario_names": scenario_names,
+    "offer_mask": offers.mask,
+    "offer_effects": offers.effect,
+    "offer_redeem_rates": offers.redeem_rate,
+    "offer_costs": offers.cost,
+    "redeemers_stay_full": redeemers_stay_full,
+    "revenue_per_month": revenue_per_month,
+    "incentive_cost": incentive_cost,
+})
+monthly_drop, offer_mask = stages["schedule"]
+learners, redeemers = stages["trajectories"]
+results = stages["summary"]
+months = list(range(1, duration_months + 1))
 
 # -----------------------------
 # Executive Recommendation
 # -----------------------------
-summary_clean = summary.copy()
-summary_clean["Total Revenue ($)"] = summary_clean["Total Revenue"].replace(r'[$,]', '', regex=True).astype(float)
-summary_clean["Net Revenue ($)"] = summary_clean["Net Revenue"].replace(r'[$,]', '', regex=True).astype(float)
-summary_clean["Incentive Cost ($)"] = summary_clean["Incentive Cost"].replace(r'[$,]', '', regex=True).astype(float)
-
-# Calculate actual redeemers regardless of incentive effect
-learners_at_s1_drop = learners_s1[drop_month - 1]
-learners_at_s2_drop = learners_s2[drop_month - 1]
-cost_s1 = learners_at_s1_drop * (redeem_rate_1 / 100) * incentive_cost
-cost_s2 = learners_at_s2_drop * (redeem_rate_2 / 100) * incentive_cost
-
-# Define liability (unrealized value still owed post-redemption)
-liability_s1 = cost_s1 if incentive_effect_1 == 0 else 0
-liability_s2 = cost_s2 if incentive_effect_2 == 0 else 0
-
-# Update cost, liability, and recompute net revenue
-summary_clean.loc[summary_clean["Scenario"] == "Scenario 1", "Incentive Cost ($)"] = cost_s1
-summary_clean.loc[summary_clean["Scenario"] == "Scenario 2", "Incentive Cost ($)"] = cost_s2
-summary_clean.loc[summary_clean["Scenario"] == "Scenario 1", "Liability Incentive ($)"] = liability_s1
-summary_clean.loc[summary_clean["Scenario"] == "Scenario 2", "Liability Incentive ($)"] = liability_s2
-summary_clean.loc[summary_clean["Scenario"] == "Baseline", "Liability Incentive ($)"] = 0
-
-summary_clean["Incentive Cost"] = summary_clean["Incentive Cost ($)"].apply(lambda x: f"${x:,.0f}")
-summary_clean["Net Revenue ($)"] = summary_clean["Total Revenue ($)"] - summary_clean["Incentive Cost ($)"]
-summary_clean["Net Revenue"] = summary_clean["Net Revenue ($)"].apply(lambda x: f"${x:,.0f}")
-summary_clean["Liability Incentive"] = summary_clean["Liability Incentive ($)"].apply(lambda x: f"${x:,.0f}")
-
-# Reorder columns for display
-columns_order = [
-    "Scenario", "Total Revenue", "Incentive Cost", "Net Revenue",
-    "Retention Gain", "Retention Gain (%)", "Break-Even Learners Needed", "Liability Incentive"
-]
 st.subheader("Executive Summary")
-st.dataframe(summary_clean[columns_order], use_container_width=True)
-
-# Sort and recommend based on updated net revenue
-best_row = summary_clean.iloc[1:].sort_values("Net Revenue ($)", ascending=False).iloc[0]
-worst_row = summary_clean.iloc[1:].sort_values("Net Revenue ($)", ascending=True).iloc[0]
-message = (
-    f"\n📈 **Recommendation:** Adopt the **{best_row['Scenario']}** – it delivers the highest net revenue of "
-    f"**{best_row['Net Revenue']}**, with a retention uplift of **{best_row['Retention Gain (%)']}**. "
-    f"This requires retaining at least **{best_row['Break-Even Learners Needed']}** additional learners to break even."
-    f"\n\n⚖️ Compared to **{worst_row['Scenario']}**, which yields only **{worst_row['Net Revenue']}** net revenue and "
-    f"a lower retention impact, the recommended approach demonstrates a more cost-effective incentive outcome."
-)
+with tracer.span("summary_table", "render"):
+    st.dataframe(format_summary(results), use_container_width=True)
+
+# Recommend the incentive scenario with the highest net revenue
+with tracer.span("recommendation", "recommend"):
+    best_row = format_row(results, results.best(exclude=[0]))
+    worst_row = format_row(results, results.worst(exclude=[0]))
+    message = (
+        f"\n📈 **Recommendation:** Adopt the **{best_row['scenario']}** – it delivers the highest net revenue of "
+        f"**{best_row['net_revenue']}**, with a retention uplift of **{best_row['retention_gain_pct']}**. "
+        f"This requires retaining at least **{best_row['break_even_learners']}** additional learners to break even."
+    )
+    if n_scenarios > 1:
+        message += (
+            f"\n\n⚖️ Compared to **{worst_row['scenario']}**, which yields only **{worst_row['net_revenue']}** net "
+            f"revenue and a lower retention impact, the recommended approach demonstrates a more cost-effective "
+            f"incentive outcome."
+        )
 st.success(message)
 
 
@@ -140,85 +299,208 @@ st.success(message)
 # Financial Impact Bar Chart
 # -----------------------------
 st.subheader("Financial Impact by Scenario")
-
-# Compute monthly revenue and liability arrays
-monthly_rev_base = [x * revenue_per_month for x in learners_base]
-monthly_rev_s1 = [x * revenue_per_month for x in learners_s1]
-monthly_rev_s2 = [x * revenue_per_month for x in learners_s2]
-
-monthly_liab_s1 = [0] * duration_months
-monthly_liab_s2 = [0] * duration_months
-monthly_liab_s1[drop_month - 1] = learners_s1[drop_month - 1] * (redeem_rate_1 / 100) * incentive_cost
-monthly_liab_s2[drop_month - 1] = learners_s2[drop_month - 1] * (redeem_rate_2 / 100) * incentive_cost
-
-# Calculate scenario totals
-rev_base = sum(monthly_rev_base)
-rev_s1 = sum(monthly_rev_s1)
-rev_s2 = sum(monthly_rev_s2)
-cost_s1 = monthly_liab_s1[drop_month - 1]
-cost_s2 = monthly_liab_s2[drop_month - 1]
-net_s1 = rev_s1 - cost_s1
-net_s2 = rev_s2 - cost_s2
-
-fin_fig = go.Figure()
-fin_fig.add_bar(x=["Baseline", "Scenario 1", "Scenario 2"], y=[rev_base, rev_s1, rev_s2], name="Total Revenue", marker_color="#6baed6")
-fin_fig.add_bar(x=["Baseline", "Scenario 1", "Scenario 2"], y=[0, cost_s1, cost_s2], name="Incentive Cost", marker_color="#fc9272")
-fin_fig.add_bar(x=["Baseline", "Scenario 1", "Scenario 2"], y=[rev_base, net_s1, net_s2], name="Net Revenue", marker_color="#74c476")
-
-# Add horizontal line for Scenario 2 Net Revenue
-fin_fig.add_shape(
-    type="line",
-    xref="paper",
-    yref="y",
-    x0=0,
-    x1=1,
-    y0=net_s2,
-    y1=net_s2,
-    line=dict(color="#74c476", width=2, dash="dash")
-)
-
-fin_fig.update_layout(
-    barmode="group",
-    xaxis_title="Scenario",
-    yaxis_title="USD ($)",
-    height=400
-)
-st.plotly_chart(fin_fig, use_container_width=True)
+with tracer.span("financial_chart", "render"):
+    st.plotly_chart(stages["financial_figure"], use_container_width=True)
 
 
 # -----------------------------
 # Learner Retention Comparison
 # -----------------------------
 st.subheader("Learner Retention Over Time")
-months = list(range(1, duration_months + 1))
-fig = go.Figure()
-fig.add_trace(go.Scatter(x=months, y=learners_base, name="Baseline", line=dict(width=3)))
-fig.add_trace(go.Scatter(x=months, y=learners_s1, name="Scenario 1", line=dict(width=3, dash="dot")))
-fig.add_trace(go.Scatter(x=months, y=learners_s2, name="Scenario 2", line=dict(width=3, dash="dash")))
-fig.update_layout(xaxis_title="Month", yaxis_title="Active Learners")
-st.plotly_chart(fig, use_container_width=True)
+with tracer.span("retention_chart", "render"):
+    st.plotly_chart(stages["retention_figure"], use_container_width=True)
 
 # -----------------------------
 # Monthly Revenue and Liability
 # -----------------------------
 st.subheader("Monthly Revenue and Incentive Liability")
-monthly_rev_base = [x * revenue_per_month for x in learners_base]
-monthly_rev_s1 = [x * revenue_per_month for x in learners_s1]
-monthly_rev_s2 = [x * revenue_per_month for x in learners_s2]
+with tracer.span("monthly_chart", "render"):
+    st.plotly_chart(stages["monthly_figure"])
+
+# -----------------------------
+# Sensitivity & Break-Even
+# -----------------------------
+st.subheader("Sensitivity & Break-Even")
+with st.expander("Exact break-even thresholds and net revenue sensitivity to every input"):
+    sens_scenario = st.selectbox("Scenario", scenario_names[1:], index=min(1, n_scenarios - 1),
+                                 key="sensitivity_scenario")
+    i = scenario_names.index(sens_scenario) - 1
+    solved, _ = stages["sensitivities"]
+    if has_extra_offers[i + 1]:
+        st.warning(f"{sens_scenario}'s additional offers are not included here; this analysis covers its sidebar offer.")
+
+    rows = []
+    for name, label in PARAMETER_LABELS.items():
+        value, gradient = solved.values[name][i], solved.gradient[name][i]
+        if name in RATE_PARAMETERS:
+            # Show rates in percentage points, as in the sidebar
+            value, gradient = value * 100, gradient / 100
+        threshold = solved.break_even.get(name, np.full(n_scenarios, np.nan))[i]
+        rows.append({
+            "Parameter": label,
+            "Current value": f"{value:,.2f}",
+            "Break-even value": "-" if np.isnan(threshold) else
+                                f"{threshold * 100 if name in RATE_PARAMETERS else threshold:,.2f}",
+            "Net revenue change per +1 unit": f"${gradient:,.2f}",
+            "Elasticity": f"{solved.elasticity[name][i]:.2f}",
+        })
+    with tracer.span("sensitivity_table", "render"):
+        st.dataframe(pd.DataFrame(rows), use_container_width=True)
+
+    min_effect = solved.break_even["effect"][i]
+    max_cost = solved.break_even["incentive_cost"][i]
+    st.info(
+        f"{sens_scenario} changes net revenue by **${solved.uplift[i]:,.0f}** versus the Baseline. "
+        + (f"Net revenue equals the Baseline's at a retention improvement of **{min_effect * 100:.1f}%**"
+           if not np.isnan(min_effect) else "No retention improvement between 0% and 100% changes whether it pays off")
+        + (f" and at an incentive cost of **${max_cost:,.2f}** per redeemer." if not np.isnan(max_cost) else ".")
+    )
+    st.caption("Rates are in percentage points. Break-even values are where net revenue equals the Baseline's; "
+               "elasticities are the % change in net revenue per 1% change in the input.")
+    with tracer.span("tornado_chart", "render"):
+        st.plotly_chart(stages["tornado_figures"][i], use_container_width=True)
+
+# -----------------------------
+# Optimal Incentive Search
+# -----------------------------
+st.subheader("Optimal Incentive Search")
+with st.expander("Sweep incentive parameters to find the net-revenue-optimal configuration"):
+    sweep_col1, sweep_col2 = st.columns(2)
+    effect_range = sweep_col1.slider("Retention improvement range (%)", 0, 100, (0, 100))
+    redeem_range = sweep_col1.slider("Redeem rate range (%)", 0, 100, (0, 100))
+    cost_range = sweep_col2.slider("Incentive cost range ($)", 0.0, 100.0, (0.0, 10.0))
+    month_range = sweep_col2.slider("Offer month range", 2, duration_months - 1, (2, duration_months - 1))
+    grid_steps = st.select_slider("Grid points per range", [11, 21, 51, 101, 201], value=51)
+
+    if st.button("Run sweep"):
+        with tracer.span("sweep", "simulate"):
+            result = memoize(cache)(sweep)(
+                np.linspace(*effect_range, grid_steps) / 100,
+                np.linspace(*redeem_range, grid_steps) / 100,
+                np.linspace(*cost_range, grid_steps),
+                np.arange(month_range[0], month_range[1] + 1),
+                initial_learners=initial_learners,
+                duration_months=duration_months,
+                drop_off_rate=drop_off_rate / 100,
+                organic_drop_pre=organic_drop_pre / 100,
+                organic_drop_post=organic_drop_post / 100,
+                revenue_per_month=revenue_per_month,
+                redeemers_stay_full=redeemers_stay_full,
+            )
+        best = result.best
+        st.success(
+            f"🎯 **Optimal incentive** across {result.evaluated:,} configurations: offer in **month {best['drop_month']}** "
+            f"at **${best['incentive_cost']:,.2f}** per redeemer, with **{best['effect'] * 100:.0f}%** retention improvement "
+            f"and **{best['redeem_rate'] * 100:.0f}%** redemption. Net revenue is **${best['net_revenue']:,.0f}** "
+            f"versus **${best['baseline_net_revenue']:,.0f}** for the Baseline; it stays ahead of the Baseline up to "
+            f"**${best['break_even_cost']:,.2f}** per redeemer."
+        )
+        st.caption("Net revenue falls linearly with the incentive cost, so the cheapest cost in the range is always "
+                   "optimal; the break-even cost map shows how much each configuration can afford to pay.")
+
+        heat_fig = go.Figure(go.Heatmap(
+            x=result.redeem_rates * 100,
+            y=result.effects * 100,
+            z=result.surface,
+            colorscale="Viridis",
+            colorbar=dict(title="Net Revenue ($)")
+        ))
+        heat_fig.update_layout(
+            title="Best Net Revenue by Retention Improvement and Redeem Rate",
+            xaxis_title="Redeem rate (%)",
+            yaxis_title="Retention improvement (%)",
+            height=500
+        )
+        st.plotly_chart(heat_fig, use_container_width=True)
+
+        cost_fig = go.Figure(go.Heatmap(
+            x=result.redeem_rates * 100,
+            y=result.effects * 100,
+            z=np.where(np.isfinite(result.break_even_cost), result.break_even_cost, np.nan),
+            colorscale="Viridis",
+            colorbar=dict(title="Break-even cost ($)")
+        ))
+        cost_fig.update_layout(
+            title="Highest Incentive Cost per Redeemer that Still Matches the Baseline",
+            xaxis_title="Redeem rate (%)",
+            yaxis_title="Retention improvement (%)",
+            height=500
+        )
+        st.plotly_chart(cost_fig, use_container_width=True)
 
-monthly_liab_s1 = [0] * duration_months
-monthly_liab_s2 = [0] * duration_months
-monthly_liab_s1[drop_month - 1] = learners_s1[drop_month - 1] * (redeem_rate_1 / 100) * incentive_cost
-monthly_liab_s2[drop_month - 1] = learners_s2[drop_month - 1] * (redeem_rate_2 / 100) * incentive_cost
+# -----------------------------
+# Uncertainty Analysis
+# -----------------------------
+st.subheader("Uncertainty Analysis")
+with st.expander("Monte Carlo simulation of an incentive scenario under uncertain inputs"):
+    mc_col1, mc_col2 = st.columns(2)
+    mc_scenario = mc_col1.selectbox("Scenario", scenario_names[1:], index=min(1, n_scenarios - 1))
+    mc_samples = mc_col1.select_slider("Samples", [10_000, 100_000, 1_000_000], value=100_000)
+    drop_sd = mc_col2.slider("Drop-off rate uncertainty (± pp, 1 sd)", 0, 25, 5)
+    incentive_sd = mc_col2.slider("Incentive effect & redeem rate uncertainty (± pp, 1 sd)", 0, 50, 10)
+
+    if has_extra_offers[scenario_names.index(mc_scenario)]:
+        st.caption(f"Simulates {mc_scenario}'s sidebar offer; its additional offers are not included.")
+
+    if st.button("Run Monte Carlo"):
+        mc_effect = incentive_effects[scenario_names.index(mc_scenario)]
+        mc_redeem = incentive_redeem_rates[scenario_names.index(mc_scenario)]
+        with tracer.span("monte_carlo", "simulate"):
+            mc = monte_carlo(
+                mc_samples,
+                initial_learners=initial_learners,
+                duration_months=duration_months,
+                drop_month=drop_month,
+                drop_off_rate=Normal(drop_off_rate / 100, drop_sd / 100),
+                organic_drop_pre=Normal(organic_drop_pre / 100, drop_sd / 100),
+                organic_drop_post=Normal(organic_drop_post / 100, drop_sd / 100),
+                effect=Normal(mc_effect / 100, incentive_sd / 100),
+                redeem_rate=Normal(mc_redeem / 100, incentive_sd / 100),
+                revenue_per_month=revenue_per_month,
+                incentive_cost=incentive_cost,
+                redeemers_stay_full=redeemers_stay_full,
+            )
+        mc_pct = mc.net_revenue_percentiles
+        metric_cols = st.columns(3)
+        metric_cols[0].metric("Median net revenue", f"${mc_pct[50]:,.0f}")
+        metric_cols[1].metric("90% interval", f"${mc_pct[5]:,.0f} – ${mc_pct[95]:,.0f}")
+        metric_cols[2].metric("Probability of breaking even vs Baseline", f"{mc.prob_break_even:.1%}")
+
+        band_fig = go.Figure(charts.band_traces(months, mc.retention_bands))
+        band_fig.update_layout(title=f"{mc_scenario} Retention Confidence Bands", xaxis_title="Month",
+                               yaxis_title="Active Learners", height=400)
+        st.plotly_chart(band_fig, use_container_width=True)
 
-bar_fig = go.Figure()
-bar_fig.add_bar(x=months, y=monthly_rev_base, name="Baseline Revenue", marker_color="#6baed6")
-bar_fig.add_bar(x=months, y=monthly_rev_s1, name="Scenario 1 Revenue", marker_color="#9ecae1")
-bar_fig.add_bar(x=months, y=monthly_rev_s2, name="Scenario 2 Revenue", marker_color="#74c476")
-bar_fig.add_bar(x=months, y=monthly_liab_s1, name="Scenario 1 Liability", marker_color="#fcae91")
-bar_fig.add_bar(x=months, y=monthly_liab_s2, name="Scenario 2 Liability", marker_color="#fc9272")
-bar_fig.update_layout(barmode="group", xaxis_title="Month", yaxis_title="USD ($)", height=400)
-st.plotly_chart(bar_fig)
+# -----------------------------
+# Learner-Level Simulation
+# -----------------------------
+st.subheader("Learner-Level Simulation")
+with st.expander("Simulate every learner individually as they redeem, churn or stay"):
+    agent_col1, agent_col2 = st.columns(2)
+    agent_scenario = agent_col1.selectbox("Scenario to simulate", scenario_names, index=min(2, n_scenarios))
+    agent_learners = agent_col1.number_input("Learners to simulate", 100, 10_000_000, value=int(initial_learners))
+    agent_seed = agent_col2.number_input("Random seed", 0, 2**31 - 1, value=0)
+
+    if st.button("Run learner-level simulation"):
+        i = scenario_names.index(agent_scenario)
+        with tracer.span("learner_simulation", "simulate"):
+            agents = simulate_agents(int(agent_learners), monthly_drop, offers.effect[i], offers.redeem_rate[i],
+                                     offers.mask[i], redeemers_stay_full, seed=int(agent_seed))
+        agent_revenue = agents.learners.sum() * revenue_per_month
+        agent_cost = (agents.redeemers[:-1] * offers.cost[i]).sum()
+        metric_cols = st.columns(3)
+        metric_cols[0].metric("Learners at program end", f"{agents.learners[-1]:,}")
+        metric_cols[1].metric("Redeemers", f"{agents.redeemers.sum():,}")
+        metric_cols[2].metric("Net revenue", f"${agent_revenue - agent_cost:,.0f}")
+
+        agent_fig = go.Figure([
+            charts.line(months, agents.learners, name="Learner-level", line=dict(width=3)),
+            charts.line(months, learners[i] * agent_learners / initial_learners, name="Cohort-level",
+                        line=dict(width=3, dash="dot")),
+        ])
+        agent_fig.update_layout(title=f"{agent_scenario} Retention: Learner-Level vs Cohort-Level",
+                                xaxis_title="Month", yaxis_title="Active Learners", height=400)
+        st.plotly_chart(agent_fig, use_container_width=True)
 
 # -----------------------------
 # Assumptions & How to Use
@@ -226,6 +508,7 @@ st.plotly_chart(bar_fig)
 st.subheader("Assumptions")
 st.markdown("""
 - Learners drop off organically before and after the incentive month.
+- Additional offers reach every learner active in their month, at their own cost, effectiveness and redeem rate.
 - Drop-off rate in the incentive month is reduced by the specified effectiveness %.
 - Only a % of learners who would have dropped off are retained via the incentive.
 - Retained redeemers are assumed to stay till the end if the checkbox is enabled.
@@ -236,4 +519,36 @@ st.subheader("How to Use")
 st.markdown("""
 - Adjust parameters in the sidebar.
 - Use the graphs and executive summary to compare scenarios and inform strategy.
-""")
\ No newline at end of file
+""")
+
+cache_stats = cache.stats()
+st.sidebar.caption(
+    f"Result cache: {cache_stats['hits'] + cache_stats['disk_hits']} hits · {cache_stats['misses']} misses · "
+    f"{cache_stats['entries']} entries · recomputed: {', '.join(pipeline.computed) or 'nothing'}"
+)
+
+trace = tracer.end()
+if st.sidebar.checkbox("Show developer panel", value=False):
+    st.subheader("Developer Panel")
+    category_ms = ", ".join(f"{category} {seconds * 1000:.1f} ms" for category, seconds in trace.totals().items())
+    st.caption(
+        f"Last rerun: {trace.duration * 1000:.1f} ms ({category_ms or 'nothing timed'}) · "
+        f"{len(tracer.recent('retention-simulator'))} reruns kept"
+    )
+
+    latency_fig = go.Figure([
+        go.Histogram(x=ms, name=category, opacity=0.6)
+        for category, ms in tracer.latencies("retention-simulator").items()
+    ])
+    latency_fig.update_layout(barmode="overlay", title="Time per Rerun by Category", xaxis_title="Milliseconds",
+                              yaxis_title="Reruns", height=350)
+    st.plotly_chart(latency_fig, use_container_width=True)
+    st.dataframe(pd.DataFrame(tracer.summary("retention-simulator")), use_container_width=True)
+
+    # Memory tracing is process-wide, so it is set when the server starts rather than from a session
+    if tracemalloc.is_tracing():
+        st.caption("Peak memory per step is traced for every session of this server.")
+    else:
+        st.caption("Peak memory is not traced; start the app with `SIMULATOR_TRACE_MEMORY=1` to record it.")
+    st.download_button("Download traces (JSON)", tracer.export_json("retention-simulator"),
+                       file_name="simulator-traces.json", mime="application/json")
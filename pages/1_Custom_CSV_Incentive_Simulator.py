@@ -1,20 +1,49 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
+
+from simulator import charts, engine
+from simulator.cache import shared_cache
+from simulator.formatting import format_row, format_summary
+from simulator.ingest import profile_activity_log
+from simulator.pipeline import Pipeline
+from simulator.results import ScenarioResults
+from simulator.schedules import DropSchedules, compare_schedules, load_schedules
 
 st.set_page_config(page_title="Custom CSV Retention Scenario", layout="wide")
 
+MAX_SCENARIOS = 10
+# Sidebar title and default retention improvement / redeem rate (%) per incentive scenario
+SCENARIO_PRESETS = {
+    1: ("No Effect", 0, 50),
+    2: ("Improved Retention", 100, 70),
+}
+LINE_STYLES = (
+    dict(color="#6baed6"), dict(color="#fc9272", dash="dot"), dict(color="#74c476", dash="dash"),
+    dict(color="#9e9ac8", dash="dashdot"), dict(color="#fdae6b", dash="longdash"),
+)
+REVENUE_COLORS = ("#6baed6", "#fc9272", "#74c476", "#9e9ac8", "#fdae6b", "#9ecae1")
+LIABILITY_COLORS = ("#fcbba1", "#a1d99b", "#dadaeb", "#fdd0a2", "#c6dbef")
+
 st.title("Custom CSV Retention Scenario")
 st.markdown("""
 Upload a custom CSV with two columns:
 - **Month** (1 to N)
 - **Drop-off Rate** (as a percentage)
 
-This page assumes you want full control over when drop-offs occur.
+This page assumes you want full control over when drop-offs occur. Add a **schedule_id** column
+to compare many drop-off schedules from one file.
+
+Alternatively, upload a raw learner activity log (CSV, Parquet or Arrow) with one row per
+event and **learner_id** and **month** columns; monthly drop-off rates are derived from
+each learner's last active month.
 """)
 
-dropoff_file = st.sidebar.file_uploader("Upload CSV with Drop-off Rates", type=["csv"], key="custom_csv_upload")
+input_type = st.sidebar.radio("Drop-off input", ["Drop-off schedule", "Learner activity log"])
+if input_type == "Drop-off schedule":
+    dropoff_file = st.sidebar.file_uploader("Upload CSV with Drop-off Rates", type=["csv"], key="custom_csv_upload")
+else:
+    dropoff_file = st.sidebar.file_uploader("Upload learner activity log", type=["csv", "parquet", "arrow", "feather"],
+                                            key="activity_log_upload")
 
 # --- SIDEBAR PARAMETERS ---
 st.sidebar.header("Simulation Settings")
@@ -24,166 +53,220 @@ revenue_per_month = st.sidebar.number_input("Revenue per learner/month ($)", 1.0
 incentive_cost = st.sidebar.number_input("Incentive cost per learner ($)", 0.0, 10.0, 5.0)
 redeemers_stay_full = st.sidebar.checkbox("Assume redeemers stay to end of program", True)
 
-st.sidebar.subheader("Scenario 1: No Effect")
-incentive_effect_1 = st.sidebar.slider("Retention improvement (%) - Scenario 1", 0, 100, 0)
-redeem_rate_1 = st.sidebar.slider("Redeem rate (%) - Scenario 1", 0, 100, 50)
+n_scenarios = st.sidebar.number_input("Number of incentive scenarios", 1, MAX_SCENARIOS, value=2)
+scenario_names = ["Baseline"]
+incentive_effects, incentive_redeem_rates = [0], [0]
+for i in range(1, n_scenarios + 1):
+    title, effect_default, redeem_default = SCENARIO_PRESETS.get(i, ("Intervention", 50, 50))
+    st.sidebar.subheader(f"Scenario {i}: {title}")
+    scenario_names.append(f"Scenario {i}")
+    incentive_effects.append(st.sidebar.slider(f"Retention improvement (%) - Scenario {i}", 0, 100, effect_default))
+    incentive_redeem_rates.append(st.sidebar.slider(f"Redeem rate (%) - Scenario {i}", 0, 100, redeem_default))
+
+
+cache = shared_cache()
+
+
+def load_activity_schedule(upload, duration_months):
+    # Keyed by the upload's id and size, so reruns neither copy nor hash the whole log;
+    # it is streamed from the uploaded file only when it is new
+    def profile():
+        upload.seek(0)
+        log = profile_activity_log(upload, duration_months)
+        schedules = DropSchedules(ids=np.array(["Activity log"], dtype=object),
+                                  rates=np.append(log.drop_rates, 0.0)[np.newaxis])
+        return schedules, f"Derived from {log.rows:,} activity rows covering {log.initial_learners:,} learners."
+
+    return cache.get_or_compute(f"activity-schedule:{duration_months}:{upload.file_id}:{upload.size}", profile)
+
+
+pipeline = Pipeline("custom-csv-simulator", cache)
+
 
-st.sidebar.subheader("Scenario 2: Improved Retention")
-incentive_effect_2 = st.sidebar.slider("Retention improvement (%) - Scenario 2", 0, 100, 100)
-redeem_rate_2 = st.sidebar.slider("Redeem rate (%) - Scenario 2", 0, 100, 70)
+# Each stage is recomputed only when its own inputs or an upstream stage change,
+# so financial edits rescale the cached trajectories instead of re-simulating them
+@pipeline.stage(inputs=("drop_rates",))
+def schedule(drop_rates):
+    # The final month's rate never applies; an incentive is offered in every month with a drop-off
+    monthly_drop = drop_rates[:-1]
+    return monthly_drop, monthly_drop > 0
+
+
+@pipeline.stage(after=("schedule",), inputs=("initial_learners", "effects", "redeem_rates", "redeemers_stay_full"))
+def trajectories(schedule, initial_learners, effects, redeem_rates, redeemers_stay_full):
+    monthly_drop, offer_mask = schedule
+    # Offers on this page only reach the learners about to drop off
+    learners = engine.simulate_learners(initial_learners, monthly_drop, effects, redeem_rates,
+                                        offer_mask, redeemers_stay_full, engine.AT_RISK_MODEL)
+    redeemers = engine.incentive_redeemers(learners, monthly_drop, redeem_rates, offer_mask, engine.AT_RISK_MODEL)
+    return learners, redeemers
+
+
+@pipeline.stage(after=("trajectories",), inputs=("revenue_per_month", "incentive_cost"))
+def financials(trajectories, revenue_per_month, incentive_cost):
+    learners, redeemers = trajectories
+    return engine.monthly_financials(learners, redeemers, revenue_per_month, incentive_cost)
+
+
+@pipeline.stage(after=("schedule", "trajectories", "financials"), inputs=("scenario_names", "effects", "revenue_per_month"))
+def summary(schedule, trajectories, financials, scenario_names, effects, revenue_per_month):
+    (_, offer_mask), (learners, _), (revenue, cost) = schedule, trajectories, financials
+    return ScenarioResults.from_financials(scenario_names, learners, revenue, cost, effects, offer_mask,
+                                           revenue_per_month, model=engine.AT_RISK_MODEL)
+
+
+# Figures are cached as plain dicts, which the shared cache copies cheaply for every session
+@pipeline.stage(after=("summary",))
+def financial_figure(summary):
+    # Plotting and pandas are imported by the stages that need them, so the page opens without them
+    import plotly.graph_objects as go
+
+    fin_fig = go.Figure()
+    fin_fig.add_bar(x=summary.names, y=summary.total_revenue, name="Total Revenue", marker_color="#6baed6")
+    fin_fig.add_bar(x=summary.names, y=summary.incentive_cost, name="Incentive Cost", marker_color="#fc9272")
+    fin_fig.add_bar(x=summary.names, y=summary.net_revenue, name="Net Revenue", marker_color="#74c476")
+    fin_fig.update_layout(barmode="group", xaxis_title="Scenario", yaxis_title="USD ($)", height=400)
+    return fin_fig.to_dict()
+
+
+@pipeline.stage(after=("trajectories",), inputs=("scenario_names",))
+def retention_figure(trajectories, scenario_names):
+    import plotly.graph_objects as go
+
+    months = list(range(1, trajectories[0].shape[1] + 1))
+    # One line for every scenario and the Baseline, even at the scenario limit
+    fig_ret = go.Figure(charts.scenario_traces(months, trajectories[0], scenario_names, [
+        dict(mode='lines+markers', line=dict(width=3, **LINE_STYLES[i % len(LINE_STYLES)]))
+        for i in range(len(scenario_names))
+    ], max_lines=MAX_SCENARIOS + 1))
+    fig_ret.update_layout(title="Retention Curve", xaxis_title="Month", yaxis_title="Active Learners", height=400)
+    return fig_ret.to_dict()
+
+
+@pipeline.stage(after=("financials",), inputs=("scenario_names",))
+def monthly_figure(financials, scenario_names):
+    import plotly.graph_objects as go
+
+    revenue, cost = financials
+    # Long horizons are averaged into bins so the bar count stays bounded
+    months, binned_values, bin_width = charts.binned(list(range(1, revenue.shape[1] + 1)), [*revenue, *cost[1:]])
+    revenue, cost = binned_values[:len(scenario_names)], binned_values[len(scenario_names):]
+    fig_bar = go.Figure()
+    for i, (name, values) in enumerate(zip(scenario_names, revenue)):
+        fig_bar.add_bar(x=months, y=values, name=f'{name} Revenue', marker_color=REVENUE_COLORS[i % len(REVENUE_COLORS)])
+    for i, (name, values) in enumerate(zip(scenario_names[1:], cost)):
+        fig_bar.add_bar(x=months, y=values, name=f'{name} Liability',
+                        marker_color=LIABILITY_COLORS[i % len(LIABILITY_COLORS)])
+    fig_bar.update_layout(barmode='group', title="Revenue & Incentive Cost per Month", xaxis_title="Month" if bin_width == 1 else f"Month ({bin_width}-month average)", yaxis_title="Amount ($)", height=400)
+    return fig_bar.to_dict()
+
+
+# Every uploaded schedule against every scenario, simulated as one batch
+@pipeline.stage(inputs=("schedule_ids", "schedule_rates", "scenario_names", "effects", "redeem_rates",
+                        "initial_learners", "redeemers_stay_full", "revenue_per_month", "incentive_cost"))
+def schedule_comparison(schedule_ids, schedule_rates, scenario_names, effects, redeem_rates, initial_learners,
+                        redeemers_stay_full, revenue_per_month, incentive_cost):
+    import pandas as pd
+
+    results = compare_schedules(DropSchedules(np.asarray(schedule_ids, dtype=object), schedule_rates), effects,
+                                redeem_rates, initial_learners, revenue_per_month, incentive_cost,
+                                redeemers_stay_full, scenario_names)
+    net_revenue = results.net_revenue.reshape(len(schedule_ids), len(scenario_names))
+    best = net_revenue[:, 1:].argmax(axis=1) + 1
+    rows = np.arange(len(schedule_ids))
+    return pd.DataFrame({
+        "Schedule": schedule_ids,
+        "Baseline Net Revenue ($)": net_revenue[:, 0],
+        "Best Scenario": np.asarray(scenario_names, dtype=object)[best],
+        "Best Net Revenue ($)": net_revenue[rows, best],
+        "Gain vs Baseline ($)": net_revenue[rows, best] - net_revenue[:, 0],
+    })
 
 
 if dropoff_file is not None:
-    months_df = pd.DataFrame({"Month": list(range(1, duration_months + 1))})
-    csv_df = pd.read_csv(dropoff_file).iloc[:, :2]
-    csv_df.columns = ["Month", "Drop-off Rate (%)"]
-    csv_df["Month"] = pd.to_numeric(csv_df["Month"], errors='coerce').astype(pd.Int64Dtype())
-    csv_df["Drop-off Rate (%)"] = pd.to_numeric(csv_df["Drop-off Rate (%)"], errors='coerce').fillna(0.0)
-    csv_df = csv_df.dropna(subset=["Month"]).astype({"Month": int})
-
-    merged_df = pd.merge(months_df, csv_df, how="left", on="Month")
-    merged_df["Drop-off Rate (%)"] = merged_df["Drop-off Rate (%)"].fillna(0.0)
+    try:
+        if input_type == "Learner activity log":
+            schedules, source_note = load_activity_schedule(dropoff_file, duration_months)
+        else:
+            schedules, source_note = load_schedules(dropoff_file.getvalue(), duration_months, cache), None
+    except ValueError as exc:
+        st.error(f"Invalid drop-off schedule – {exc}")
+        st.stop()
+    if source_note:
+        st.caption(source_note)
+
+    schedule_index = 0
+    if len(schedules) > 1:
+        st.caption(f"{len(schedules):,} drop-off schedules in this file.")
+        schedule_index = st.selectbox("Schedule to inspect", range(len(schedules)),
+                                      format_func=lambda i: str(schedules.ids[i]))
+
     st.subheader("Drop-off Schedule by Month")
-    st.dataframe(merged_df, use_container_width=True)
-
-    drop_rates = merged_df["Drop-off Rate (%)"] / 100
-
-    def simulate_scenario(effect, rate):
-        learners = [initial_learners]
-        for i in range(1, duration_months):
-            prev = learners[-1]
-            drop = drop_rates.iloc[i - 1]
-            retained = 0
-            if drop > 0 and redeemers_stay_full:
-                redeemed = prev * drop * (rate / 100)
-                retained = redeemed * (effect / 100)
-            learners.append(prev * (1 - drop) + retained)
-        return learners
-
-    baseline = simulate_scenario(0, 0)
-    incentive_s1 = simulate_scenario(incentive_effect_1, redeem_rate_1)
-    incentive_s2 = simulate_scenario(incentive_effect_2, redeem_rate_2)
-
-    retention_df = pd.DataFrame({
-        "Month": range(1, duration_months + 1),
-        "Baseline": baseline,
-        "Scenario 1": incentive_s1,
-        "Scenario 2": incentive_s2
-    })
+    st.dataframe(schedules.to_frame(schedule_index), use_container_width=True)
+
+    targets = ["summary", "financial_figure", "retention_figure", "monthly_figure"]
+    if len(schedules) > 1:
+        targets.append("schedule_comparison")
 
-    def calc_financials(learners, redeem_rate, effect):
-        revenue = [x * revenue_per_month for x in learners]
-        cost = []
-        for i in range(duration_months):
-            drop = drop_rates.iloc[i]
-            if drop > 0:
-                redeemers = learners[i] * drop * (redeem_rate / 100)
-                retained = redeemers * (effect / 100)
-                cost.append(redeemers * incentive_cost if effect == 0 else retained * incentive_cost)
-            else:
-                cost.append(0)
-        return revenue, cost
-
-    rev_base, cost_base = calc_financials(baseline, 0, 0)
-    rev_s1, cost_s1 = calc_financials(incentive_s1, redeem_rate_1, incentive_effect_1)
-    rev_s2, cost_s2 = calc_financials(incentive_s2, redeem_rate_2, incentive_effect_2)
+    stages = pipeline.run({
+        "drop_rates": schedules.rates[schedule_index],
+        "schedule_ids": [str(schedule_id) for schedule_id in schedules.ids],
+        "schedule_rates": schedules.rates,
+        "initial_learners": initial_learners,
+        "scenario_names": scenario_names,
+        "effects": np.array(incentive_effects) / 100,
+        "redeem_rates": np.array(incentive_redeem_rates) / 100,
+        "redeemers_stay_full": redeemers_stay_full,
+        "revenue_per_month": revenue_per_month,
+        "incentive_cost": incentive_cost,
+    }, targets=targets)
+    results = stages["summary"]
 
     # --- EXECUTIVE SUMMARY ---
-    total_revenue_base = sum(rev_base)
-    total_revenue_s1 = sum(rev_s1)
-    total_revenue_s2 = sum(rev_s2)
-    total_cost_s1 = sum(cost_s1)
-    total_cost_s2 = sum(cost_s2)
-    net_revenue_s1 = total_revenue_s1 - total_cost_s1
-    net_revenue_s2 = total_revenue_s2 - total_cost_s2
-
-    gain_s1 = incentive_s1[-1] - baseline[-1]
-    gain_s2 = incentive_s2[-1] - baseline[-1]
-    pct_gain_s1 = (gain_s1 / baseline[-1]) * 100 if baseline[-1] > 0 else 0
-    pct_gain_s2 = (gain_s2 / baseline[-1]) * 100 if baseline[-1] > 0 else 0
-    break_even_s1 = total_cost_s1 / (revenue_per_month * (duration_months - 1)) if duration_months > 1 else 0
-    break_even_s2 = total_cost_s2 / (revenue_per_month * (duration_months - 1)) if duration_months > 1 else 0
-
-    summary_df = pd.DataFrame([
-        {
-            "Scenario": "Baseline",
-            "Total Revenue": f"${total_revenue_base:,.2f}",
-            "Incentive Cost": "$0",
-            "Net Revenue": f"${total_revenue_base:,.2f}",
-            "Retention Gain": "-",
-            "Retention Gain (%)": "-",
-            "Break-Even Learners Needed": "-"
-        },
-        {
-            "Scenario": "Scenario 1",
-            "Total Revenue": f"${total_revenue_s1:,.2f}",
-            "Incentive Cost": f"${total_cost_s1:,.2f}",
-            "Net Revenue": f"${net_revenue_s1:,.2f}",
-            "Retention Gain": f"{gain_s1:.0f} learners",
-            "Retention Gain (%)": f"{pct_gain_s1:.1f}%",
-            "Break-Even Learners Needed": f"{break_even_s1:.0f}"
-        },
-        {
-            "Scenario": "Scenario 2",
-            "Total Revenue": f"${total_revenue_s2:,.2f}",
-            "Incentive Cost": f"${total_cost_s2:,.2f}",
-            "Net Revenue": f"${net_revenue_s2:,.2f}",
-            "Retention Gain": f"{gain_s2:.0f} learners",
-            "Retention Gain (%)": f"{pct_gain_s2:.1f}%",
-            "Break-Even Learners Needed": f"{break_even_s2:.0f}"
-        }
-    ])
+    summary_df = format_summary(results, columns=["total_revenue", "incentive_cost", "net_revenue", "retention_gain",
+                                                  "retention_gain_pct", "break_even_learners"], decimals=2)
+    summary_df.loc[0, ["Incentive Cost", "Retention Gain", "Retention Gain (%)", "Break-Even Learners Needed"]] = \
+        ["$0", "-", "-", "-"]
     st.subheader("Executive Summary")
     st.dataframe(summary_df, use_container_width=True)
 
-    best_row = summary_df.iloc[1:].copy()
-    best_row["Net Revenue ($)"] = best_row["Net Revenue"].replace("[$,]", "", regex=True).astype(float)
-    best = best_row.sort_values("Net Revenue ($)", ascending=False).iloc[0]
-    worst = best_row.sort_values("Net Revenue ($)", ascending=True).iloc[0]
+    best = format_row(results, results.best(exclude=[0]), decimals=2)
+    worst = format_row(results, results.worst(exclude=[0]), decimals=2)
 
     message = (
-        f"\n📈 **Recommendation:** Adopt the **{best['Scenario']}** – it delivers the highest net revenue of "
-        f"**{best['Net Revenue']}**, with a retention uplift of **{best['Retention Gain (%)']}**. "
-        f"This requires retaining at least **{best['Break-Even Learners Needed']}** additional learners to break even."
-        f"\n\n⚖️ Compared to **{worst['Scenario']}**, which yields only **{worst['Net Revenue']}**, the recommended option "
-        f"is more cost-effective and delivers greater impact."
+        f"\n📈 **Recommendation:** Adopt the **{best['scenario']}** – it delivers the highest net revenue of "
+        f"**{best['net_revenue']}**, with a retention uplift of **{best['retention_gain_pct']}**. "
+        f"This requires retaining at least **{best['break_even_learners']}** additional learners to break even."
     )
+    if n_scenarios > 1:
+        message += (
+            f"\n\n⚖️ Compared to **{worst['scenario']}**, which yields only **{worst['net_revenue']}**, the recommended "
+            f"option is more cost-effective and delivers greater impact."
+        )
     st.success(message)
 
     # --- FINANCIAL IMPACT BAR CHART ---
     st.subheader("Financial Impact by Scenario")
-    fin_fig = go.Figure()
-    fin_fig.add_bar(x=["Baseline", "Scenario 1", "Scenario 2"],
-                    y=[total_revenue_base, total_revenue_s1, total_revenue_s2],
-                    name="Total Revenue", marker_color="#6baed6")
-    fin_fig.add_bar(x=["Baseline", "Scenario 1", "Scenario 2"],
-                    y=[0, total_cost_s1, total_cost_s2],
-                    name="Incentive Cost", marker_color="#fc9272")
-    fin_fig.add_bar(x=["Baseline", "Scenario 1", "Scenario 2"],
-                    y=[total_revenue_base, net_revenue_s1, net_revenue_s2],
-                    name="Net Revenue", marker_color="#74c476")
-    fin_fig.update_layout(barmode="group", xaxis_title="Scenario", yaxis_title="USD ($)", height=400)
-    st.plotly_chart(fin_fig, use_container_width=True)
+    st.plotly_chart(stages["financial_figure"], use_container_width=True)
 
     # --- RETENTION CURVE ---
     st.subheader("Learner Retention Over Time")
-    fig_ret = go.Figure()
-    fig_ret.add_trace(go.Scatter(x=retention_df["Month"], y=retention_df["Baseline"], mode='lines+markers', name='Baseline', line=dict(color="#6baed6", width=3)))
-    fig_ret.add_trace(go.Scatter(x=retention_df["Month"], y=retention_df["Scenario 1"], mode='lines+markers', name='Scenario 1', line=dict(color="#fc9272", width=3, dash="dot")))
-    fig_ret.add_trace(go.Scatter(x=retention_df["Month"], y=retention_df["Scenario 2"], mode='lines+markers', name='Scenario 2', line=dict(color="#74c476", width=3, dash="dash")))
-    fig_ret.update_layout(title="Retention Curve", xaxis_title="Month", yaxis_title="Active Learners", height=400)
-    st.plotly_chart(fig_ret)
+    st.plotly_chart(stages["retention_figure"])
 
     # --- MONTHLY REVENUE & INCENTIVE LIABILITY ---
     st.subheader("Monthly Revenue and Incentive Liability")
-    fig_bar = go.Figure()
-    fig_bar.add_bar(x=retention_df["Month"], y=rev_base, name='Baseline Revenue', marker_color="#6baed6")
-    fig_bar.add_bar(x=retention_df["Month"], y=rev_s1, name='Scenario 1 Revenue', marker_color="#fc9272")
-    fig_bar.add_bar(x=retention_df["Month"], y=rev_s2, name='Scenario 2 Revenue', marker_color="#74c476")
-    fig_bar.add_bar(x=retention_df["Month"], y=cost_s1, name='Scenario 1 Liability', marker_color="#fcbba1")
-    fig_bar.add_bar(x=retention_df["Month"], y=cost_s2, name='Scenario 2 Liability', marker_color="#a1d99b")
-    fig_bar.update_layout(barmode='group', title="Revenue & Incentive Cost per Month", xaxis_title="Month", yaxis_title="Amount ($)", height=400)
-    st.plotly_chart(fig_bar)
+    st.plotly_chart(stages["monthly_figure"])
+
+    if "schedule_comparison" in stages:
+        st.subheader("All Schedules")
+        st.dataframe(stages["schedule_comparison"].sort_values("Gain vs Baseline ($)", ascending=False),
+                     use_container_width=True, hide_index=True)
 
 else:
     st.info("Upload a CSV to simulate retention and incentives.")
+
+cache_stats = cache.stats()
+st.sidebar.caption(
+    f"Result cache: {cache_stats['hits'] + cache_stats['disk_hits']} hits · {cache_stats['misses']} misses · "
+    f"{cache_stats['entries']} entries · recomputed: {', '.join(pipeline.computed) or 'nothing'}"
+)
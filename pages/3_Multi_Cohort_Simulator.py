@@ -0,0 +1,97 @@
+import streamlit as st
+import numpy as np
+import plotly.graph_objects as go
+
+from simulator import charts, engine
+from simulator.cohorts import simulate_cohorts
+
+st.set_page_config(page_title="Multi-Cohort Simulator", layout="wide")
+
+st.title("Multi-Cohort Simulator")
+st.markdown("""
+New learners enroll every month, and each cohort follows its own drop-off curve relative to
+its enrollment month. This page simulates all overlapping cohorts together and reports revenue
+and incentive liability by calendar month.
+""")
+
+# --- SIDEBAR PARAMETERS ---
+st.sidebar.header("Enrollment")
+n_cohorts = st.sidebar.slider("Monthly cohorts enrolled", 1, 600, 36)
+first_cohort_size = st.sidebar.number_input("Learners in first cohort", 100, 1000000, 1000, 100)
+enrollment_growth = st.sidebar.slider("Enrollment growth per cohort (%)", -10.0, 10.0, 2.0, 0.5)
+horizon_months = st.sidebar.slider("Reporting horizon (months)", 12, 720, 48)
+
+st.sidebar.header("Program")
+duration_months = st.sidebar.slider("Program duration (months)", 4, 12, 8)
+drop_month = st.sidebar.slider("Month of incentive offer", 2, duration_months - 1, 3)
+drop_off_rate = st.sidebar.slider("Major drop-off rate in incentive month (%)", 0, 100, 30)
+organic_drop_pre = st.sidebar.slider("Organic drop-off rate before incentive (%)", 0, 100, 0)
+organic_drop_post = st.sidebar.slider("Organic drop-off rate after incentive (%)", 0, 100, 0)
+drop_drift = st.sidebar.slider("Change in major drop-off per cohort (pp)", -1.0, 1.0, 0.0, 0.05)
+
+st.sidebar.header("Incentive")
+revenue_per_month = st.sidebar.number_input("Revenue per learner/month ($)", 0.0, 100.0, value=5.0)
+incentive_cost = st.sidebar.number_input("Incentive cost per learner ($)", 0.0, 100.0, value=5.0)
+incentive_effect = st.sidebar.slider("Retention improvement from incentive (%)", 0, 100, 100)
+redeem_rate = st.sidebar.slider("% of eligible learners who redeem reward", 0, 100, 70)
+redeemers_stay_full = st.sidebar.checkbox("Assume redeemers stay to end of program", value=True)
+
+# --- COHORT SETUP ---
+start_months = np.arange(n_cohorts)
+cohort_sizes = first_cohort_size * (1 + enrollment_growth / 100) ** start_months
+
+# Each cohort shares the schedule shape, with its major drop-off shifted by the drift
+drop_rates = np.tile(engine.drop_schedule(duration_months, drop_month, drop_off_rate / 100,
+                                          organic_drop_pre / 100, organic_drop_post / 100), (n_cohorts, 1))
+drop_rates[:, drop_month - 1] = np.clip(drop_rates[:, drop_month - 1] + start_months * drop_drift / 100, 0, 1)
+offer_mask = engine.incentive_mask(duration_months, drop_month)
+
+result = simulate_cohorts(start_months, cohort_sizes, drop_rates, incentive_effect / 100, redeem_rate / 100,
+                          offer_mask, revenue_per_month, incentive_cost, redeemers_stay_full, horizon_months)
+baseline = simulate_cohorts(start_months, cohort_sizes, drop_rates, 0, 0, offer_mask,
+                            revenue_per_month, incentive_cost, redeemers_stay_full, horizon_months)
+totals = result.monthly_totals()
+baseline_totals = baseline.monthly_totals()
+
+# --- SUMMARY ---
+st.subheader("Portfolio Summary")
+metric_cols = st.columns(4)
+metric_cols[0].metric("Total revenue", f"${totals['revenue'].sum():,.0f}",
+                      f"${totals['revenue'].sum() - baseline_totals['revenue'].sum():,.0f} vs Baseline")
+metric_cols[1].metric("Incentive cost", f"${totals['incentive_cost'].sum():,.0f}")
+metric_cols[2].metric("Incentive liability", f"${totals['liability'].sum():,.0f}")
+metric_cols[3].metric("Net revenue", f"${totals['net_revenue'].sum():,.0f}",
+                      f"${totals['net_revenue'].sum() - baseline_totals['net_revenue'].sum():,.0f} vs Baseline")
+
+calendar_months = np.arange(1, horizon_months + 1)
+
+# --- ACTIVE LEARNERS ---
+st.subheader("Active Learners by Calendar Month")
+learner_fig = go.Figure([
+    charts.line(calendar_months, baseline_totals["learners"], name="Baseline", line=dict(width=3)),
+    charts.line(calendar_months, totals["learners"], name="With incentive", line=dict(width=3, dash="dash")),
+])
+learner_fig.update_layout(xaxis_title="Calendar month", yaxis_title="Active Learners", height=400)
+st.plotly_chart(learner_fig, use_container_width=True)
+
+# --- MONTHLY REVENUE & LIABILITY ---
+st.subheader("Monthly Revenue and Incentive Liability")
+# Long horizons are averaged into bins so the bar count stays bounded
+bar_months, (base_revenue, revenue, cost, liability), bin_width = charts.binned(
+    calendar_months, [baseline_totals["revenue"], totals["revenue"], totals["incentive_cost"], totals["liability"]])
+bar_fig = go.Figure()
+bar_fig.add_bar(x=bar_months, y=base_revenue, name="Baseline Revenue", marker_color="#6baed6")
+bar_fig.add_bar(x=bar_months, y=revenue, name="Incentive Revenue", marker_color="#74c476")
+bar_fig.add_bar(x=bar_months, y=cost, name="Incentive Cost", marker_color="#fc9272")
+bar_fig.add_bar(x=bar_months, y=liability, name="Incentive Liability", marker_color="#fcbba1")
+bar_fig.update_layout(barmode="group", yaxis_title="USD ($)", height=400,
+                      xaxis_title="Calendar month" if bin_width == 1 else f"Calendar month ({bin_width}-month average)")
+st.plotly_chart(bar_fig, use_container_width=True)
+
+st.subheader("Assumptions")
+st.markdown("""
+- One cohort enrolls at the start of each calendar month, growing by the enrollment growth rate.
+- Every cohort follows the program drop-off schedule relative to its own enrollment month.
+- The major drop-off rate shifts by the per-cohort change, so later cohorts can churn more or less.
+- Incentives are offered to each cohort in its own incentive month.
+""")
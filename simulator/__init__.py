@@ -0,0 +1,50 @@
+"""Shared simulation code for the Retention Incentive Simulator apps and notebook."""
+
+from simulator.agents import AgentSimulation, simulate_agents
+from simulator.cohorts import CohortResult, simulate_cohorts
+from simulator.engine import (
+    drop_schedule,
+    incentive_mask,
+    incentive_redeemers,
+    monthly_financials,
+    monthly_liability,
+    simulate_learners,
+    summarize,
+    summarize_financials,
+)
+from simulator.montecarlo import Beta, MonteCarloResult, Normal, Uniform, monte_carlo
+from simulator.results import ScenarioResults
+from simulator.scenarios import Offer, OfferSchedule, Scenario, compare_scenarios, compile_offers
+from simulator.sensitivity import Sensitivity, sensitivity, tornado
+from simulator.sweep import SweepResult, sweep
+
+__all__ = [
+    "AgentSimulation",
+    "Beta",
+    "CohortResult",
+    "MonteCarloResult",
+    "Normal",
+    "Offer",
+    "OfferSchedule",
+    "Scenario",
+    "ScenarioResults",
+    "Sensitivity",
+    "SweepResult",
+    "Uniform",
+    "compare_scenarios",
+    "compile_offers",
+    "drop_schedule",
+    "incentive_mask",
+    "incentive_redeemers",
+    "monte_carlo",
+    "monthly_financials",
+    "monthly_liability",
+    "sensitivity",
+    "simulate_agents",
+    "simulate_cohorts",
+    "simulate_learners",
+    "summarize",
+    "summarize_financials",
+    "sweep",
+    "tornado",
+]
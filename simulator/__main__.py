@@ -0,0 +1,5 @@
+import sys
+
+from simulator.batch import main
+
+sys.exit(main())
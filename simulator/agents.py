@@ -0,0 +1,136 @@
+"""
+Learner-level stochastic simulation.
+
+Each learner is simulated individually as a Bernoulli process month by month,
+so redemption and churn are tracked per learner instead of as a fraction of a
+continuous cohort. State lives in compact NumPy arrays: one ``uint8`` status
+per learner and a packed bitmask of who redeemed, about 1.1 bytes per learner
+plus a fixed-size working buffer per chunk.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from simulator import engine
+
+ACTIVE = 0
+DROPPED = 1
+RETAINED = 2
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+@dataclass
+class AgentSimulation:
+    """Outcome of ``simulate_agents``."""
+
+    learners: np.ndarray
+    redeemers: np.ndarray
+    status: np.ndarray
+    redeemed: np.ndarray
+
+    def has_redeemed(self):
+        """Unpacks the redeemed bitmask into one boolean per learner."""
+        return np.unpackbits(self.redeemed, count=self.status.size).astype(bool)
+
+
+def simulate_agents(n_learners, drop_rates, effect, redeem_rate, incentive_mask, redeemers_stay_full=True,
+                    seed=None, chunk_size=DEFAULT_CHUNK_SIZE, model=engine.ACTIVE_MODEL):
+    """
+    Simulates every learner of a single cohort individually.
+
+    A learner with uniform draw ``u`` leaves in a month when ``u < drop``. Under
+    ``engine.AT_RISK_MODEL`` that draw decides everything: in an incentive month a leaver
+    redeems when ``u < drop * redeem_rate`` and is retained when
+    ``u < drop * redeem_rate * effect``. Under ``engine.ACTIVE_MODEL`` a second draw ``v``
+    per incentive month lets every learner still in the program redeem when
+    ``v < redeem_rate``, redeeming leavers are retained when ``u < drop * effect``, and
+    the month before an offer only loses learners with ``u < drop * (1 - effect)``.
+    Unlike the cohort-level engine, retained redeemers are exempt from every later
+    drop-off when ``redeemers_stay_full`` is set.
+
+    Parameters:
+    -----------
+    n_learners : int
+        Learners active in month 1.
+
+    drop_rates : array of shape (duration_months - 1,)
+        Month-to-month drop-off probabilities.
+
+    effect, redeem_rate : float or array of shape (duration_months - 1,)
+        Incentive effectiveness and redemption probabilities.
+
+    incentive_mask : bool array of shape (duration_months - 1,)
+        Transitions in which the incentive is offered.
+
+    seed : int or None
+        Seed for reproducible runs; results also depend on ``chunk_size``.
+
+    chunk_size : int
+        Learners processed per batch, which bounds the working memory. Must be a multiple of 8.
+
+    model : str
+        Incentive model, as in ``engine.simulate_learners``.
+
+    Returns:
+    --------
+    result : AgentSimulation
+        Active learners and redeemers per month (each of shape ``(duration_months,)``),
+        the final status of every learner and the packed redeemed bitmask.
+    """
+    if chunk_size % 8:
+        raise ValueError("chunk_size must be a multiple of 8 to keep the redeemed bitmask aligned.")
+    engine._check_model(model)
+    active_model = model == engine.ACTIVE_MODEL
+
+    drop_rates = np.asarray(drop_rates, dtype=np.float64)
+    effect = np.broadcast_to(effect, drop_rates.shape)
+    redeem_rate = np.broadcast_to(redeem_rate, drop_rates.shape)
+    incentive_mask = np.broadcast_to(np.asarray(incentive_mask, dtype=bool), drop_rates.shape)
+    if active_model:
+        redeem_threshold = redeem_rate
+        retain_threshold = drop_rates * effect
+        leave_threshold = drop_rates * (1.0 - engine._pre_offer(effect, incentive_mask, (1, drop_rates.size))[0])
+    else:
+        redeem_threshold = drop_rates * redeem_rate
+        retain_threshold = redeem_threshold * effect
+        leave_threshold = drop_rates
+
+    status = np.zeros(n_learners, dtype=np.uint8)
+    redeemed = np.zeros((n_learners + 7) // 8, dtype=np.uint8)
+    learners = np.full(drop_rates.size + 1, n_learners, dtype=np.int64)
+    redeemers = np.zeros(drop_rates.size + 1, dtype=np.int64)
+
+    rng = np.random.default_rng(seed)
+    draws = np.empty((2 if active_model else 1, min(chunk_size, n_learners)), dtype=np.float32)
+
+    for start in range(0, n_learners, chunk_size):
+        block = status[start:start + chunk_size]
+        u = draws[0, :block.size]
+        block_redeemed = np.zeros(block.size, dtype=bool)
+
+        for k, drop in enumerate(leave_threshold):
+            rng.random(dtype=np.float32, out=u)
+            leaving = (u < drop) & (block == ACTIVE)
+
+            if incentive_mask[k]:
+                if active_model:
+                    v = draws[1, :block.size]
+                    rng.random(dtype=np.float32, out=v)
+                    redeem = (v < redeem_threshold[k]) & (block != DROPPED)
+                else:
+                    redeem = leaving & (u < redeem_threshold[k])
+                redeemers[k] += np.count_nonzero(redeem)
+                block_redeemed |= redeem
+                if redeemers_stay_full:
+                    retained = leaving & redeem & (u < retain_threshold[k])
+                    block[retained] = RETAINED
+                    leaving &= ~retained
+
+            block[leaving] = DROPPED
+            learners[k + 1:] -= np.count_nonzero(leaving)
+
+        redeemed[start // 8:start // 8 + (block.size + 7) // 8] = np.packbits(block_redeemed)
+
+    return AgentSimulation(learners=learners, redeemers=redeemers, status=status, redeemed=redeemed)
@@ -0,0 +1,332 @@
+"""
+Headless batch evaluation of scenario definitions.
+
+A batch file (CSV, Parquet or JSON lines) holds one scenario per row, using the
+same inputs and units as the main simulator page's sidebar. Rows are split into
+fixed-size chunks that are evaluated in parallel worker processes; each chunk
+is simulated as one vectorized batch per program duration.
+
+Every finished chunk is written to a checkpoint directory, so an interrupted
+run picks up where it stopped. Each scenario is compared against its own
+Baseline (the same program without the incentive), which gives exactly the
+numbers the Streamlit executive summary shows for that scenario.
+
+Evaluation only needs NumPy, so worker processes start without importing
+pandas; it is loaded to read and write batch files.
+"""
+
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from simulator import engine
+from simulator.cache import canonical_hash, code_version
+from simulator.formatting import COLUMN_LABELS, format_summary
+from simulator.results import METRICS, ScenarioResults
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+# Sidebar defaults of the main simulator page; rates are percentages as in the app
+DEFAULTS = {
+    "initial_learners": 1000,
+    "duration_months": 8,
+    "drop_month": 3,
+    "drop_off_rate": 30.0,
+    "organic_drop_pre": 0.0,
+    "organic_drop_post": 0.0,
+    "revenue_per_month": 5.0,
+    "incentive_cost": 5.0,
+    "redeemers_stay_full": True,
+}
+REQUIRED = ("incentive_effect", "redeem_rate")
+PERCENT_COLUMNS = ("drop_off_rate", "organic_drop_pre", "organic_drop_post", "incentive_effect", "redeem_rate")
+AMOUNT_COLUMNS = ("initial_learners", "revenue_per_month", "incentive_cost")
+INPUT_COLUMNS = ("scenario",) + tuple(DEFAULTS) + REQUIRED
+FLAG_VALUES = {"true": True, "yes": True, "1": True, "false": False, "no": False, "0": False}
+
+
+def _format_of(path):
+    suffix = Path(path).suffix.lower()
+    if suffix in (".parquet", ".pq"):
+        return "parquet"
+    if suffix in (".jsonl", ".json"):
+        return "json"
+    return "csv"
+
+
+def read_scenarios(path):
+    """
+    Reads and validates a batch file of scenario definitions.
+
+    ``incentive_effect`` and ``redeem_rate`` are required; every other input falls
+    back to the main page's default. A ``scenario`` column names the rows.
+
+    Returns:
+    --------
+    scenarios : pandas.DataFrame
+        One row per scenario with every column of ``INPUT_COLUMNS``.
+    """
+    import pandas as pd
+
+    fmt = _format_of(path)
+    if fmt == "parquet":
+        scenarios = pd.read_parquet(path)
+    elif fmt == "json":
+        scenarios = pd.read_json(path, lines=True)
+    else:
+        scenarios = pd.read_csv(path)
+    return prepare_scenarios(scenarios)
+
+
+def _parse_flags(values):
+    """
+    Parses a yes/no column: booleans, 0/1 or (case-insensitive) true/false, yes/no, 1/0.
+
+    Returns:
+    --------
+    flags : ndarray of bool
+
+    invalid : ndarray of bool
+        Rows holding anything else, including missing values.
+    """
+    import pandas as pd
+
+    values = pd.Series(values)
+    if pd.api.types.is_bool_dtype(values):
+        return values.to_numpy(dtype=bool), np.zeros(len(values), dtype=bool)
+    if pd.api.types.is_numeric_dtype(values):
+        return (values == 1).to_numpy(), ~values.isin([0, 1]).to_numpy()
+    # Mixed columns (e.g. JSON records): booleans and 0/1 numbers read as text the same way
+    text = values.map(lambda value: value if isinstance(value, str) or value not in (0, 1) else str(int(value)))
+    flags = text.str.strip().str.lower().map(FLAG_VALUES)
+    return flags.eq(True).to_numpy(), flags.isna().to_numpy()
+
+
+def prepare_scenarios(scenarios):
+    """
+    Validates scenario definitions and fills in defaults, as ``read_scenarios`` does for files.
+
+    ``scenarios`` is a DataFrame with one scenario per row; unknown columns are dropped.
+    Raises ValueError for missing required columns, non-numeric inputs, out-of-range, negative
+    or missing values, or ``redeemers_stay_full`` values other than true/false, yes/no or 1/0.
+    """
+    missing = [column for column in REQUIRED if column not in scenarios]
+    if missing:
+        raise ValueError(f"Scenario definitions are missing required columns: {', '.join(missing)}.")
+
+    scenarios = scenarios.reset_index(drop=True)
+    if "scenario" not in scenarios:
+        scenarios["scenario"] = [f"Scenario {i + 1}" for i in range(len(scenarios))]
+    for column, default in DEFAULTS.items():
+        if column not in scenarios:
+            scenarios[column] = default
+    scenarios = scenarios[list(INPUT_COLUMNS)]
+    # astype(bool) would read "False", "no" and "0" as True
+    stay_full, invalid = _parse_flags(scenarios["redeemers_stay_full"])
+    if invalid.any():
+        rows = ", ".join(str(row) for row in scenarios.index[invalid][:10])
+        raise ValueError(f"Invalid scenario definitions in rows {rows}: redeemers_stay_full must be one of "
+                         f"true/false, yes/no or 1/0.")
+    scenarios = scenarios.assign(redeemers_stay_full=stay_full).astype({
+        "scenario": str, "initial_learners": float, "duration_months": int, "drop_month": int,
+        **{column: float for column in PERCENT_COLUMNS}, "revenue_per_month": float, "incentive_cost": float,
+    })
+
+    amounts = scenarios[list(AMOUNT_COLUMNS)]
+    invalid = ((scenarios["duration_months"] < 2)
+               | (scenarios["drop_month"] < 1)
+               | (scenarios["drop_month"] > scenarios["duration_months"] - 1)
+               | ~scenarios[list(PERCENT_COLUMNS)].apply(lambda rates: rates.between(0, 100)).all(axis=1)
+               | ~(np.isfinite(amounts) & (amounts >= 0)).all(axis=1))
+    if invalid.any():
+        rows = ", ".join(str(row) for row in scenarios.index[invalid][:10])
+        raise ValueError(f"Invalid scenario definitions in rows {rows}: offer months must fall inside the "
+                         f"program, rates must be percentages between 0 and 100 and learners, revenue and "
+                         f"incentive cost must be finite and non-negative.")
+    return scenarios
+
+
+def evaluate_scenarios(columns):
+    """
+    Evaluates a batch of scenario definitions against their own Baselines.
+
+    Parameters:
+    -----------
+    columns : dict of str -> array
+        ``INPUT_COLUMNS`` as arrays of equal length, e.g. from ``read_scenarios``.
+
+    Returns:
+    --------
+    metrics : dict of str -> ndarray
+        One float64 array per metric in ``METRICS``, in the input row order.
+    """
+    n_scenarios = len(columns["scenario"])
+    metrics = {name: np.empty(n_scenarios) for name in METRICS}
+    rates = {name: np.asarray(columns[name], dtype=np.float64) / 100 for name in PERCENT_COLUMNS}
+    stay = np.asarray(columns["redeemers_stay_full"], dtype=bool)
+    durations = np.asarray(columns["duration_months"])
+
+    # The engine needs one program length per batch
+    for duration in np.unique(durations):
+        rows = np.flatnonzero(durations == duration)
+        drop_month = np.asarray(columns["drop_month"])[rows]
+        initial = np.asarray(columns["initial_learners"], dtype=np.float64)[rows]
+        effect = rates["incentive_effect"][rows]
+        redeem_rate = rates["redeem_rate"][rows]
+
+        drop_rates = engine.drop_schedule(duration, drop_month, rates["drop_off_rate"][rows],
+                                          rates["organic_drop_pre"][rows], rates["organic_drop_post"][rows])
+        mask = engine.incentive_mask(duration, drop_month)
+
+        learners = engine.simulate_learners(initial, drop_rates, effect, redeem_rate, mask, stay[rows])
+        baseline = engine.simulate_learners(initial, drop_rates, 0.0, 0.0, mask)
+        redeemers = engine.incentive_redeemers(learners, drop_rates, redeem_rate, mask)
+
+        summary = engine.summarize(learners, redeemers, effect, mask,
+                                   np.asarray(columns["revenue_per_month"], dtype=np.float64)[rows],
+                                   np.asarray(columns["incentive_cost"], dtype=np.float64)[rows],
+                                   baseline=baseline[:, -1])
+        for name in METRICS:
+            metrics[name][rows] = summary[name]
+    return metrics
+
+
+def _run_chunk(index, columns, checkpoint):
+    metrics = evaluate_scenarios(columns)
+    if checkpoint is not None:
+        tmp = checkpoint.with_suffix(".tmp.npz")
+        np.savez(tmp, **metrics)
+        tmp.replace(checkpoint)
+    return index, metrics
+
+
+def _report_progress(done, total, scenarios, started, stream):
+    elapsed = time.perf_counter() - started
+    stream.write(f"\r{done}/{total} chunks · {scenarios:,} scenarios · {scenarios / max(elapsed, 1e-9):,.0f}/s")
+    if done == total:
+        stream.write("\n")
+    stream.flush()
+
+
+def run_batch(scenarios, *, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, checkpoint_dir=None, progress=None):
+    """
+    Evaluates every scenario in parallel chunks, resuming from checkpoints when available.
+
+    Parameters:
+    -----------
+    scenarios : pandas.DataFrame
+        Output of ``read_scenarios``.
+
+    workers : int or None
+        Worker processes. ``1`` runs in-process; ``None`` uses every CPU.
+
+    chunk_size : int
+        Scenarios per chunk, the unit of parallelism and checkpointing.
+
+    checkpoint_dir : str, Path or None
+        Directory for finished chunks. Checkpoints are keyed by a hash of the
+        simulator code, the scenarios and the chunk size, so neither a changed batch file
+        nor a changed model ever reuses stale results.
+
+    progress : file-like or None
+        Stream that receives a progress line as chunks finish.
+
+    Returns:
+    --------
+    results : ScenarioResults
+        One row per scenario, in the order of the batch file.
+    """
+    columns = {name: scenarios[name].to_numpy() for name in INPUT_COLUMNS}
+    columns["scenario"] = columns["scenario"].astype(str)
+    starts = range(0, len(scenarios), chunk_size)
+    chunks = [{name: values[start:start + chunk_size] for name, values in columns.items()} for start in starts]
+
+    paths = [None] * len(chunks)
+    if checkpoint_dir is not None:
+        run_dir = Path(checkpoint_dir) / canonical_hash(code_version(), columns, chunk_size)[:16]
+        run_dir.mkdir(parents=True, exist_ok=True)
+        paths = [run_dir / f"chunk-{i:06d}.npz" for i in range(len(chunks))]
+
+    finished = {}
+    for i, path in enumerate(paths):
+        if path is not None and path.exists():
+            with np.load(path) as saved:
+                finished[i] = {name: saved[name] for name in METRICS}
+
+    pending = [i for i in range(len(chunks)) if i not in finished]
+    started = time.perf_counter()
+    # Resumed chunks count as done, as they do in ``finished``
+    done_rows = sum(len(chunks[i]["scenario"]) for i in finished)
+
+    def record(index, metrics):
+        nonlocal done_rows
+        finished[index] = metrics
+        done_rows += len(chunks[index]["scenario"])
+        if progress is not None:
+            _report_progress(len(finished), len(chunks), done_rows, started, progress)
+
+    if workers == 1 or len(pending) <= 1:
+        for i in pending:
+            record(*_run_chunk(i, chunks[i], paths[i]))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_chunk, i, chunks[i], paths[i]) for i in pending]
+            for future in as_completed(futures):
+                record(*future.result())
+
+    metrics = {name: np.concatenate([finished[i][name] for i in range(len(chunks))]) if chunks else np.empty(0)
+               for name in METRICS}
+    return ScenarioResults.from_metrics(columns["scenario"], metrics)
+
+
+def write_results(scenarios, results, path, formatted=False):
+    """
+    Writes the scenario inputs alongside their results to CSV or Parquet.
+
+    Metric columns carry the Streamlit executive summary headings. With ``formatted``
+    they hold its display strings instead of numbers.
+    """
+    import pandas as pd
+
+    if formatted:
+        table = format_summary(results).drop(columns="Scenario")
+    else:
+        table = pd.DataFrame({COLUMN_LABELS[name]: getattr(results, name) for name in METRICS})
+    table = pd.concat([scenarios.reset_index(drop=True), table], axis=1)
+
+    if _format_of(path) == "parquet":
+        table.to_parquet(path, index=False)
+    else:
+        table.to_csv(path, index=False)
+    return table
+
+
+def main(argv=None):
+    """Command-line entry point: ``python -m simulator scenarios.csv -o results.parquet``."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m simulator",
+        description="Evaluate a batch file of retention incentive scenarios without the Streamlit app.")
+    parser.add_argument("scenarios", help="CSV, Parquet or JSON lines file with one scenario per row")
+    parser.add_argument("-o", "--output", required=True, help="results file (.csv or .parquet)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: every CPU)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="scenarios per chunk")
+    parser.add_argument("--checkpoint-dir", help="directory for resumable checkpoints")
+    parser.add_argument("--formatted", action="store_true",
+                        help="write metrics as they appear in the app's executive summary")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not report progress")
+    args = parser.parse_args(argv)
+
+    try:
+        scenarios = read_scenarios(args.scenarios)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+
+    results = run_batch(scenarios, workers=args.workers, chunk_size=args.chunk_size,
+                        checkpoint_dir=args.checkpoint_dir, progress=None if args.quiet else sys.stderr)
+    write_results(scenarios, results, args.output, formatted=args.formatted)
+    return 0
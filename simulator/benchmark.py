@@ -0,0 +1,301 @@
+"""
+Benchmarks for the simulation and financial hot paths.
+
+Each case times the stages the apps run on every rerun: simulate
+(``engine.simulate_learners``), financials (``engine.incentive_redeemers`` and
+``engine.monthly_financials``), summary (``ScenarioResults.from_simulation``)
+and recommend (``ScenarioResults.best``), plus the learner-level simulator.
+Large cases are processed in chunks of at most ``CELL_BUDGET`` scenario-months,
+the way the sweep and batch runner bound their memory, so each chunk is one
+latency sample.
+
+Results (throughput, peak traced memory and latency percentiles per stage) are
+written as JSON and compared against a stored baseline to catch regressions,
+as long as both were recorded with the same Python and NumPy versions and CPU count::
+
+    python -m simulator.benchmark --suite quick --output bench.json
+    python -m simulator.benchmark --suite quick --update-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from simulator import engine
+from simulator.agents import simulate_agents
+from simulator.results import ScenarioResults
+
+CELL_BUDGET = 1 << 24
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_BASELINE = Path(__file__).resolve().parent.parent / "benchmarks" / "baseline.json"
+LATENCY_PERCENTILES = (50, 95, 99)
+MAX_REPEATS = 1000
+MIN_CASE_SECONDS = 0.2
+STAGES = ("simulate", "financials", "summary", "recommend")
+# Machine fields that must match for throughput to be comparable with a baseline
+COMPARABLE_MACHINE = ("python", "numpy", "cpus")
+
+# Scenario counts, program durations and learner counts covered by each suite
+SUITES = {
+    "quick": {
+        "scenarios": (3, 10_000, 1_000_000),
+        "durations": (4, 12, 120),
+        "agent_learners": (1_000, 100_000, 1_000_000),
+        "agent_durations": (12,),
+    },
+    "full": {
+        "scenarios": (3, 1_000, 100_000, 1_000_000, 10_000_000),
+        "durations": (4, 8, 12, 36, 120),
+        "agent_learners": (1_000, 10_000, 100_000, 1_000_000),
+        "agent_durations": (4, 12, 120),
+    },
+}
+
+
+def suite_cases(suite):
+    """Returns the case definitions of a suite, engine cases first."""
+    spec = SUITES[suite]
+    cases = [{"name": f"engine/s={n}/t={t}", "kind": "engine", "scenarios": n, "duration_months": t,
+              "learners": 1000}
+             for n in spec["scenarios"] for t in spec["durations"]]
+    cases += [{"name": f"agents/n={n}/t={t}", "kind": "agents", "scenarios": 1, "duration_months": t,
+               "learners": n}
+              for n in spec["agent_learners"] for t in spec["agent_durations"]]
+    return cases
+
+
+def _program(duration_months):
+    """Main page defaults: 30% drop-off in month 3 (or the last transition of shorter programs)."""
+    drop_month = min(3, duration_months - 1)
+    return (engine.drop_schedule(duration_months, drop_month, 0.3, 0.02, 0.05),
+            engine.incentive_mask(duration_months, drop_month))
+
+
+def _engine_chunk(size, duration_months, learners, rng, laps):
+    drop_rates, mask = _program(duration_months)
+    effects = rng.random(size)
+    redeem_rates = rng.random(size)
+
+    start = time.perf_counter()
+    trajectories = engine.simulate_learners(learners, drop_rates, effects, redeem_rates, mask)
+    laps["simulate"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    redeemers = engine.incentive_redeemers(trajectories, drop_rates, redeem_rates, mask)
+    engine.monthly_financials(trajectories, redeemers, 5.0, 5.0)
+    laps["financials"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    results = ScenarioResults.from_simulation(np.arange(size), trajectories, redeemers, effects, mask, 5.0, 5.0)
+    laps["summary"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    results.best(exclude=[0])
+    laps["recommend"].append(time.perf_counter() - start)
+
+
+def _agent_chunk(n_learners, duration_months, laps):
+    drop_rates, mask = _program(duration_months)
+    start = time.perf_counter()
+    simulate_agents(n_learners, drop_rates, 0.5, 0.7, mask, seed=0)
+    laps["simulate"].append(time.perf_counter() - start)
+
+
+def _run_case(case, laps):
+    """Runs a case once, appending one latency sample per stage and chunk to ``laps``."""
+    if case["kind"] == "agents":
+        _agent_chunk(case["learners"], case["duration_months"], laps)
+        return
+
+    rng = np.random.default_rng(0)
+    chunk = max(1, CELL_BUDGET // case["duration_months"])
+    for start in range(0, case["scenarios"], chunk):
+        _engine_chunk(min(chunk, case["scenarios"] - start), case["duration_months"], case["learners"], rng, laps)
+
+
+def _peak_memory(case):
+    """Peak traced allocation of a single chunk, measured outside the timed runs."""
+    first_chunk = dict(case, scenarios=min(case["scenarios"], max(1, CELL_BUDGET // case["duration_months"])))
+    tracemalloc.start()
+    try:
+        _run_case(first_chunk, {stage: [] for stage in STAGES})
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(case, repeats=5):
+    """
+    Times one benchmark case.
+
+    Fast cases are repeated until they have run for about ``MIN_CASE_SECONDS`` so
+    their timings are not dominated by noise; ``repeats`` is the minimum.
+
+    Returns:
+    --------
+    record : dict
+        The case definition plus median wall time per run, throughput in scenario-months
+        (learner-months for agent cases) per second, peak traced memory in bytes and
+        latency percentiles (ms) per stage.
+    """
+    laps = {stage: [] for stage in STAGES}
+    if repeats > 1:
+        start = time.perf_counter()
+        _run_case(case, {stage: [] for stage in STAGES})  # warm-up
+        repeats = max(repeats, min(MAX_REPEATS, int(MIN_CASE_SECONDS / (time.perf_counter() - start))))
+
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        _run_case(case, laps)
+        runs.append(time.perf_counter() - start)
+    seconds = float(np.median(runs))
+
+    cells = case["duration_months"] * (case["learners"] if case["kind"] == "agents" else case["scenarios"])
+    stages = {}
+    for stage, samples in laps.items():
+        if samples:
+            ms = np.asarray(samples) * 1000
+            stages[stage] = {"calls": len(samples), "mean_ms": float(ms.mean()),
+                             **{f"p{p}_ms": float(np.percentile(ms, p)) for p in LATENCY_PERCENTILES}}
+
+    return {
+        **case,
+        "repeats": repeats,
+        "seconds": seconds,
+        "throughput": cells / seconds,
+        "peak_memory_bytes": _peak_memory(case),
+        "stages": stages,
+    }
+
+
+def run_suite(cases, repeats=5, progress=None):
+    """Runs every case and returns the machine-readable report."""
+    records = []
+    for case in cases:
+        # A single run for cases that take seconds per run
+        cells = case["scenarios"] * case["duration_months"] * (case["learners"] if case["kind"] == "agents" else 1)
+        records.append(run_case(case, repeats=1 if cells > 1e8 else repeats))
+        if progress is not None:
+            record = records[-1]
+            progress.write(f"{record['name']:<28} {record['seconds'] * 1000:>10.2f} ms "
+                           f"{record['throughput']:>14,.0f} cells/s {record['peak_memory_bytes'] / 2**20:>9.1f} MiB\n")
+            progress.flush()
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "cases": records,
+    }
+
+
+def machine_mismatch(report, baseline):
+    """
+    Lists the machine fields that differ between a report and a baseline.
+
+    Throughput recorded under another Python or NumPy release or CPU count says
+    little about a code change, so such baselines should not be compared against.
+
+    Returns:
+    --------
+    mismatches : dict
+        ``{field: (baseline value, current value)}`` for each differing field of
+        ``COMPARABLE_MACHINE``; empty when the runs are comparable.
+    """
+    current, previous = report["machine"], baseline.get("machine", {})
+    return {field: (previous.get(field), current.get(field))
+            for field in COMPARABLE_MACHINE if previous.get(field) != current.get(field)}
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares throughput against a baseline report.
+
+    Returns:
+    --------
+    regressions : list of dict
+        Cases whose throughput fell more than ``tolerance`` below the baseline, with
+        their name, baseline and current throughput and the ratio between them.
+    """
+    previous = {record["name"]: record for record in baseline["cases"]}
+    regressions = []
+    for record in report["cases"]:
+        if record["name"] not in previous:
+            continue
+        ratio = record["throughput"] / previous[record["name"]]["throughput"]
+        if ratio < 1 - tolerance:
+            regressions.append({"name": record["name"], "baseline": previous[record["name"]]["throughput"],
+                                "current": record["throughput"], "ratio": ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m simulator.benchmark",
+                                     description="Benchmark the simulation and financial hot paths.")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    parser.add_argument("--cases", help="only run cases whose name contains this text")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="baseline report to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed throughput drop before a case counts as a regression")
+    parser.add_argument("--allow-machine-mismatch", action="store_true",
+                        help="compare even if the baseline was recorded with other Python/NumPy versions or CPUs")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in suite_cases(args.suite) if args.cases is None or args.cases in case["name"]]
+    report = run_suite(cases, repeats=args.repeats, progress=sys.stdout)
+    report["suite"] = args.suite
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=1) + "\n")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        # Keep the stored cases this run did not cover, unless they were recorded on another setup
+        if baseline_path.exists():
+            stored = json.loads(baseline_path.read_text())
+            kept = [] if machine_mismatch(report, stored) else [
+                record for record in stored["cases"] if record["name"] not in {case["name"] for case in cases}]
+            report = dict(report, suite="mixed" if kept else args.suite, cases=kept + report["cases"])
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=1) + "\n")
+        return 0
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --update-baseline to create one.")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text())
+    mismatches = machine_mismatch(report, baseline)
+    for field, (recorded, current) in mismatches.items():
+        print(f"MACHINE MISMATCH {field}: baseline {recorded}, this run {current}")
+    if mismatches and not args.allow_machine_mismatch:
+        print(f"Not comparing against {baseline_path}; re-record it with --update-baseline on this setup "
+              "or pass --allow-machine-mismatch.")
+        return 2
+
+    regressions = compare(report, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression['name']}: {regression['current']:,.0f} cells/s vs "
+              f"{regression['baseline']:,.0f} baseline ({regression['ratio']:.0%})")
+    if not regressions:
+        print(f"No regressions against {baseline_path} (tolerance {args.tolerance:.0%}).")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
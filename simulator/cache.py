@@ -0,0 +1,364 @@
+"""
+Memoized results keyed by a canonical hash of the simulation inputs.
+
+Streamlit reruns a page top to bottom on every widget change, so results are
+cached by what they were computed from rather than by call site. Inputs are
+hashed canonically: dict order does not matter, ``5`` and ``5.0`` hash the
+same, integers hash exactly at any size, and NumPy arrays hash by dtype, shape
+and contents (object arrays element by element).
+
+``ResultCache`` keeps an in-memory LRU tier and an optional on-disk tier
+bounded in bytes, and counts hits and misses so cache effectiveness can be
+shown in the app. Keys are salted with the source of the ``simulator``
+package, and memoized functions and pipeline stages with their own code, so
+results computed by older code are never returned.
+
+Cached values are shared by every caller and session: NumPy arrays in them
+are made read-only, and every other mutable object (tables, figures) is
+copied when it is read.
+
+The disk tier stores pickles, and loading a pickle can run arbitrary code, so
+its directory must only be writable by the account running the app: it is
+created with mode ``0o700``, and a directory owned by another user or writable
+by others is refused.
+"""
+
+import copy
+import dataclasses
+import functools
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_MAXSIZE = 256
+CACHE_DIR_ENV = "SIMULATOR_CACHE_DIR"
+CACHE_SIZE_ENV = "SIMULATOR_CACHE_SIZE"
+CACHE_DISK_BYTES_ENV = "SIMULATOR_CACHE_DISK_BYTES"
+DEFAULT_DISK_BYTES = 1 << 30
+# Bump to invalidate every cached result when results change without a code change (e.g. a dependency upgrade)
+CACHE_VERSION = 1
+_IMMUTABLE = (type(None), bool, int, float, complex, str, bytes, np.generic)
+
+
+def _update(digest, value):
+    """Feeds a canonical, type-tagged encoding of ``value`` into ``digest``."""
+    if value is None or isinstance(value, (bool, np.bool_)):
+        digest.update(b"b%r;" % (None if value is None else bool(value)))
+    elif isinstance(value, (int, np.integer)):
+        digest.update(b"i%d;" % int(value))
+    elif isinstance(value, (float, np.floating)):
+        # Integral floats hash as the integer they equal, so 5 and 5.0 agree
+        value = float(value)
+        digest.update(b"i%d;" % int(value) if value.is_integer() else b"f%r;" % value)
+    elif isinstance(value, str):
+        digest.update(b"s%d:%s;" % (len(value), value.encode()))
+    elif isinstance(value, bytes):
+        digest.update(b"y%d:%s;" % (len(value), value))
+    elif isinstance(value, np.ndarray) and value.dtype == object:
+        # The buffer of an object array holds pointers, so hash what they point to
+        digest.update(b"o%r;" % (value.shape,))
+        for item in value.ravel():
+            _update(digest, item)
+    elif isinstance(value, np.ndarray):
+        value = np.ascontiguousarray(value)
+        digest.update(b"a%s%r;" % (value.dtype.str.encode(), value.shape))
+        digest.update(value.tobytes())
+    elif isinstance(value, dict):
+        digest.update(b"d%d;" % len(value))
+        for key in sorted(value, key=str):
+            _update(digest, str(key))
+            _update(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"l%d;" % len(value))
+        for item in value:
+            _update(digest, item)
+    elif dataclasses.is_dataclass(value):
+        _update(digest, type(value).__qualname__)
+        _update(digest, dataclasses.asdict(value))
+    else:
+        raise TypeError(f"Cannot hash simulation input of type {type(value).__name__}.")
+
+
+def canonical_hash(*args, **kwargs):
+    """Returns a stable hex digest of the given simulation inputs."""
+    digest = hashlib.sha256()
+    _update(digest, list(args))
+    _update(digest, kwargs)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def code_version():
+    """Returns a digest of ``CACHE_VERSION`` and the source of every module in the ``simulator`` package."""
+    digest = hashlib.sha256(b"%d;" % CACHE_VERSION)
+    for path in sorted(Path(__file__).resolve().parent.glob("*.py")):
+        _update(digest, path.name)
+        _update(digest, path.read_bytes())
+    return digest.hexdigest()
+
+
+def _update_code(digest, code):
+    digest.update(code.co_code)
+    _update(digest, list(code.co_names))
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            _update_code(digest, const)
+        else:
+            _update(digest, repr(const))
+
+
+def code_hash(fn):
+    """Returns a digest of ``fn``'s bytecode, constants and the names it uses, nested functions included."""
+    digest = hashlib.sha256()
+    _update_code(digest, fn.__code__)
+    return digest.hexdigest()
+
+
+def _freeze(value):
+    """Makes every NumPy array reachable through tuples, lists, dicts and dataclasses read-only, in place."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            _freeze(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _freeze(item)
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        for field in dataclasses.fields(value):
+            _freeze(getattr(value, field.name))
+    return value
+
+
+def _private(value):
+    """Returns a view of a frozen cached value that the caller can change without affecting the cache."""
+    if isinstance(value, (np.ndarray, *_IMMUTABLE)):
+        return value
+    if isinstance(value, tuple):
+        return tuple(_private(item) for item in value)
+    if isinstance(value, list):
+        return [_private(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _private(item) for key, item in value.items()}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        value = copy.copy(value)
+        for field in dataclasses.fields(value):
+            object.__setattr__(value, field.name, _private(getattr(value, field.name)))
+        return value
+    return copy.deepcopy(value)
+
+
+def _private_dir(path):
+    """Creates ``path`` readable only by this user, refusing one that others could write pickles into."""
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    stat = path.stat()
+    if hasattr(os, "getuid") and stat.st_uid != os.getuid():
+        raise PermissionError(f"Cache directory {path} belongs to another user; cached pickles are only "
+                              f"loaded from a directory owned by the account running the app.")
+    if stat.st_mode & 0o022:
+        raise PermissionError(f"Cache directory {path} is writable by other users; restrict it with "
+                              f"chmod 700 before using it for cached pickles.")
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of simulation results with an optional disk tier.
+
+    Parameters:
+    -----------
+    maxsize : int
+        Entries kept in memory before the least recently used one is evicted.
+
+    disk_dir : str, Path or None
+        Directory for pickled results that survive restarts and are shared
+        between processes. Disabled when None. Anyone who can write to it can
+        run code in the app, so it must belong to the account running the app.
+
+    disk_max_bytes : int
+        Size of the disk tier above which its least recently used files are
+        removed, down to three quarters of it.
+
+    version : str or None
+        Salt mixed into every key; defaults to ``code_version()``.
+
+    Raises:
+    -------
+    PermissionError
+        If ``disk_dir`` belongs to another user or is writable by group or others.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, disk_dir=None, disk_max_bytes=DEFAULT_DISK_BYTES, version=None):
+        self.maxsize = maxsize
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir is not None:
+            _private_dir(self.disk_dir)
+        self.disk_max_bytes = disk_max_bytes
+        self.version = version if version is not None else code_version()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+
+    def _salted(self, key):
+        return hashlib.sha256(f"{self.version}:{key}".encode()).hexdigest()
+
+    def _disk_path(self, key):
+        return self.disk_dir / key[:2] / f"{key}.pkl"
+
+    def _disk_files(self):
+        files = []
+        for path in self.disk_dir.glob("*/*.pkl"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _evict_disk(self, written):
+        """Removes the least recently used files once the disk tier outgrows ``disk_max_bytes``."""
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            else:
+                self._disk_bytes += written
+            if self._disk_bytes <= self.disk_max_bytes:
+                return
+            # Other processes may share the directory, so evict from what is actually on disk
+            files = sorted(self._disk_files())
+            total = sum(size for _, size, _ in files)
+            for _, size, path in files:
+                if total <= self.disk_max_bytes * 3 // 4:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+            self._disk_bytes = total
+
+    def _remember(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key, default=None):
+        """Returns the cached value for ``key``, checking memory before disk."""
+        key = self._salted(key)
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                value = self._entries[key]
+                return _private(value)
+
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            try:
+                with open(path, "rb") as fh:
+                    value = _freeze(pickle.load(fh))
+                os.utime(path)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+            else:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, value)
+                return _private(value)
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def put(self, key, value):
+        """
+        Stores ``value`` in memory and, when enabled, on disk.
+
+        Arrays in ``value`` become read-only; keep a copy to modify them. Returns
+        ``value`` as ``get`` would, for the caller to use in its place.
+        """
+        key = self._salted(key)
+        _freeze(value)
+        with self._lock:
+            self._remember(key, value)
+
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "wb") as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            written = tmp.stat().st_size
+            os.replace(tmp, path)
+            self._evict_disk(written)
+        return _private(value)
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached value for ``key``, calling ``compute()`` and storing its result on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        """Empties the in-memory tier and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self):
+        """Returns hit/miss counters and the current size of the in-memory tier."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+def memoize(cache):
+    """
+    Decorates a pure function so its results are stored in ``cache``.
+
+    The key combines the function's qualified name and code with a canonical hash of
+    its arguments, so re-defining the function on a Streamlit rerun still hits the
+    cache, while editing it does not.
+    """
+    def decorator(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        code = code_hash(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = canonical_hash(name, code, *args, **kwargs)
+            return cache.get_or_compute(key, lambda: fn(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+@functools.lru_cache(maxsize=None)
+def shared_cache():
+    """
+    Returns the process-wide cache shared by every page and session.
+
+    ``SIMULATOR_CACHE_SIZE`` sets the in-memory size, ``SIMULATOR_CACHE_DIR``
+    enables the on-disk tier (a private directory, see ``ResultCache``) and
+    ``SIMULATOR_CACHE_DISK_BYTES`` bounds it.
+    """
+    return ResultCache(maxsize=int(os.environ.get(CACHE_SIZE_ENV, DEFAULT_MAXSIZE)),
+                       disk_dir=os.environ.get(CACHE_DIR_ENV),
+                       disk_max_bytes=int(os.environ.get(CACHE_DISK_BYTES_ENV, DEFAULT_DISK_BYTES)))
@@ -0,0 +1,160 @@
+"""
+Bounded-size chart traces for long horizons and many scenarios.
+
+Figures ship every point to the browser, so the pages build their traces
+through this module to keep payload size and render time bounded:
+
+* lines are downsampled server-side with Largest-Triangle-Three-Buckets
+  (LTTB) to a fixed point budget, which keeps peaks and drops visible;
+* long traces are drawn with WebGL (``Scattergl``) instead of SVG;
+* beyond a handful of scenarios, lines are aggregated into percentile bands;
+* bar series longer than the bar budget are averaged into equal-width bins.
+
+Small charts (the sliders' 3 scenarios x 12 months) come out unchanged.
+Plotly is only imported once a trace is built.
+"""
+
+import numpy as np
+
+DEFAULT_MAX_POINTS = 2000
+DEFAULT_MAX_BARS = 120
+MAX_LINES = 10
+WEBGL_MIN_POINTS = 1000
+BAND_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def lttb(x, y, n_out):
+    """
+    Returns the indices of ``n_out`` points that preserve the shape of ``y`` over ``x``.
+
+    The first and last points are always kept; every bucket in between keeps the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x = x[stop:edges[bucket + 2]].mean()
+            next_y = y[stop:edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def downsample(x, y, max_points=DEFAULT_MAX_POINTS):
+    """Returns ``(x, y)`` reduced to at most ``max_points`` points with LTTB."""
+    x, y = np.asarray(x), np.asarray(y)
+    kept = lttb(x, y, max_points)
+    return x[kept], y[kept]
+
+
+def _scatter(n_points):
+    """The scatter trace type for ``n_points`` points: WebGL for long traces, SVG otherwise."""
+    import plotly.graph_objects as go
+
+    return go.Scattergl if n_points >= WEBGL_MIN_POINTS else go.Scatter
+
+
+def line(x, y, max_points=DEFAULT_MAX_POINTS, **trace):
+    """A line trace, downsampled to ``max_points`` and drawn with WebGL when it is long."""
+    x, y = downsample(x, y, max_points)
+    return _scatter(len(x))(x=x, y=y, **trace)
+
+
+def percentile_bands(values, percentiles=BAND_PERCENTILES):
+    """Percentiles across scenarios (rows) for every month (column) of ``values``."""
+    bands = np.percentile(np.asarray(values, dtype=np.float64), percentiles, axis=0)
+    return dict(zip(percentiles, bands))
+
+
+def _rgba(color, alpha):
+    color = color.lstrip("#")
+    red, green, blue = (int(color[i:i + 2], 16) for i in (0, 2, 4))
+    return f"rgba({red}, {green}, {blue}, {alpha})"
+
+
+def band_traces(x, bands, color="#31a354", fill="#74c476", name="", max_points=DEFAULT_MAX_POINTS):
+    """
+    Fan chart traces: shaded outer and inner percentile bands around the median line.
+
+    ``bands`` maps symmetric percentiles, e.g. ``BAND_PERCENTILES``, to one value per
+    ``x``. All bands are downsampled at the points LTTB keeps for the median, so the
+    shaded areas stay aligned.
+    """
+    percentiles = sorted(bands)
+    median = percentiles[len(percentiles) // 2]
+    kept = lttb(x, bands[median], max_points)
+    x = np.asarray(x)[kept]
+    scatter = _scatter(len(x))
+    prefix = f"{name} " if name else ""
+
+    traces = []
+    for depth, (low, high) in enumerate(zip(percentiles[:len(percentiles) // 2], percentiles[::-1])):
+        alpha = 0.2 * (depth + 1)
+        traces.append(scatter(x=x, y=np.asarray(bands[high])[kept], line=dict(width=0), showlegend=False,
+                              hoverinfo="skip"))
+        traces.append(scatter(x=x, y=np.asarray(bands[low])[kept], fill="tonexty", line=dict(width=0),
+                              fillcolor=_rgba(fill, alpha), name=f"{prefix}{low}th–{high}th percentile"))
+    traces.append(scatter(x=x, y=np.asarray(bands[median])[kept], name=f"{prefix}Median".strip(),
+                          line=dict(color=color, width=3)))
+    return traces
+
+
+def scenario_traces(x, values, names, styles=None, max_lines=MAX_LINES, max_points=DEFAULT_MAX_POINTS):
+    """
+    One line per scenario, or percentile bands once there are more than ``max_lines`` scenarios.
+
+    Parameters:
+    -----------
+    values : array of shape (n_scenarios, len(x))
+
+    names : sequence of str
+        Legend entry per scenario.
+
+    styles : sequence of dict or None
+        Extra trace properties per scenario (e.g. ``line``), used for individual lines.
+    """
+    values = np.asarray(values)
+    if len(values) > max_lines:
+        return band_traces(x, percentile_bands(values), name=f"{len(values):,} scenarios", max_points=max_points)
+    styles = styles or [{}] * len(values)
+    return [line(x, row, max_points, name=name, **style) for row, name, style in zip(values, names, styles)]
+
+
+def binned(x, series, max_bars=DEFAULT_MAX_BARS):
+    """
+    Averages bar series into at most ``max_bars`` equal-width bins.
+
+    Returns:
+    --------
+    x : ndarray
+        First ``x`` of every bin.
+
+    series : list of ndarray
+        Mean of each series over every bin.
+
+    width : int
+        Original points per bin; 1 when the series already fit.
+    """
+    x = np.asarray(x)
+    width = max(1, int(np.ceil(len(x) / max_bars)))
+    if width == 1:
+        return x, [np.asarray(values) for values in series], 1
+    starts = np.arange(0, len(x), width)
+    counts = np.diff(np.append(starts, len(x)))
+    return x[starts], [np.add.reduceat(np.asarray(values, dtype=np.float64), starts) / counts
+                       for values in series], width
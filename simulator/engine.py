@@ -0,0 +1,286 @@
+"""
+Vectorized retention simulation engine.
+
+Every front-end (the Streamlit pages and the analysis notebook) calls into
+this module so that the same inputs always produce the same numbers.
+
+Scenarios are evaluated as a batch: inputs are NumPy arrays that broadcast
+to ``(n_scenarios, duration_months - 1)`` month-to-month transitions, and the
+learners matrix is produced with a single cumulative product instead of a
+Python loop per scenario.
+
+Conventions
+-----------
+* Rates (drop-off, incentive effect, redeem rate) are fractions in ``[0, 1]``.
+* ``drop_rates[k]`` is the share of learners active in month ``k + 1`` who
+  leave before month ``k + 2``; a program of ``T`` months has ``T - 1``
+  transitions.
+* ``incentive_mask[k]`` marks the transitions in which the incentive is
+  offered. Programs with several offers pass the effect, redeem rate and cost
+  per transition as well (see ``simulator.scenarios``).
+
+Incentive models
+----------------
+``ACTIVE_MODEL`` (the default) is the main simulator page's model: the offer
+reaches every learner active in the incentive month, so ``redeem_rate`` of
+them redeem and are paid for whether or not the incentive works. The
+announced offer also cuts the drop-off of the month before it by ``effect``,
+and the whole cost is a liability when the incentive has no effect.
+
+``AT_RISK_MODEL`` is the model of the custom CSV page and the notebook: only
+the learners about to drop off are offered the incentive, and the cost of the
+redeemers who still leave, ``1 - effect`` of them, is the liability.
+
+In both models ``effect * redeem_rate`` of the learners who would drop off in
+the incentive month stay when redeemers are assumed to stay in the program.
+"""
+
+import numpy as np
+
+ACTIVE_MODEL = "active"
+AT_RISK_MODEL = "at_risk"
+MODELS = (ACTIVE_MODEL, AT_RISK_MODEL)
+
+
+def drop_schedule(duration_months, drop_month, drop_off_rate, organic_drop_pre=0.0, organic_drop_post=0.0):
+    """
+    Builds the month-to-month drop-off schedule used by the main simulator page.
+
+    Parameters:
+    -----------
+    duration_months : int
+        Number of months in the program.
+
+    drop_month : int or array of int, shape (n_scenarios,)
+        Month (1-based) with the major drop-off, which is also when the incentive is offered.
+
+    drop_off_rate, organic_drop_pre, organic_drop_post : float or array of shape (n_scenarios,)
+        Drop-off fractions in the incentive month, before it and after it.
+
+    Returns:
+    --------
+    drop_rates : ndarray of shape (duration_months - 1,) or (n_scenarios, duration_months - 1)
+        One row per scenario when any argument is given per scenario.
+    """
+    month = np.arange(duration_months - 1)
+    offer = np.asarray(drop_month)[..., None] - 1
+    return np.where(month < offer, np.asarray(organic_drop_pre, dtype=np.float64)[..., None],
+                    np.where(month == offer, np.asarray(drop_off_rate, dtype=np.float64)[..., None],
+                             np.asarray(organic_drop_post, dtype=np.float64)[..., None]))
+
+
+def incentive_mask(duration_months, drop_month):
+    """Returns a boolean transition mask with the incentive offered in ``drop_month`` (one row per scenario for arrays)."""
+    return np.arange(duration_months - 1) == np.asarray(drop_month)[..., None] - 1
+
+
+def _check_model(model):
+    if model not in MODELS:
+        raise ValueError(f"Unknown incentive model {model!r}; expected one of {', '.join(MODELS)}.")
+
+
+def _pre_offer(effect, incentive_mask, shape):
+    """Returns the drop-off cut that each announced offer gives the transition before it."""
+    effect = np.broadcast_to(effect, shape)
+    incentive_mask = np.broadcast_to(incentive_mask, shape)
+    pre = np.zeros(shape)
+    pre[:, :-1] = np.where(incentive_mask[:, 1:], effect[:, 1:], 0.0)
+    return pre
+
+
+def _per_scenario(values):
+    """Turns scalars and 1-D per-scenario values into columns that broadcast over months."""
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim < 2:
+        values = values.reshape(-1, 1)
+    return values
+
+
+def simulate_learners(initial_learners, drop_rates, effect, redeem_rate, incentive_mask,
+                      redeemers_stay_full=True, model=ACTIVE_MODEL):
+    """
+    Simulates learner retention for a batch of scenarios in one vectorized pass.
+
+    In an incentive month, ``redeem_rate`` of the learners about to drop off redeem the
+    incentive and ``effect`` of the redeemers are retained. This only improves retention
+    when redeemers are assumed to stay in the program. Under ``ACTIVE_MODEL`` the drop-off
+    of the month before each offer is also reduced by ``effect``.
+
+    Parameters:
+    -----------
+    initial_learners : float or array of shape (n_scenarios,)
+        Learners active in month 1.
+
+    drop_rates : array of shape (duration_months - 1,) or (n_scenarios, duration_months - 1)
+        Month-to-month drop-off fractions.
+
+    effect, redeem_rate : float or array of shape (n_scenarios,)
+        Incentive effectiveness and redemption fractions. 2-D arrays are accepted for
+        values that differ per transition.
+
+    incentive_mask : bool array broadcastable to the drop schedule
+        Transitions in which the incentive is offered.
+
+    redeemers_stay_full : bool or bool array of shape (n_scenarios,)
+        If True, retained redeemers do not drop off in the incentive month.
+
+    model : str
+        ``ACTIVE_MODEL`` or ``AT_RISK_MODEL`` (see the module docstring).
+
+    Returns:
+    --------
+    learners : ndarray of shape (n_scenarios, duration_months)
+        Active learners at the start of each month.
+
+    Raises:
+    -------
+    ValueError
+        If ``model`` is not one of ``MODELS``.
+    """
+    _check_model(model)
+    drop_rates = np.atleast_2d(np.asarray(drop_rates, dtype=np.float64))
+    effect = _per_scenario(effect)
+    redeem_rate = _per_scenario(redeem_rate)
+    incentive_mask = np.atleast_2d(np.asarray(incentive_mask, dtype=bool))
+    initial_learners = _per_scenario(initial_learners)
+    stay = np.asarray(redeemers_stay_full, dtype=bool).reshape(-1, 1)
+
+    shape = np.broadcast_shapes(drop_rates.shape, effect.shape, redeem_rate.shape,
+                                incentive_mask.shape, initial_learners.shape, stay.shape)
+    n_scenarios, n_transitions = shape
+
+    mitigation = np.where(incentive_mask & stay, effect * redeem_rate, 0.0)
+    if model == ACTIVE_MODEL:
+        mitigation = np.minimum(mitigation + _pre_offer(effect, incentive_mask, shape), 1.0)
+    survival = np.broadcast_to(1.0 - drop_rates * (1.0 - mitigation), shape)
+
+    learners = np.empty((n_scenarios, n_transitions + 1), dtype=np.float64)
+    learners[:, 0] = 1.0
+    np.cumprod(survival, axis=1, out=learners[:, 1:])
+    learners *= initial_learners
+    return learners
+
+
+def incentive_redeemers(learners, drop_rates, redeem_rate, incentive_mask, model=ACTIVE_MODEL):
+    """
+    Counts the learners who redeem the incentive in each month.
+
+    Eligible learners are all learners active in an incentive month under ``ACTIVE_MODEL``,
+    and the ones who would drop off in it under ``AT_RISK_MODEL``.
+
+    Returns:
+    --------
+    redeemers : ndarray with the same shape as ``learners``
+        Redeemers per month; the final month never has an offer.
+    """
+    _check_model(model)
+    eligible = learners[:, :-1]
+    if model == AT_RISK_MODEL:
+        eligible = eligible * np.asarray(drop_rates, dtype=np.float64)
+    redeemers = np.zeros_like(learners)
+    redeemers[:, :-1] = np.where(incentive_mask, eligible * _per_scenario(redeem_rate), 0.0)
+    return redeemers
+
+
+def monthly_financials(learners, redeemers, revenue_per_month, incentive_cost):
+    """
+    Returns the monthly revenue and incentive cost matrices for a batch of scenarios.
+
+    ``revenue_per_month`` is a scalar or one value per scenario. ``incentive_cost`` may
+    also be given per transition, shape ``(n_scenarios, duration_months - 1)``, for
+    programs whose offers cost different amounts.
+    """
+    revenue = learners * _per_scenario(revenue_per_month)
+    incentive_cost = _per_scenario(incentive_cost)
+    if incentive_cost.shape[1] == 1:
+        return revenue, redeemers * incentive_cost
+
+    offer_cost = redeemers[:, :-1] * incentive_cost
+    cost = np.zeros((offer_cost.shape[0], redeemers.shape[1]))  # the final month never has an offer
+    cost[:, :-1] = offer_cost
+    return revenue, cost
+
+
+def monthly_liability(cost, effect, model=ACTIVE_MODEL):
+    """
+    Returns the incentive cost paid each month without a retention return.
+
+    That is the whole cost of offers with no effect under ``ACTIVE_MODEL``, and the cost of
+    the redeemers who still leave the program under ``AT_RISK_MODEL``.
+    """
+    _check_model(model)
+    effect = _per_scenario(effect)
+    liability = np.zeros_like(cost)
+    if model == ACTIVE_MODEL:
+        liability[:, :-1] = np.where(effect == 0, cost[:, :-1], 0.0)
+    else:
+        liability[:, :-1] = cost[:, :-1] * (1.0 - effect)
+    return liability
+
+
+def summarize(learners, redeemers, effect, incentive_mask, revenue_per_month, incentive_cost,
+              baseline=0, model=ACTIVE_MODEL):
+    """
+    Computes the executive summary metrics for every scenario as float64 arrays.
+
+    Parameters:
+    -----------
+    learners, redeemers : ndarray of shape (n_scenarios, duration_months)
+        Output of ``simulate_learners`` and ``incentive_redeemers``.
+
+    effect : float or array
+        Incentive effectiveness, used to value the liability.
+
+    incentive_mask : bool array
+        Transitions in which the incentive is offered.
+
+    revenue_per_month, incentive_cost : float or array of shape (n_scenarios,)
+        Revenue per active learner-month and incentive cost per redeemer.
+
+    baseline : int or array of shape (n_scenarios,)
+        Row of ``learners`` that the retention gain is measured against, or each
+        scenario's own baseline learners in the final month.
+
+    model : str
+        Incentive model that values the liability, as in ``simulate_learners``.
+
+    Returns:
+    --------
+    metrics : dict of str -> ndarray of shape (n_scenarios,)
+    """
+    revenue, cost = monthly_financials(learners, redeemers, revenue_per_month, incentive_cost)
+    return summarize_financials(learners, revenue, cost, effect, incentive_mask, revenue_per_month, baseline, model)
+
+
+def summarize_financials(learners, revenue, cost, effect, incentive_mask, revenue_per_month, baseline=0,
+                         model=ACTIVE_MODEL):
+    """
+    Computes the executive summary metrics from precomputed monthly revenue and cost.
+
+    Arguments are as in ``summarize``, with ``revenue`` and ``cost`` from ``monthly_financials``;
+    this lets callers that already hold the monthly financials skip recomputing them.
+    """
+    n_scenarios, duration_months = learners.shape
+    total_revenue = revenue.sum(axis=1)
+    total_cost = cost.sum(axis=1)
+    liability = monthly_liability(cost, effect, model).sum(axis=1)
+
+    baseline_final = learners[baseline, -1] if np.ndim(baseline) == 0 else np.asarray(baseline, dtype=np.float64)
+    gain = learners[:, -1] - baseline_final
+    gain_pct = np.divide(gain * 100, baseline_final, out=np.zeros_like(gain), where=baseline_final > 0)
+
+    # Learners that must be retained for the rest of the program to pay back the incentive
+    mask = np.broadcast_to(np.atleast_2d(incentive_mask), (n_scenarios, duration_months - 1))
+    months_after_offer = np.where(mask.any(axis=1), duration_months - 1 - mask.argmax(axis=1), 0)
+    payback = _per_scenario(revenue_per_month)[:, 0] * months_after_offer
+    break_even = np.divide(total_cost, payback, out=np.zeros_like(total_cost), where=payback > 0)
+
+    return {
+        "total_revenue": total_revenue,
+        "incentive_cost": total_cost,
+        "net_revenue": total_revenue - total_cost,
+        "retention_gain": gain,
+        "retention_gain_pct": gain_pct,
+        "break_even_learners": break_even,
+        "liability": liability,
+    }
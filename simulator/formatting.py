@@ -0,0 +1,72 @@
+"""
+Presentation layer for scenario results.
+
+Formats ``ScenarioResults`` into the display strings used by the executive
+summary tables. Only the requested rows are formatted; the numbers themselves
+stay in the results object.
+"""
+
+COLUMN_LABELS = {
+    "total_revenue": "Total Revenue",
+    "incentive_cost": "Incentive Cost",
+    "net_revenue": "Net Revenue",
+    "retention_gain": "Retention Gain",
+    "retention_gain_pct": "Retention Gain (%)",
+    "break_even_learners": "Break-Even Learners Needed",
+    "liability": "Liability Incentive",
+}
+
+
+def format_currency(value, decimals=0):
+    return f"${value:,.{decimals}f}"
+
+
+def format_metric(metric, value, decimals=0):
+    """Formats a single metric value the way the summary tables show it."""
+    if metric == "retention_gain":
+        return f"{value:.0f} learners"
+    if metric == "retention_gain_pct":
+        return f"{value:.1f}%"
+    if metric == "break_even_learners":
+        return f"{value:.0f}"
+    return format_currency(value, decimals)
+
+
+def format_row(results, row, decimals=0):
+    """Returns one scenario's metrics as display strings keyed by metric name."""
+    formatted = {"scenario": results.names[row]}
+    for metric in COLUMN_LABELS:
+        formatted[metric] = format_metric(metric, getattr(results, metric)[row], decimals)
+    return formatted
+
+
+def format_summary(results, rows=None, columns=tuple(COLUMN_LABELS), decimals=0):
+    """
+    Builds the executive summary table for display.
+
+    Parameters:
+    -----------
+    results : ScenarioResults
+
+    rows : array of int or None
+        Rows to show, in display order; every row when None.
+
+    columns : sequence of str
+        Metrics to show, by name.
+
+    decimals : int
+        Decimal places for currency values.
+
+    Returns:
+    --------
+    table : pandas.DataFrame
+        A "Scenario" column followed by the formatted metrics.
+    """
+    import pandas as pd
+
+    rows = range(len(results)) if rows is None else rows
+    table = {"Scenario": [results.names[i] for i in rows]}
+    for metric in columns:
+        values = getattr(results, metric)
+        table[COLUMN_LABELS[metric]] = [format_metric(metric, values[i], decimals) for i in rows]
+    return pd.DataFrame(table)
@@ -0,0 +1,260 @@
+"""
+Streaming ingestion of per-learner activity logs.
+
+Raw logs have one row per learner activity event, with the learner id and the
+program month (1-based) the event happened in. A learner's last active month
+is when they dropped off, so monthly cohort drop-off rates can be derived
+without loading the log: rows are read in chunks (CSV) or record batches
+(memory-mapped Parquet / Arrow IPC), and only the last active month of each
+learner is kept. Memory grows with the number of learners (about 10 bytes each
+for integer ids), not with the size of the ids themselves.
+
+The resulting drop-off schedule plugs straight into ``engine.simulate_learners``.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+FORMATS = ("csv", "parquet", "arrow")
+
+
+@dataclass
+class ActivityProfile:
+    """Monthly cohort profile derived from an activity log."""
+
+    active: np.ndarray
+    drop_rates: np.ndarray
+    rows: int
+
+    @property
+    def initial_learners(self):
+        return int(self.active[0])
+
+
+def _detect_format(source, fmt):
+    if fmt is not None:
+        return fmt
+    suffix = Path(getattr(source, "name", str(source))).suffix.lower().lstrip(".")
+    if suffix in ("parquet", "pq"):
+        return "parquet"
+    if suffix in ("arrow", "feather", "ipc"):
+        return "arrow"
+    return "csv"
+
+
+def _open_arrow(source):
+    """Memory-maps paths and wraps in-memory uploads for pyarrow readers."""
+    import pyarrow as pa
+
+    if isinstance(source, (str, Path)):
+        return pa.memory_map(str(source), "r")
+    return source
+
+
+def read_activity_log(source, *, fmt=None, learner_col="learner_id", month_col="month",
+                      chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Yields ``(learner_ids, months)`` array pairs from an activity log, one chunk at a time.
+
+    Parameters:
+    -----------
+    source : path or file-like
+        CSV, Parquet or Arrow IPC (Feather v2) log. Parquet and Arrow paths are memory-mapped.
+
+    fmt : {"csv", "parquet", "arrow"} or None
+        Input format; detected from the file extension when omitted.
+    """
+    fmt = _detect_format(source, fmt)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported activity log format: {fmt!r}. Expected one of {FORMATS}.")
+    columns = [learner_col, month_col]
+
+    if fmt == "csv":
+        import pandas as pd
+
+        for chunk in pd.read_csv(source, usecols=columns, chunksize=chunk_rows):
+            yield chunk[learner_col].to_numpy(), chunk[month_col].to_numpy()
+        return
+
+    try:
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError("Reading Parquet or Arrow activity logs requires pyarrow.") from exc
+
+    if fmt == "parquet":
+        batches = pyarrow.parquet.ParquetFile(_open_arrow(source)).iter_batches(
+            batch_size=chunk_rows, columns=columns)
+    else:
+        reader = pyarrow.ipc.open_file(_open_arrow(source))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+
+    for batch in batches:
+        yield (batch.column(learner_col).to_numpy(zero_copy_only=False),
+               batch.column(month_col).to_numpy(zero_copy_only=False))
+
+
+class _LastMonths:
+    """
+    Learner ids of one kind with each learner's last active month.
+
+    Each chunk is reduced to one row per learner and queued. The queue is merged into
+    the sorted ids with a single sort and ``np.maximum.reduceat`` once it holds more
+    rows than there are known learners, so every row takes part in a logarithmic
+    number of merges and memory stays within a small multiple of the learner count.
+    """
+
+    def __init__(self, dtype):
+        self.ids = np.empty(0, dtype=dtype)
+        self.months = np.empty(0, dtype=np.uint16)
+        self._queued_ids, self._queued_months, self._queued = [], [], 0
+
+    def update(self, ids, months):
+        import pandas as pd
+
+        if ids.size == 0:
+            return
+        codes, uniques = pd.factorize(ids)
+        latest = np.zeros(len(uniques), dtype=np.uint16)
+        np.maximum.at(latest, codes, months)
+        self._queued_ids.append(np.asarray(uniques, dtype=self.ids.dtype))
+        self._queued_months.append(latest)
+        self._queued += latest.size
+        if self._queued > self.ids.size:
+            self._merge()
+
+    def _merge(self):
+        if not self._queued:
+            return
+        ids = np.concatenate([self.ids, *self._queued_ids])
+        months = np.concatenate([self.months, *self._queued_months])
+        self._queued_ids, self._queued_months, self._queued = [], [], 0
+
+        order = np.argsort(ids, kind="stable")
+        ids, months = ids[order], months[order]
+        starts = np.flatnonzero(np.concatenate([[True], ids[1:] != ids[:-1]]))
+        self.ids, self.months = ids[starts], np.maximum.reduceat(months, starts)
+
+    def last_months(self):
+        """Returns the last active month of every learner, in id order."""
+        self._merge()
+        return self.months
+
+
+def _split_ids(ids):
+    """
+    Splits a chunk's learner ids into integer keys and text keys.
+
+    Integer-valued ids are the same learner whatever their dtype (``7``, ``7.0`` and
+    ``"7"``), so chunks parsed with different dtypes still agree; every other id is
+    compared as text.
+
+    Returns:
+    --------
+    integer : ndarray of bool
+        Rows whose id is an integer.
+
+    integer_ids : ndarray of int64
+        Their ids.
+
+    text_ids : ndarray of object
+        The ids of the other rows, as strings.
+    """
+    import pandas as pd
+
+    ids = np.asarray(ids)
+    if ids.dtype.kind in "biu":
+        # uint64 ids above the int64 range map one-to-one onto negative keys
+        return np.ones(ids.size, dtype=bool), ids.astype(np.int64, copy=False), np.empty(0, dtype=object)
+    if ids.dtype.kind == "f":
+        # inf equals its own rounding, and floats beyond the int64 range do not fit the keys
+        integer = np.isfinite(ids) & (ids == np.round(ids)) & (np.abs(ids) < 2.0 ** 63)
+        return integer, ids[integer].astype(np.int64), ids[~integer].astype(str).astype(object)
+
+    text = pd.Series(ids, dtype=object).astype(str).str.strip()
+    integer = text.str.fullmatch(r"[+-]?\d{1,18}(\.0*)?").to_numpy(dtype=bool)
+    integer_ids = text[integer].str.replace(r"\.0*$", "", regex=True).astype(np.int64).to_numpy()
+    return integer, integer_ids, text[~integer].to_numpy(dtype=object)
+
+
+def last_active_months(chunks, duration_months):
+    """
+    Reduces activity chunks to the last active month of every learner.
+
+    Every id goes through one mapping kept across chunks: integer-valued ids (whatever
+    their dtype) and text ids are kept in sorted arrays that chunks are merged into in
+    batches, so memory depends on the number of learners, not on the id values. Months past the end of the program count as
+    completing it; rows without a valid month are skipped.
+
+    Returns:
+    --------
+    last_month : ndarray of uint16
+        Last active month per learner, in no particular order.
+
+    rows : int
+        Number of rows read.
+
+    Raises:
+    -------
+    ValueError
+        If a row has no learner id.
+    """
+    import pandas as pd
+
+    integer_learners = _LastMonths(np.int64)
+    text_learners = _LastMonths(object)
+    rows = 0
+
+    for ids, months in chunks:
+        missing = pd.isna(ids)
+        if np.any(missing):
+            raise ValueError(f"Learner ids must not be missing; row {rows + int(np.argmax(missing)) + 1} has none.")
+        rows += len(ids)
+        if not np.issubdtype(months.dtype, np.number):
+            months = pd.to_numeric(months, errors="coerce")
+        months = np.asarray(months, dtype=np.float64)
+        valid = months >= 1
+        ids, months = np.asarray(ids)[valid], np.minimum(months[valid], duration_months).astype(np.uint16)
+
+        integer, integer_ids, text_ids = _split_ids(ids)
+        integer_learners.update(integer_ids, months[integer])
+        text_learners.update(text_ids, months[~integer])
+
+    return np.concatenate([integer_learners.last_months(), text_learners.last_months()]), rows
+
+
+def profile_from_last_months(last_month, duration_months):
+    """
+    Turns last active months into monthly active counts and drop-off rates.
+
+    Returns:
+    --------
+    active : ndarray of shape (duration_months,)
+        Learners active in each month.
+
+    drop_rates : ndarray of shape (duration_months - 1,)
+        Share of each month's learners who were never active again.
+    """
+    leavers = np.bincount(last_month, minlength=duration_months + 1)[1:duration_months + 1]
+    active = leavers[::-1].cumsum()[::-1]
+    drop_rates = np.divide(leavers[:-1], active[:-1], out=np.zeros(duration_months - 1), where=active[:-1] > 0)
+    return active, drop_rates
+
+
+def profile_activity_log(source, duration_months, **kwargs):
+    """
+    Streams an activity log into a monthly cohort profile.
+
+    Keyword arguments are passed to ``read_activity_log``.
+
+    Returns:
+    --------
+    profile : ActivityProfile
+        ``profile.drop_rates`` can be passed directly to ``engine.simulate_learners``.
+    """
+    last_month, rows = last_active_months(read_activity_log(source, **kwargs), duration_months)
+    active, drop_rates = profile_from_last_months(last_month, duration_months)
+    return ActivityProfile(active=active, drop_rates=drop_rates, rows=rows)
@@ -0,0 +1,192 @@
+"""
+Monte Carlo uncertainty analysis for the retention model.
+
+Drop-off rates, incentive effect and redeem rate can be given as probability
+distributions instead of point estimates. Samples are split into fixed-size
+chunks, each with its own seed spawned from one root ``SeedSequence``, and the
+chunks run across a process pool. Results are reproducible for a given seed
+and chunk size, whatever the number of workers.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from simulator import engine
+
+DEFAULT_CHUNK_SIZE = 250_000
+RETENTION_BINS = 1000
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+@dataclass(frozen=True)
+class Uniform:
+    """Uniformly distributed rate between ``low`` and ``high``, both within ``[0, 1]``."""
+
+    low: float
+    high: float
+
+    def __post_init__(self):
+        if not 0.0 <= self.low <= self.high <= 1.0:
+            raise ValueError(f"Uniform bounds must satisfy 0 <= low <= high <= 1, got low={self.low}, "
+                             f"high={self.high}.")
+
+    def sample(self, rng, size):
+        return rng.uniform(self.low, self.high, size)
+
+
+@dataclass(frozen=True)
+class Normal:
+    """Normally distributed rate, clipped to ``[0, 1]``."""
+
+    mean: float
+    sd: float
+
+    def sample(self, rng, size):
+        return np.clip(rng.normal(self.mean, self.sd, size), 0.0, 1.0)
+
+
+@dataclass(frozen=True)
+class Beta:
+    """Beta distributed rate with shape parameters ``a`` and ``b``."""
+
+    a: float
+    b: float
+
+    def sample(self, rng, size):
+        return rng.beta(self.a, self.b, size)
+
+
+def _draw(value, rng, size):
+    """Samples a distribution, or repeats a point estimate."""
+    if hasattr(value, "sample"):
+        return value.sample(rng, size)
+    return np.full(size, value, dtype=np.float64)
+
+
+@dataclass
+class MonteCarloResult:
+    """Summary statistics of a Monte Carlo run."""
+
+    n_samples: int
+    net_revenue: np.ndarray
+    net_revenue_percentiles: dict
+    uplift_percentiles: dict
+    prob_break_even: float
+    retention_bands: dict
+    retention_mean: np.ndarray
+
+
+def _run_chunk(seed, size, params):
+    """Simulates one chunk of samples. Runs inside a worker process."""
+    rng = np.random.default_rng(seed)
+    duration_months = params["duration_months"]
+    drop_month = params["drop_month"]
+
+    pre = _draw(params["organic_drop_pre"], rng, size)[:, None]
+    spike = _draw(params["drop_off_rate"], rng, size)[:, None]
+    post = _draw(params["organic_drop_post"], rng, size)[:, None]
+    effect = _draw(params["effect"], rng, size)
+    redeem_rate = _draw(params["redeem_rate"], rng, size)
+
+    month = np.arange(1, duration_months)
+    drop_rates = np.where(month < drop_month, pre, np.where(month == drop_month, spike, post))
+    mask = engine.incentive_mask(duration_months, drop_month)
+
+    learners = engine.simulate_learners(params["initial_learners"], drop_rates, effect, redeem_rate,
+                                        mask, params["redeemers_stay_full"])
+    redeemers = engine.incentive_redeemers(learners, drop_rates, redeem_rate, mask)
+    baseline = engine.simulate_learners(params["initial_learners"], drop_rates, 0.0, 0.0, mask, False)
+
+    revenue_per_month = params["revenue_per_month"]
+    net_revenue = learners.sum(axis=1) * revenue_per_month - redeemers.sum(axis=1) * params["incentive_cost"]
+    baseline_net = baseline.sum(axis=1) * revenue_per_month
+
+    # Retention is bounded by the initial cohort, so a fixed histogram per month keeps the
+    # curve distribution mergeable across workers without shipping every trajectory back.
+    share = learners / params["initial_learners"]
+    bins = np.clip(np.ceil(share * RETENTION_BINS).astype(np.int64) - 1, 0, RETENTION_BINS - 1)
+    bins += np.arange(duration_months) * RETENTION_BINS
+    histogram = np.bincount(bins.ravel(), minlength=duration_months * RETENTION_BINS)
+
+    histogram = histogram.reshape(duration_months, RETENTION_BINS)
+    return net_revenue, net_revenue - baseline_net, histogram, share.sum(axis=0)
+
+
+def _histogram_percentiles(histogram, percentiles, scale):
+    """Reads per-month percentiles off cumulative retention histograms."""
+    cumulative = histogram.cumsum(axis=1)
+    total = cumulative[:, -1:]
+    bands = {}
+    for q in percentiles:
+        # First bin where the cumulative count reaches the percentile, reported at its upper edge
+        idx = (cumulative < total * q / 100).sum(axis=1)
+        bands[q] = (idx + 1) / RETENTION_BINS * scale
+    return bands
+
+
+def monte_carlo(n_samples, *, initial_learners, duration_months, drop_month, drop_off_rate,
+                organic_drop_pre=0.0, organic_drop_post=0.0, effect=0.0, redeem_rate=0.0,
+                revenue_per_month=5.0, incentive_cost=5.0, redeemers_stay_full=True,
+                seed=0, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Runs a Monte Carlo simulation of one incentive scenario against its Baseline.
+
+    Parameters:
+    -----------
+    n_samples : int
+        Number of sampled cohorts.
+
+    drop_off_rate, organic_drop_pre, organic_drop_post, effect, redeem_rate : float or distribution
+        Point estimates or ``Uniform`` / ``Normal`` / ``Beta`` distributions of the rates.
+
+    seed : int
+        Root seed; every chunk gets an independent child seed.
+
+    workers : int or None
+        Worker processes. ``1`` runs in-process; ``None`` uses every CPU.
+
+    Returns:
+    --------
+    result : MonteCarloResult
+        Net revenue samples and percentiles, uplift over the Baseline percentiles, the
+        probability that the incentive at least breaks even against the Baseline, and
+        retention percentile bands per month.
+    """
+    params = {
+        "initial_learners": initial_learners,
+        "duration_months": duration_months,
+        "drop_month": drop_month,
+        "drop_off_rate": drop_off_rate,
+        "organic_drop_pre": organic_drop_pre,
+        "organic_drop_post": organic_drop_post,
+        "effect": effect,
+        "redeem_rate": redeem_rate,
+        "revenue_per_month": revenue_per_month,
+        "incentive_cost": incentive_cost,
+        "redeemers_stay_full": redeemers_stay_full,
+    }
+    sizes = [min(chunk_size, n_samples - start) for start in range(0, n_samples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if workers == 1 or len(sizes) == 1:
+        chunks = [_run_chunk(s, size, params) for s, size in zip(seeds, sizes)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_run_chunk, seeds, sizes, [params] * len(sizes)))
+
+    net_revenue = np.concatenate([chunk[0] for chunk in chunks])
+    uplift = np.concatenate([chunk[1] for chunk in chunks])
+    histogram = sum(chunk[2] for chunk in chunks)
+    retention_mean = sum(chunk[3] for chunk in chunks) / n_samples * initial_learners
+
+    return MonteCarloResult(
+        n_samples=n_samples,
+        net_revenue=net_revenue,
+        net_revenue_percentiles=dict(zip(PERCENTILES, np.percentile(net_revenue, PERCENTILES).tolist())),
+        uplift_percentiles=dict(zip(PERCENTILES, np.percentile(uplift, PERCENTILES).tolist())),
+        prob_break_even=float((uplift >= 0).mean()),
+        retention_bands=_histogram_percentiles(histogram, PERCENTILES, initial_learners),
+        retention_mean=retention_mean,
+    )
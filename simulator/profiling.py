@@ -0,0 +1,228 @@
+"""
+Timing spans for finding where rerun latency goes.
+
+A trace covers one run of a page (one Streamlit rerun) and holds a span per
+timed step: every pipeline stage that is recomputed, plus the page's own
+recommendation and rendering steps. Each span belongs to a category
+(``simulate``, ``financials``, ``summary``, ``recommend``, ``render``, ...) so
+latency can be broken down the same way across pages and reruns.
+
+For every span the tracer records:
+
+* wall time;
+* net allocated memory blocks (``sys.getallocatedblocks``), which is cheap
+  enough to leave on;
+* peak traced memory, only while ``tracemalloc`` is tracing. Tracing is a
+  process-wide setting that slows allocation-heavy code, so it is turned on
+  for the whole server with ``SIMULATOR_TRACE_MEMORY=1``, never per session.
+
+Spans cost about a microsecond, so they are always on. The most recent traces
+are kept in memory and can be exported in the Chrome trace event format, which
+chrome://tracing and Perfetto open directly.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import numpy as np
+
+DEFAULT_MAX_TRACES = 500
+TRACE_MEMORY_ENV = "SIMULATOR_TRACE_MEMORY"
+
+
+@dataclass
+class Span:
+    """A timed step; ``start`` is relative to the start of its trace, times are in seconds."""
+
+    name: str
+    category: str
+    start: float
+    duration: float
+    allocated_blocks: int
+    peak_bytes: int = 0  # 0 unless tracemalloc is tracing
+
+
+@dataclass
+class Trace:
+    """The spans of one run, e.g. one rerun of a page."""
+
+    name: str
+    started: float  # Unix time
+    spans: list = field(default_factory=list)
+    duration: float = 0.0
+
+    def totals(self, by="category"):
+        """Seconds spent per span category (or name, ``by="name"``)."""
+        totals = {}
+        for span in self.spans:
+            key = getattr(span, by)
+            totals[key] = totals.get(key, 0.0) + span.duration
+        return totals
+
+
+class Tracer:
+    """
+    Collects traces of timed spans.
+
+    A trace is opened with ``begin`` and closed with ``end`` (or used as ``with
+    tracer.trace(name)``). Traces are per thread, so concurrent Streamlit sessions
+    do not mix their spans; spans outside an open trace are not recorded.
+
+    Parameters:
+    -----------
+    max_traces : int
+        Most recent traces kept in memory.
+    """
+
+    def __init__(self, max_traces=DEFAULT_MAX_TRACES):
+        self.traces = deque(maxlen=max_traces)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def begin(self, name):
+        """Opens a trace for this thread, discarding one that was never closed (e.g. after ``st.stop``)."""
+        self._local.trace = Trace(name, time.time())
+        self._local.origin = time.perf_counter()
+
+    def end(self):
+        """Closes this thread's trace and keeps it; returns it, or None when no trace was open."""
+        trace = getattr(self._local, "trace", None)
+        if trace is None:
+            return None
+        trace.duration = time.perf_counter() - self._local.origin
+        self._local.trace = None
+        with self._lock:
+            self.traces.append(trace)
+        return trace
+
+    @contextmanager
+    def trace(self, name):
+        self.begin(name)
+        try:
+            yield self._local.trace
+        finally:
+            self.end()
+
+    @contextmanager
+    def span(self, name, category=None):
+        """Times the enclosed block as a span of this thread's open trace."""
+        trace = getattr(self._local, "trace", None)
+        if trace is None:
+            yield
+            return
+
+        tracing_memory = tracemalloc.is_tracing()
+        if tracing_memory:
+            # Nested spans reset the peak, so an enclosing span's peak only covers its own tail
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        blocks_before = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            trace.spans.append(Span(
+                name=name,
+                category=category or name,
+                start=start - self._local.origin,
+                duration=duration,
+                allocated_blocks=sys.getallocatedblocks() - blocks_before,
+                peak_bytes=max(0, tracemalloc.get_traced_memory()[1] - memory_before) if tracing_memory else 0,
+            ))
+
+    def recent(self, name=None):
+        """Kept traces, oldest first, optionally only those named ``name``."""
+        with self._lock:
+            return [trace for trace in self.traces if name is None or trace.name == name]
+
+    def latencies(self, name=None, by="category"):
+        """Milliseconds per trace for every span category (or name), as arrays aligned to ``recent(name)``."""
+        traces = self.recent(name)
+        keys = sorted({getattr(span, by) for trace in traces for span in trace.spans})
+        totals = [trace.totals(by) for trace in traces]
+        return {key: np.array([total.get(key, 0.0) * 1000 for total in totals]) for key in keys}
+
+    def summary(self, name=None):
+        """
+        Per-span statistics over the kept traces.
+
+        Returns:
+        --------
+        rows : list of dict
+            Span name and category, number of calls, p50/p95/max latency (ms), mean net
+            allocated blocks and the largest peak traced memory (bytes), slowest first.
+        """
+        spans = {}
+        for trace in self.recent(name):
+            for span in trace.spans:
+                spans.setdefault((span.name, span.category), []).append(span)
+
+        rows = []
+        for (span_name, category), recorded in spans.items():
+            ms = np.array([span.duration for span in recorded]) * 1000
+            rows.append({
+                "span": span_name,
+                "category": category,
+                "calls": len(recorded),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "max_ms": float(ms.max()),
+                "mean_allocated_blocks": float(np.mean([span.allocated_blocks for span in recorded])),
+                "peak_bytes": max(span.peak_bytes for span in recorded),
+            })
+        return sorted(rows, key=lambda row: -row["p95_ms"])
+
+    def export(self, name=None):
+        """Kept traces in the Chrome trace event format (a JSON-serializable dict)."""
+        events = []
+        for index, trace in enumerate(self.recent(name)):
+            events.append({"name": trace.name, "cat": "trace", "ph": "X", "pid": os.getpid(), "tid": index,
+                           "ts": trace.started * 1e6, "dur": trace.duration * 1e6})
+            events.extend({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "pid": os.getpid(),
+                "tid": index,
+                "ts": (trace.started + span.start) * 1e6,
+                "dur": span.duration * 1e6,
+                "args": {"allocated_blocks": span.allocated_blocks, "peak_bytes": span.peak_bytes},
+            } for span in trace.spans)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_json(self, name=None):
+        return json.dumps(self.export(name))
+
+
+def trace_memory(enabled=None):
+    """
+    Starts ``tracemalloc`` so spans record their peak memory; tracing slows allocation-heavy code.
+
+    ``enabled`` defaults to the ``SIMULATOR_TRACE_MEMORY`` environment variable. Tracing is
+    never stopped here, since other sessions and tools in the process may rely on it.
+    """
+    if enabled is None:
+        enabled = os.environ.get(TRACE_MEMORY_ENV, "").strip().lower() in ("1", "true", "yes")
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return tracemalloc.is_tracing()
+
+
+@functools.lru_cache(maxsize=None)
+def shared_tracer():
+    """
+    Returns the process-wide tracer shared by every page and session.
+
+    Memory tracing is started with it when ``SIMULATOR_TRACE_MEMORY`` is set.
+    """
+    trace_memory()
+    return Tracer()
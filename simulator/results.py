@@ -0,0 +1,93 @@
+"""
+Typed, columnar scenario results.
+
+Every metric is a float64 array with one entry per scenario, so sorting,
+recommendations and charts work on numbers directly. Turning numbers into
+display strings is left to ``simulator.formatting`` and only happens for the
+rows that are actually shown.
+"""
+
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from simulator import engine
+
+METRICS = (
+    "total_revenue",
+    "incentive_cost",
+    "net_revenue",
+    "retention_gain",
+    "retention_gain_pct",
+    "break_even_learners",
+    "liability",
+)
+
+
+@dataclass
+class ScenarioResults:
+    """Summary metrics for a batch of scenarios, one float64 array per metric."""
+
+    names: np.ndarray
+    total_revenue: np.ndarray
+    incentive_cost: np.ndarray
+    net_revenue: np.ndarray
+    retention_gain: np.ndarray
+    retention_gain_pct: np.ndarray
+    break_even_learners: np.ndarray
+    liability: np.ndarray
+
+    @classmethod
+    def from_metrics(cls, names, metrics):
+        """Builds results from the metrics dict returned by ``engine.summarize``."""
+        return cls(names=np.asarray(names, dtype=object),
+                   **{name: np.asarray(metrics[name], dtype=np.float64) for name in METRICS})
+
+    @classmethod
+    def from_simulation(cls, names, learners, redeemers, effect, incentive_mask, revenue_per_month,
+                        incentive_cost, baseline=0, model=engine.ACTIVE_MODEL):
+        """Summarizes simulated trajectories; arguments are as in ``engine.summarize``."""
+        metrics = engine.summarize(learners, redeemers, effect, incentive_mask, revenue_per_month,
+                                   incentive_cost, baseline, model)
+        return cls.from_metrics(names, metrics)
+
+    @classmethod
+    def from_financials(cls, names, learners, revenue, cost, effect, incentive_mask, revenue_per_month, baseline=0,
+                        model=engine.ACTIVE_MODEL):
+        """Summarizes precomputed monthly financials; arguments are as in ``engine.summarize_financials``."""
+        metrics = engine.summarize_financials(learners, revenue, cost, effect, incentive_mask, revenue_per_month,
+                                              baseline, model)
+        return cls.from_metrics(names, metrics)
+
+    def __len__(self):
+        return len(self.names)
+
+    def take(self, rows):
+        """Returns the results for the given row indices or boolean mask."""
+        return ScenarioResults(**{f.name: getattr(self, f.name)[rows] for f in fields(self)})
+
+    def _keep(self, exclude):
+        keep = np.ones(len(self), dtype=bool)
+        keep[list(exclude)] = False
+        return keep
+
+    def order(self, by="net_revenue", descending=True, exclude=()):
+        """Returns row indices sorted by a metric, leaving out the ``exclude`` rows."""
+        rows = np.flatnonzero(self._keep(exclude))
+        values = getattr(self, by)[rows]
+        return rows[np.argsort(-values if descending else values, kind="stable")]
+
+    def best(self, by="net_revenue", exclude=()):
+        """Returns the row index with the highest value of a metric (the first one on ties)."""
+        return int(np.argmax(np.where(self._keep(exclude), getattr(self, by), -np.inf)))
+
+    def worst(self, by="net_revenue", exclude=()):
+        """Returns the row index with the lowest value of a metric (the first one on ties)."""
+        return int(np.argmin(np.where(self._keep(exclude), getattr(self, by), np.inf)))
+
+    def to_frame(self):
+        """Returns the numeric results as a pandas DataFrame indexed by scenario name."""
+        import pandas as pd
+
+        return pd.DataFrame({name: getattr(self, name) for name in METRICS},
+                            index=pd.Index(self.names, name="scenario"))
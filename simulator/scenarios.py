@@ -0,0 +1,140 @@
+"""
+Incentive programs with any number of offers, compared in a single batch.
+
+A scenario is a named list of offers, each made in one month with its own
+cost per redeemer, effect and redeem rate; a scenario without offers is a
+baseline. ``compile_offers`` lays a batch of scenarios out as per-transition
+arrays of shape ``(n_scenarios, duration_months - 1)``, which the engine
+functions accept directly, so comparing hundreds of incentive schedules is one
+vectorized pass rather than one simulation per scenario.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from simulator import engine
+from simulator.results import ScenarioResults
+
+
+@dataclass(frozen=True)
+class Offer:
+    """An incentive offered in ``month`` (1-based) to the learners active in that month."""
+
+    month: int
+    cost: float
+    effect: float
+    redeem_rate: float
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A named incentive program."""
+
+    name: str
+    offers: tuple = ()
+
+
+@dataclass
+class OfferSchedule:
+    """Per-transition offer arrays of shape (n_scenarios, duration_months - 1); zero where nothing is offered."""
+
+    names: list
+    mask: np.ndarray
+    effect: np.ndarray
+    redeem_rate: np.ndarray
+    cost: np.ndarray
+
+    def __len__(self):
+        return len(self.names)
+
+
+def compile_offers(scenarios, duration_months):
+    """
+    Builds the per-transition offer arrays of a batch of scenarios.
+
+    Parameters:
+    -----------
+    scenarios : sequence of Scenario
+
+    duration_months : int
+        Number of months in the program; offers can be made in months 1 to ``duration_months - 1``.
+
+    Returns:
+    --------
+    schedule : OfferSchedule
+
+    Raises:
+    -------
+    ValueError
+        If an offer falls outside the program, has a missing or infinite value, a rate
+        outside [0, 1] or a negative cost, or if a scenario makes two offers in the same month.
+    """
+    scenarios = list(scenarios)
+    rows, offers = [], []
+    for row, scenario in enumerate(scenarios):
+        rows.extend([row] * len(scenario.offers))
+        offers.extend(scenario.offers)
+
+    rows = np.asarray(rows, dtype=np.int64)
+    months = np.asarray([offer.month for offer in offers], dtype=np.int64)
+    values = np.asarray([(offer.cost, offer.effect, offer.redeem_rate) for offer in offers],
+                        dtype=np.float64).reshape(-1, 3)
+
+    def fail(message, invalid):
+        offer = int(np.flatnonzero(invalid)[0])
+        raise ValueError(f"{scenarios[rows[offer]].name}: {message} (offer in month {months[offer]}).")
+
+    if np.any((months < 1) | (months > duration_months - 1)):
+        fail(f"offers must be made in months 1 to {duration_months - 1}", (months < 1) | (months > duration_months - 1))
+    # NaN fails every comparison below, so missing values are caught first
+    if not np.isfinite(values).all():
+        fail("cost, effect and redeem rate must be finite numbers", ~np.isfinite(values).all(axis=1))
+    if np.any(values[:, 0] < 0):
+        fail("incentive cost cannot be negative", values[:, 0] < 0)
+    if np.any((values[:, 1:] < 0) | (values[:, 1:] > 1)):
+        fail("effect and redeem rate must be between 0 and 1", ((values[:, 1:] < 0) | (values[:, 1:] > 1)).any(axis=1))
+    cells = rows * duration_months + months
+    if np.unique(cells).size < cells.size:
+        _, first = np.unique(cells, return_index=True)
+        fail("only one offer per month is allowed", ~np.isin(np.arange(cells.size), first))
+
+    shape = (len(scenarios), duration_months - 1)
+    mask = np.zeros(shape, dtype=bool)
+    mask[rows, months - 1] = True
+    cost, effect, redeem_rate = (np.zeros(shape) for _ in range(3))
+    cost[rows, months - 1], effect[rows, months - 1], redeem_rate[rows, months - 1] = values.T
+    return OfferSchedule(names=[scenario.name for scenario in scenarios], mask=mask, effect=effect,
+                         redeem_rate=redeem_rate, cost=cost)
+
+
+def compare_scenarios(scenarios, drop_rates, initial_learners, revenue_per_month, redeemers_stay_full=True,
+                      baseline=0):
+    """
+    Simulates every scenario in one batch and returns their executive summary metrics.
+
+    Parameters:
+    -----------
+    scenarios : sequence of Scenario or OfferSchedule
+
+    drop_rates : array of shape (duration_months - 1,) or (n_scenarios, duration_months - 1)
+        Month-to-month drop-off fractions.
+
+    initial_learners, revenue_per_month, redeemers_stay_full :
+        As in ``engine.simulate_learners`` and ``engine.monthly_financials``.
+
+    baseline : int
+        Row the retention gain is measured against, usually a scenario without offers.
+
+    Returns:
+    --------
+    results : ScenarioResults
+    """
+    drop_rates = np.asarray(drop_rates, dtype=np.float64)
+    offers = scenarios if isinstance(scenarios, OfferSchedule) else compile_offers(scenarios, drop_rates.shape[-1] + 1)
+    learners = engine.simulate_learners(initial_learners, drop_rates, offers.effect, offers.redeem_rate, offers.mask,
+                                        redeemers_stay_full)
+    redeemers = engine.incentive_redeemers(learners, drop_rates, offers.redeem_rate, offers.mask)
+    revenue, cost = engine.monthly_financials(learners, redeemers, revenue_per_month, offers.cost)
+    return ScenarioResults.from_financials(offers.names, learners, revenue, cost, offers.effect, offers.mask,
+                                           revenue_per_month, baseline)
@@ -0,0 +1,218 @@
+"""
+Validated drop-off schedules compiled from uploaded CSV files.
+
+An upload lists a drop-off rate (%) per program month, with a ``Month`` and a
+``Drop-off Rate (%)`` column (the first two columns, whatever their names). An
+optional ``schedule_id`` column holds any number of schedules in one file.
+
+The file is parsed once and compiled with vectorized checks into a single
+C-contiguous float64 array of shape ``(n_schedules, duration_months)``; months
+that are not listed have no drop-off. Out-of-range, duplicate or non-integer
+months and rates outside 0-100% are reported with their line in the file.
+Compiled schedules are cached by the content hash of the upload, and
+``compare_schedules`` simulates every schedule against every incentive scenario
+in one engine batch.
+"""
+
+import hashlib
+import io
+from dataclasses import dataclass
+
+import numpy as np
+
+from simulator import engine
+from simulator.cache import shared_cache
+from simulator.results import ScenarioResults
+
+SCHEDULE_COLUMN = "schedule_id"
+DEFAULT_SCHEDULE_ID = "Uploaded schedule"
+
+
+@dataclass
+class DropSchedules:
+    """Compiled drop-off schedules; ``rates`` holds monthly drop-off fractions, one row per schedule."""
+
+    ids: np.ndarray
+    rates: np.ndarray
+    digest: str = ""
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def drop_rates(self):
+        """Month-to-month drop-off fractions; the final month's rate never applies."""
+        return self.rates[:, :-1]
+
+    def to_frame(self, schedule=0):
+        """The ``schedule``-th schedule as a Month / Drop-off Rate (%) table."""
+        import pandas as pd
+
+        return pd.DataFrame({
+            "Month": np.arange(1, self.rates.shape[1] + 1),
+            "Drop-off Rate (%)": self.rates[schedule] * 100,
+        })
+
+
+def compile_schedules(table, duration_months):
+    """
+    Validates drop-off rows and compiles them into one array.
+
+    Parameters:
+    -----------
+    table : pandas.DataFrame
+        Month and drop-off rate (%) as the first two columns other than ``schedule_id``.
+
+    duration_months : int
+        Number of months in the program; every month must be between 1 and ``duration_months``.
+
+    Returns:
+    --------
+    schedules : DropSchedules
+        Schedules in order of first appearance in ``table``.
+
+    Raises:
+    -------
+    ValueError
+        If a row has a missing schedule id, a month that is not a whole number within
+        the program, a rate outside 0-100%, or repeats a month of its schedule.
+    """
+    import pandas as pd
+
+    names = {str(column).strip().lower(): column for column in table.columns}
+    schedule_column = names.get(SCHEDULE_COLUMN)
+    value_columns = [column for column in table.columns if column != schedule_column][:2]
+    if len(value_columns) < 2:
+        raise ValueError("Drop-off schedules need a Month and a Drop-off Rate (%) column.")
+    if table.empty:
+        raise ValueError("The drop-off schedule has no rows.")
+
+    months = pd.to_numeric(table[value_columns[0]], errors="coerce").to_numpy(dtype=np.float64)
+    rates = pd.to_numeric(table[value_columns[1]], errors="coerce").to_numpy(dtype=np.float64)
+    if schedule_column is None:
+        codes, ids = np.zeros(len(table), dtype=np.int64), np.array([DEFAULT_SCHEDULE_ID], dtype=object)
+    else:
+        codes, ids = pd.factorize(table[schedule_column], sort=False)
+        ids = np.asarray(ids, dtype=object)
+
+    def fail(message, invalid):
+        row = int(np.flatnonzero(invalid)[0])
+        where = f"schedule {ids[codes[row]]!r}, " if schedule_column is not None and codes[row] >= 0 else ""
+        # Line 1 is the header
+        raise ValueError(f"Line {row + 2} ({where}month {table[value_columns[0]].iloc[row]}): {message}.")
+
+    if schedule_column is not None and np.any(codes < 0):
+        fail("schedule_id is missing", codes < 0)
+    if np.any(~np.isfinite(months) | (months != np.round(months))):
+        fail("month must be a whole number", ~np.isfinite(months) | (months != np.round(months)))
+    if np.any((months < 1) | (months > duration_months)):
+        fail(f"month is outside the program (months 1 to {duration_months})", (months < 1) | (months > duration_months))
+    if np.any(~(rates >= 0) | (rates > 100)):
+        fail("drop-off rate must be a number between 0 and 100", ~(rates >= 0) | (rates > 100))
+
+    months = months.astype(np.int64)
+    cells = codes * duration_months + (months - 1)
+    # Cells are dense, so counting them is linear where a sort-based unique is not
+    if np.bincount(cells, minlength=len(ids) * duration_months).max() > 1:
+        order = np.argsort(cells, kind="stable")
+        repeats = np.zeros(cells.size, dtype=bool)
+        repeats[order[1:][cells[order[1:]] == cells[order[:-1]]]] = True
+        fail("month is listed more than once", repeats)
+
+    compiled = np.zeros((len(ids), duration_months), dtype=np.float64)
+    compiled[codes, months - 1] = rates / 100
+    return DropSchedules(ids=ids, rates=compiled)
+
+
+def read_schedules(source, duration_months):
+    """
+    Reads and compiles a drop-off schedule CSV.
+
+    Parameters:
+    -----------
+    source : path, file-like or bytes
+
+    duration_months : int
+
+    Returns:
+    --------
+    schedules : DropSchedules
+    """
+    import pandas as pd
+
+    data = source if isinstance(source, bytes) else None
+    if data is None:
+        if hasattr(source, "read"):
+            data = source.read()
+        else:
+            with open(source, "rb") as fh:
+                data = fh.read()
+    try:
+        table = pd.read_csv(io.BytesIO(data))
+    except pd.errors.EmptyDataError as exc:
+        raise ValueError("The drop-off schedule file is empty.") from exc
+    schedules = compile_schedules(table, duration_months)
+    schedules.digest = hashlib.sha256(data).hexdigest()
+    return schedules
+
+
+def load_schedules(data, duration_months, cache=None):
+    """
+    ``read_schedules`` for uploaded bytes, cached by their content hash.
+
+    Re-uploading the same file, or rerunning a page with it, returns the compiled
+    schedules without parsing it again. ``cache`` defaults to the shared result cache.
+    """
+    cache = cache if cache is not None else shared_cache()
+    key = f"drop-schedules:{duration_months}:{hashlib.sha256(data).hexdigest()}"
+    return cache.get_or_compute(key, lambda: read_schedules(data, duration_months))
+
+
+def compare_schedules(schedules, effects, redeem_rates, initial_learners, revenue_per_month, incentive_cost,
+                      redeemers_stay_full=True, scenario_names=None):
+    """
+    Simulates every incentive scenario on every schedule in one batch.
+
+    An incentive is offered to the learners about to drop off in every month with a
+    drop-off, as on the custom CSV page (``engine.AT_RISK_MODEL``), and each schedule's
+    first scenario (usually a Baseline without incentive) is the one its retention gain
+    is measured against.
+
+    Parameters:
+    -----------
+    schedules : DropSchedules
+
+    effects, redeem_rates : array of shape (n_scenarios,)
+        Fractions per scenario.
+
+    initial_learners, revenue_per_month, incentive_cost, redeemers_stay_full :
+        As in ``engine.simulate_learners`` and ``engine.monthly_financials``.
+
+    scenario_names : list of str or None
+        Defaults to ``Scenario 0`` ... ``Scenario n-1``.
+
+    Returns:
+    --------
+    results : ScenarioResults
+        ``len(schedules) * n_scenarios`` rows, scenarios varying fastest, named
+        ``"<schedule id>: <scenario name>"``.
+    """
+    effects = np.asarray(effects, dtype=np.float64)
+    redeem_rates = np.asarray(redeem_rates, dtype=np.float64)
+    n_scenarios = effects.size
+    if scenario_names is None:
+        scenario_names = [f"Scenario {i}" for i in range(n_scenarios)]
+
+    drop_rates = np.repeat(schedules.drop_rates, n_scenarios, axis=0)
+    offer_mask = drop_rates > 0
+    effect = np.tile(effects, len(schedules))
+    redeem_rate = np.tile(redeem_rates, len(schedules))
+
+    learners = engine.simulate_learners(initial_learners, drop_rates, effect, redeem_rate, offer_mask,
+                                        redeemers_stay_full, engine.AT_RISK_MODEL)
+    redeemers = engine.incentive_redeemers(learners, drop_rates, redeem_rate, offer_mask, engine.AT_RISK_MODEL)
+    revenue, cost = engine.monthly_financials(learners, redeemers, revenue_per_month, incentive_cost)
+    names = [f"{schedule}: {name}" for schedule in schedules.ids for name in scenario_names]
+    return ScenarioResults.from_financials(names, learners, revenue, cost, effect, offer_mask, revenue_per_month,
+                                           baseline=np.repeat(learners[::n_scenarios, -1], n_scenarios),
+                                           model=engine.AT_RISK_MODEL)
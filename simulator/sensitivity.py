@@ -0,0 +1,284 @@
+"""
+Analytic break-even thresholds and sensitivities.
+
+The retention model is piecewise multiplicative: active learners are a running
+product of monthly survival factors ``1 - d * (1 - mitigation)``, and each
+factor is linear in the incentive effect, the redeem rate and the drop-off
+rates. Net revenue is therefore a polynomial in any one of these parameters,
+of degree at most the number of offer months plus one. This module works on
+that structure directly instead of re-running the simulation:
+
+* gradients come from forward-mode differentiation of the running product,
+  so they are exact rather than finite differences;
+* break-even thresholds are the real roots of the net revenue uplift
+  polynomial, built coefficient by coefficient;
+* tornado swings evaluate every perturbed scenario in one engine batch.
+
+Parameters follow ``engine.simulate_learners``: rates are fractions, and the
+uplift is measured against the same program without the incentive.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from simulator import engine
+
+INCENTIVE_PARAMETERS = ("effect", "redeem_rate", "incentive_cost", "revenue_per_month")
+DOMAINS = {
+    "effect": (0.0, 1.0),
+    "redeem_rate": (0.0, 1.0),
+    "incentive_cost": (0.0, np.inf),
+    "revenue_per_month": (0.0, np.inf),
+}
+
+
+@dataclass
+class Sensitivity:
+    """Net revenue, its exact derivatives and break-even thresholds for each scenario."""
+
+    net_revenue: np.ndarray
+    baseline_net_revenue: np.ndarray
+    values: dict
+    gradient: dict
+    elasticity: dict
+    break_even: dict
+
+    @property
+    def uplift(self):
+        return self.net_revenue - self.baseline_net_revenue
+
+
+def _inputs(initial_learners, drop_rates, effect, redeem_rate, incentive_mask, revenue_per_month, incentive_cost,
+            drop_groups):
+    effect = engine._per_scenario(effect)
+    redeem_rate = engine._per_scenario(redeem_rate)
+    drop_rates = np.atleast_2d(np.asarray(drop_rates, dtype=np.float64))
+    mask = np.atleast_2d(np.asarray(incentive_mask, dtype=bool))
+    shape = np.broadcast_shapes(drop_rates.shape, mask.shape, effect.shape, redeem_rate.shape)
+    groups = {name: np.broadcast_to(np.asarray(group, dtype=bool), shape)
+              for name, group in (drop_groups or {}).items()}
+    return {
+        "initial_learners": np.broadcast_to(engine._per_scenario(initial_learners), (shape[0], 1)),
+        "drop_rates": np.broadcast_to(drop_rates, shape),
+        "mask": np.broadcast_to(mask, shape),
+        "effect": np.broadcast_to(effect, (shape[0], 1)),
+        "redeem_rate": np.broadcast_to(redeem_rate, (shape[0], 1)),
+        "revenue_per_month": np.broadcast_to(engine._per_scenario(revenue_per_month), (shape[0], 1)),
+        "incentive_cost": np.broadcast_to(engine._per_scenario(incentive_cost), (shape[0], 1)),
+        "groups": groups,
+    }
+
+
+def _offer_terms(p, stay, model):
+    """
+    Per-transition weights of the incentive model: the pre-offer months whose drop-off
+    falls with the effect, the offer months that retain redeemers, and the learners
+    each offer reaches.
+    """
+    d, mask = p["drop_rates"], p["mask"]
+    pre = np.zeros_like(d)
+    if model == engine.ACTIVE_MODEL:
+        pre[:, :-1] = mask[:, 1:]
+    retained = np.where(mask, 1.0, 0.0) if stay else np.zeros_like(d)
+    eligible = np.where(mask, d if model == engine.AT_RISK_MODEL else 1.0, 0.0)
+    return pre, retained, eligible
+
+
+def _net_gradients(p, stay, model):
+    """Net revenue and its exact derivative for every parameter, by forward-mode recursion."""
+    d, e, r = p["drop_rates"], p["effect"], p["redeem_rate"]
+    pre, retained, eligible = _offer_terms(p, stay, model)
+    mitigation = pre * e + retained * e * r
+    survival = 1.0 - d * (1.0 - mitigation)
+
+    # d survival / d parameter, per transition
+    survival_slope = {
+        "initial_learners": np.zeros_like(d),
+        "effect": d * (pre + retained * r),
+        "redeem_rate": d * retained * e,
+        "revenue_per_month": np.zeros_like(d),
+        "incentive_cost": np.zeros_like(d),
+        **{name: np.where(group, -(1.0 - mitigation), 0.0) for name, group in p["groups"].items()},
+    }
+
+    n_scenarios, n_transitions = d.shape
+    learners = np.empty((n_scenarios, n_transitions + 1))
+    learners[:, 0] = p["initial_learners"][:, 0]
+    slopes = {name: np.zeros_like(learners) for name in survival_slope}
+    slopes["initial_learners"][:, 0] = 1.0
+    for t in range(n_transitions):
+        learners[:, t + 1] = learners[:, t] * survival[:, t]
+        for name, slope in slopes.items():
+            slope[:, t + 1] = slope[:, t] * survival[:, t] + learners[:, t] * survival_slope[name][:, t]
+
+    revenue_per_month, incentive_cost = p["revenue_per_month"][:, 0], p["incentive_cost"][:, 0]
+    redeemers = (learners[:, :-1] * eligible).sum(axis=1) * r[:, 0]
+    net = revenue_per_month * learners.sum(axis=1) - incentive_cost * redeemers
+
+    gradient = {}
+    for name, slope in slopes.items():
+        redeemer_slope = (slope[:, :-1] * eligible).sum(axis=1) * r[:, 0]
+        if name == "redeem_rate":
+            redeemer_slope = redeemer_slope + (learners[:, :-1] * eligible).sum(axis=1)
+        elif name in p["groups"] and model == engine.AT_RISK_MODEL:
+            # Only learners about to drop off are offered the incentive, so the offer reach moves with the rate
+            in_group = np.where(p["mask"] & p["groups"][name], 1.0, 0.0)
+            redeemer_slope = redeemer_slope + (learners[:, :-1] * in_group).sum(axis=1) * r[:, 0]
+        gradient[name] = revenue_per_month * slope.sum(axis=1) - incentive_cost * redeemer_slope
+    gradient["revenue_per_month"] = gradient["revenue_per_month"] + learners.sum(axis=1)
+    gradient["incentive_cost"] = gradient["incentive_cost"] - redeemers
+    return net, learners, redeemers, gradient
+
+
+def _uplift_polynomial(p, name, stay, model, baseline_learners, learners, redeemers):
+    """Coefficients (lowest degree first) of the net revenue uplift as a polynomial in one parameter."""
+    revenue_per_month, incentive_cost = p["revenue_per_month"][:, 0], p["incentive_cost"][:, 0]
+    if name == "revenue_per_month":
+        return np.stack([-incentive_cost * redeemers, learners.sum(axis=1) - baseline_learners], axis=1)
+    if name == "incentive_cost":
+        return np.stack([revenue_per_month * (learners.sum(axis=1) - baseline_learners), -redeemers], axis=1)
+
+    d, e, r = p["drop_rates"], p["effect"], p["redeem_rate"]
+    pre, retained, eligible = _offer_terms(p, stay, model)
+    # Each survival factor is a + b * x in the parameter x
+    if name == "effect":
+        a, b = 1.0 - d, d * (pre + retained * r)
+    else:
+        a, b = 1.0 - d + d * pre * e, d * retained * e
+
+    n_scenarios, n_transitions = d.shape
+    degree = n_transitions + 1
+    poly = np.zeros((n_scenarios, degree + 1))
+    poly[:, 0] = p["initial_learners"][:, 0]
+    learner_sum = poly.copy()
+    eligible_sum = np.zeros_like(poly)
+    for t in range(n_transitions):
+        eligible_sum += poly * eligible[:, t, None]
+        shifted = np.zeros_like(poly)
+        shifted[:, 1:] = poly[:, :-1] * b[:, t, None]
+        poly = poly * a[:, t, None] + shifted
+        learner_sum += poly
+
+    cost = eligible_sum * incentive_cost[:, None]
+    if name == "effect":
+        cost = cost * r
+    else:
+        # Redeemers scale with the redeem rate itself
+        cost = np.concatenate([np.zeros((n_scenarios, 1)), cost[:, :-1]], axis=1)
+    uplift = revenue_per_month[:, None] * learner_sum - cost
+    uplift[:, 0] -= revenue_per_month * baseline_learners
+    if name == "redeem_rate":
+        # Nobody redeems at a zero rate, so divide out that trivial root; an announced
+        # offer that already cuts the drop-off before it has no such root
+        trivial = np.abs(uplift[:, 0]) <= 1e-12 * np.abs(uplift).max(axis=1)
+        uplift[trivial, :-1], uplift[trivial, -1] = uplift[trivial, 1:], 0.0
+    return uplift
+
+
+def _nearest_root(coefficients, current, domain):
+    """Real root of the polynomial inside ``domain`` nearest to ``current``; NaN if the sign never changes there."""
+    scale = np.abs(coefficients).max()
+    if scale == 0:
+        return np.nan
+    coefficients = np.trim_zeros(np.where(np.abs(coefficients) > 1e-12 * scale, coefficients, 0.0), "b")
+    if coefficients.size < 2:
+        return np.nan
+    roots = np.polynomial.polynomial.polyroots(coefficients)
+    roots = roots.real[np.abs(roots.imag) <= 1e-9 * np.maximum(1.0, np.abs(roots.real))]
+    roots = roots[(roots >= domain[0] - 1e-12) & (roots <= domain[1])]
+    if roots.size == 0:
+        return np.nan
+    return float(np.clip(roots[np.argmin(np.abs(roots - current))], *domain))
+
+
+def sensitivity(initial_learners, drop_rates, effect, redeem_rate, incentive_mask, revenue_per_month, incentive_cost,
+                redeemers_stay_full=True, drop_groups=None, model=engine.ACTIVE_MODEL):
+    """
+    Solves for exact sensitivities and break-even thresholds of a batch of scenarios.
+
+    Parameters:
+    -----------
+    initial_learners, drop_rates, effect, redeem_rate, incentive_mask, redeemers_stay_full, model :
+        As in ``engine.simulate_learners``; ``redeemers_stay_full`` is a single bool.
+
+    revenue_per_month, incentive_cost : float or array of shape (n_scenarios,)
+
+    drop_groups : dict of str -> bool array or None
+        Named groups of transitions whose drop-off rates move together, e.g. the
+        incentive month and the organic months before and after it. Each group gets
+        a gradient for a uniform shift of its rates.
+
+    Returns:
+    --------
+    result : Sensitivity
+        ``gradient`` and ``elasticity`` hold d(net revenue)/d(parameter) and
+        (parameter / net revenue) * gradient for every parameter. ``break_even`` holds,
+        for the incentive parameters, the value nearest the current one at which net
+        revenue equals the Baseline's (e.g. the minimum effect for the incentive to pay
+        off, or the maximum affordable incentive cost); NaN when there is none.
+    """
+    engine._check_model(model)
+    p = _inputs(initial_learners, drop_rates, effect, redeem_rate, incentive_mask, revenue_per_month, incentive_cost,
+                drop_groups)
+    net, learners, redeemers, gradient = _net_gradients(p, redeemers_stay_full, model)
+    baseline_learners = engine.simulate_learners(p["initial_learners"][:, 0], p["drop_rates"], 0.0, 0.0,
+                                                 p["mask"]).sum(axis=1)
+
+    values = {name: p[name][:, 0].copy() for name in ("initial_learners", *INCENTIVE_PARAMETERS)}
+    for name, group in p["groups"].items():
+        values[name] = np.divide((p["drop_rates"] * group).sum(axis=1), group.sum(axis=1),
+                                 out=np.zeros(len(net)), where=group.any(axis=1))
+
+    elasticity = {name: np.divide(values[name] * gradient[name], net, out=np.zeros_like(net), where=net != 0)
+                  for name in gradient}
+
+    break_even = {}
+    for name in INCENTIVE_PARAMETERS:
+        coefficients = _uplift_polynomial(p, name, redeemers_stay_full, model, baseline_learners, learners, redeemers)
+        break_even[name] = np.array([_nearest_root(c, v, DOMAINS[name]) for c, v in zip(coefficients, values[name])])
+
+    return Sensitivity(net_revenue=net, baseline_net_revenue=p["revenue_per_month"][:, 0] * baseline_learners,
+                       values=values, gradient=gradient, elasticity=elasticity, break_even=break_even)
+
+
+def tornado(initial_learners, drop_rates, effect, redeem_rate, incentive_mask, revenue_per_month, incentive_cost,
+            redeemers_stay_full=True, drop_groups=None, swing=0.1, model=engine.ACTIVE_MODEL):
+    """
+    Net revenue of one scenario when each parameter moves ``swing`` (relative) down and up.
+
+    Arguments are as in ``sensitivity``; only the first scenario is used. Rates are
+    clipped to [0, 1] and every perturbed scenario is simulated in a single batch.
+
+    Returns:
+    --------
+    swings : dict of str -> (low, high)
+        Net revenue at the lowered and raised parameter, sorted by the size of the swing.
+    """
+    p = _inputs(initial_learners, drop_rates, effect, redeem_rate, incentive_mask, revenue_per_month, incentive_cost,
+                drop_groups)
+    names = ["initial_learners", *INCENTIVE_PARAMETERS, *p["groups"]]
+    rows = 2 * len(names)
+    batch = {key: np.repeat(p[key][:1], rows, axis=0).astype(np.float64)
+             for key in ("initial_learners", "effect", "redeem_rate", "revenue_per_month", "incentive_cost")}
+    drops = np.repeat(p["drop_rates"][:1], rows, axis=0)
+
+    for i, name in enumerate(names):
+        for row, factor in ((2 * i, 1 - swing), (2 * i + 1, 1 + swing)):
+            if name in p["groups"]:
+                group = p["groups"][name][0]
+                drops[row, group] = np.clip(drops[row, group] * factor, 0.0, 1.0)
+            else:
+                value = batch[name][row] * factor
+                batch[name][row] = np.clip(value, 0.0, 1.0) if name in ("effect", "redeem_rate") else value
+
+    mask = np.repeat(p["mask"][:1], rows, axis=0)
+    learners = engine.simulate_learners(batch["initial_learners"], drops, batch["effect"], batch["redeem_rate"],
+                                        mask, redeemers_stay_full, model)
+    redeemers = engine.incentive_redeemers(learners, drops, batch["redeem_rate"], mask, model)
+    revenue, cost = engine.monthly_financials(learners, redeemers, batch["revenue_per_month"],
+                                              batch["incentive_cost"])
+    net = (revenue - cost).sum(axis=1)
+
+    swings = {name: (float(net[2 * i]), float(net[2 * i + 1])) for i, name in enumerate(names)}
+    return dict(sorted(swings.items(), key=lambda item: -abs(item[1][1] - item[1][0])))
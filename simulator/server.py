@@ -0,0 +1,335 @@
+"""
+Local HTTP/JSON API for scenario evaluation.
+
+Other tools can get the simulator's numbers without the Streamlit UI::
+
+    python -m simulator.server --port 8765 --store results.sqlite
+
+Scenarios use the batch file's inputs and units (see ``simulator.batch``) and
+each one is compared against its own Baseline, so results match the app's
+executive summary. The server runs on the standard library only:
+
+* requests are handled on an asyncio event loop, while CPU-bound batches run
+  in a worker pool of processes in chunks of ``chunk_size`` scenarios;
+* identical scenarios are computed once: duplicates within a request share a
+  row, and requests that arrive while a scenario is being computed wait for
+  that computation instead of starting another;
+* results are kept in a SQLite store keyed by a hash of the scenario inputs
+  and of the simulator's code (``cache.code_version``), so repeated queries,
+  also after a restart, are answered from the store until the model changes;
+* parsing, validating and hashing a request run off the event loop, so one
+  large request does not stall the other connections.
+
+Endpoints
+---------
+``GET /health``
+    Liveness check.
+``GET /stats``
+    Request, store and coalescing counters.
+``POST /simulate``
+    One scenario object; returns its metrics.
+``POST /batch``
+    ``{"scenarios": [...]}`` (or a bare list) with up to ``MAX_BATCH_SCENARIOS``
+    scenarios; returns ``{"results": [...]}`` in request order.
+
+Programs are limited to ``MAX_DURATION_MONTHS`` months and ``MAX_INITIAL_LEARNERS``
+learners, so a request cannot ask for an unbounded allocation.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from simulator.batch import DEFAULT_CHUNK_SIZE, INPUT_COLUMNS, evaluate_scenarios, prepare_scenarios
+from simulator.cache import canonical_hash, code_version
+from simulator.results import METRICS
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BATCH_SCENARIOS = 100_000
+MAX_BODY_BYTES = 64 * 2**20
+MAX_DURATION_MONTHS = 1200
+MAX_INITIAL_LEARNERS = 1e12
+STORE_QUERY_SIZE = 900
+
+
+class ResultStore:
+    """
+    SQLite table of scenario metrics keyed by input hash.
+
+    Parameters:
+    -----------
+    path : str, Path or None
+        Database file, created when missing. In-memory when None.
+    """
+
+    def __init__(self, path=None):
+        self._connection = sqlite3.connect(":memory:" if path is None else str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            if path is not None:
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, metrics BLOB NOT NULL)")
+
+    def get_many(self, keys):
+        """Returns ``{key: metrics}`` for the stored keys, each a float64 array ordered as ``METRICS``."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), STORE_QUERY_SIZE):
+                batch = keys[start:start + STORE_QUERY_SIZE]
+                rows = self._connection.execute(
+                    f"SELECT key, metrics FROM results WHERE key IN ({','.join('?' * len(batch))})", batch)
+                found.update((key, np.frombuffer(metrics, dtype=np.float64)) for key, metrics in rows)
+        return found
+
+    def put_many(self, items):
+        """Stores ``{key: metrics}``."""
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?)",
+                                         ((key, np.asarray(metrics, dtype=np.float64).tobytes())
+                                          for key, metrics in items.items()))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def _evaluate_chunk(columns):
+    metrics = evaluate_scenarios(columns)
+    return np.column_stack([metrics[name] for name in METRICS])
+
+
+def scenario_keys(scenarios):
+    """Store keys of prepared scenarios: a hash of the simulator's code and every input except the scenario name."""
+    columns = [column for column in INPUT_COLUMNS if column != "scenario"]
+    inputs = np.ascontiguousarray(scenarios[columns].to_numpy(dtype=np.float64) + 0.0)  # -0.0 hashes as 0.0
+    # Hashing each row's raw bytes after a shared prefix is an order of magnitude faster than canonical_hash
+    prefix = canonical_hash(code_version(), columns).encode()
+    return [hashlib.sha256(prefix + row.tobytes()).hexdigest() for row in inputs]
+
+
+class ScenarioService:
+    """
+    Evaluates scenarios through the result store, the in-flight computations and the worker pool.
+
+    Parameters:
+    -----------
+    store : ResultStore or None
+        Where results are kept; a private in-memory store when None.
+
+    workers : int or None
+        Worker processes. ``1`` evaluates in a background thread of this process;
+        ``None`` uses every CPU.
+
+    chunk_size : int
+        Scenarios per worker task.
+    """
+
+    def __init__(self, store=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.store = store if store is not None else ResultStore()
+        self.chunk_size = chunk_size
+        self.pool = ThreadPoolExecutor(1) if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+        self.stats = {"requests": 0, "scenarios": 0, "stored": 0, "computed": 0, "coalesced": 0}
+        self._in_flight = {}
+
+    @staticmethod
+    def _prepare(records):
+        import pandas as pd
+
+        scenarios = prepare_scenarios(pd.DataFrame.from_records(records))
+        too_large = ((scenarios["duration_months"] > MAX_DURATION_MONTHS)
+                     | (scenarios["initial_learners"] > MAX_INITIAL_LEARNERS))
+        if too_large.any():
+            rows = ", ".join(str(row) for row in scenarios.index[too_large][:10])
+            raise ValueError(f"Invalid scenario definitions in rows {rows}: programs are limited to "
+                             f"{MAX_DURATION_MONTHS:,} months and {MAX_INITIAL_LEARNERS:,.0f} learners.")
+        keys = scenario_keys(scenarios)
+        unique, first_row, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        return scenarios, keys, unique.tolist(), first_row, inverse
+
+    async def evaluate(self, records):
+        """
+        Returns the metrics of every scenario in ``records`` (a list of dicts), in order.
+
+        Raises ValueError for invalid scenario definitions and programs over the size limits.
+        """
+        scenarios, keys, unique, first_row, inverse = await asyncio.to_thread(self._prepare, records)
+        values = await asyncio.to_thread(self.store.get_many, unique)
+
+        loop = asyncio.get_running_loop()
+        waiting, pending = {}, []
+        for key, row in zip(unique, first_row):
+            if key in values:
+                continue
+            if key in self._in_flight:
+                waiting[key] = self._in_flight[key]
+            else:
+                self._in_flight[key] = loop.create_future()
+                pending.append((key, row))
+
+        self.stats["scenarios"] += len(keys)
+        self.stats["stored"] += len(values)
+        self.stats["computed"] += len(pending)
+        self.stats["coalesced"] += len(waiting) + len(keys) - len(unique)
+
+        if pending:
+            values.update(await self._compute(scenarios, pending))
+        for key, future in waiting.items():
+            values[key] = await future
+
+        rows = np.stack([values[key] for key in unique])[inverse]
+        return [{"scenario": name, **dict(zip(METRICS, row.tolist()))}
+                for name, row in zip(scenarios["scenario"], rows)]
+
+    async def _compute(self, scenarios, pending):
+        keys = [key for key, _ in pending]
+        subset = scenarios.iloc[[row for _, row in pending]]
+        columns = {name: subset[name].to_numpy() for name in INPUT_COLUMNS}
+        loop = asyncio.get_running_loop()
+        try:
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(self.pool, _evaluate_chunk,
+                                     {name: values[start:start + self.chunk_size] for name, values in columns.items()})
+                for start in range(0, len(keys), self.chunk_size)))
+            computed = dict(zip(keys, np.concatenate(chunks)))
+            await asyncio.to_thread(self.store.put_many, computed)
+        except BaseException as exc:
+            for key in keys:
+                future = self._in_flight.pop(key)
+                future.set_exception(exc)
+                future.exception()  # waiters re-raise it; avoid "never retrieved" warnings
+            raise
+
+        for key in keys:
+            self._in_flight.pop(key).set_result(computed[key])
+        return computed
+
+    def close(self):
+        self.pool.shutdown()
+        self.store.close()
+
+
+class ScenarioServer:
+    """Minimal HTTP/1.1 front-end for a ``ScenarioService``, with keep-alive connections."""
+
+    def __init__(self, service):
+        self.service = service
+
+    async def _route(self, method, path, body):
+        if path == "/health":
+            return HTTPStatus.OK, {"status": "ok"}
+        if path == "/stats":
+            entries = await asyncio.to_thread(len, self.service.store)
+            return HTTPStatus.OK, {**self.service.stats, "store_entries": entries,
+                                   "in_flight": len(self.service._in_flight)}
+        if path not in ("/simulate", "/batch"):
+            return HTTPStatus.NOT_FOUND, {"error": f"Unknown endpoint {path}."}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{path} only accepts POST."}
+
+        try:
+            payload = await asyncio.to_thread(json.loads, body or b"null")
+        except json.JSONDecodeError as exc:
+            return HTTPStatus.BAD_REQUEST, {"error": f"Request body is not valid JSON: {exc}."}
+        if path == "/simulate":
+            records = [payload] if isinstance(payload, dict) else None
+        else:
+            records = payload.get("scenarios") if isinstance(payload, dict) else payload
+        if not isinstance(records, list) or not records or not all(isinstance(record, dict) for record in records):
+            return HTTPStatus.BAD_REQUEST, {"error": "Expected a scenario object for /simulate and a non-empty list "
+                                                     "of scenario objects for /batch."}
+        if len(records) > MAX_BATCH_SCENARIOS:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {
+                "error": f"At most {MAX_BATCH_SCENARIOS:,} scenarios per request."}
+
+        self.service.stats["requests"] += 1
+        try:
+            results = await self.service.evaluate(records)
+        except (TypeError, ValueError) as exc:
+            return HTTPStatus.BAD_REQUEST, {"error": str(exc)}
+        return HTTPStatus.OK, results[0] if path == "/simulate" else {"results": results}
+
+    async def handle(self, reader, writer):
+        """Serves the requests of one connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                if length > MAX_BODY_BYTES:
+                    status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request body too large."}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length)
+                    try:
+                        status, payload = await self._route(method, urlsplit(target).path, body)
+                    except Exception as exc:
+                        status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(exc).__name__}: {exc}"}
+
+                content = (await asyncio.to_thread(json.dumps, payload)).encode()
+                writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(content)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}"
+                             f"\r\n\r\n".encode("latin-1") + content)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # malformed request or client went away
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        """Serves until cancelled; ``ready`` is called with the bound port once listening."""
+        server = await asyncio.start_server(self.handle, host, port, limit=2**16)
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m simulator.server",
+                                     description="Serve scenario evaluations over a local HTTP/JSON API.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="interface to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--store", help="SQLite result store (default: in memory)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: every CPU)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="scenarios per worker task")
+    args = parser.parse_args(argv)
+
+    service = ScenarioService(ResultStore(args.store), workers=args.workers, chunk_size=args.chunk_size)
+    server = ScenarioServer(service)
+    try:
+        asyncio.run(server.serve(args.host, args.port,
+                                 ready=lambda port: print(f"Serving on http://{args.host}:{port}", flush=True)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Cold-start time budgets for the simulation core, the batch workers and the app pages.
+
+Every target is started in a fresh interpreter, as on a new container or a
+spawned worker process: modules are imported, and pages are run once with their
+default inputs in Streamlit's bare mode. Streamlit itself is imported before the
+clock starts for pages, since the server has loaded it before any page runs.
+
+Each target has a wall-clock budget and a list of heavy modules it must not
+load; the simulation core needs only NumPy, and pages load pandas and plotly
+only once they render a table or chart::
+
+    python -m simulator.startup
+    python -m simulator.startup --output startup.json
+
+The command exits non-zero when a target is over budget or loads a module it
+should not. Budgets are set for a single-CPU container.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("pandas", "pyarrow", "plotly.graph_objects", "streamlit")
+NUMPY_ONLY = HEAVY_MODULES
+NO_DATAFRAMES = ("pandas", "pyarrow")
+
+# Target: (kind, budget in ms, modules its cold start must not load)
+BUDGETS = {
+    "simulator.engine": ("module", 200, NUMPY_ONLY),
+    "simulator": ("module", 250, NUMPY_ONLY),
+    "simulator.batch": ("module", 300, NUMPY_ONLY),
+    "simulator.server": ("module", 300, NUMPY_ONLY),
+    # The executive summary table and charts render on every run
+    "1_Retention_Incentive_Simulator.py": ("page", 1200, ()),
+    # Tables and charts only render once a file is uploaded
+    "pages/1_Custom_CSV_Incentive_Simulator.py": ("page", 350, NO_DATAFRAMES),
+    "pages/2_Parameter_Explanations.py": ("page", 150, NO_DATAFRAMES),
+    "pages/3_Multi_Cohort_Simulator.py": ("page", 450, NO_DATAFRAMES),
+}
+
+_PROBE = """
+import json, sys, time
+kind, target, heavy = sys.argv[1], sys.argv[2], json.loads(sys.argv[3])
+if kind == "page":
+    import logging, runpy
+    import streamlit
+    logging.disable(logging.WARNING)
+    start = time.perf_counter()
+    runpy.run_path(target, run_name="__main__")
+else:
+    import importlib
+    start = time.perf_counter()
+    importlib.import_module(target)
+seconds = time.perf_counter() - start
+print(json.dumps({"ms": seconds * 1000, "loaded": [name for name in heavy if name in sys.modules]}))
+"""
+
+
+def measure(target, kind, repeats=3):
+    """
+    Cold-starts ``target`` in ``repeats`` fresh interpreters.
+
+    Returns:
+    --------
+    record : dict
+        Median and every sample (ms), and the heavy modules loaded by the end of the first start.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])))
+    samples, loaded = [], None
+    for _ in range(repeats):
+        process = subprocess.run([sys.executable, "-c", _PROBE, kind, target, json.dumps(HEAVY_MODULES)],
+                                 cwd=ROOT, env=env, capture_output=True, text=True)
+        if process.returncode != 0:
+            raise RuntimeError(f"Starting {target} failed:\n{process.stderr.strip()}")
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        samples.append(result["ms"])
+        loaded = result["loaded"] if loaded is None else loaded
+    return {"target": target, "kind": kind, "ms": float(np.median(samples)), "samples_ms": samples, "loaded": loaded}
+
+
+def check(budgets=BUDGETS, repeats=3, progress=None):
+    """
+    Measures every target against its budget.
+
+    Returns:
+    --------
+    records : list of dict
+        ``measure`` records with the budget, the forbidden modules that were loaded
+        and whether the target passed.
+    """
+    records = []
+    for target, (kind, budget_ms, forbidden) in budgets.items():
+        record = measure(target, kind, repeats)
+        record["budget_ms"] = budget_ms
+        record["forbidden_loaded"] = [name for name in record["loaded"] if name in forbidden]
+        record["ok"] = record["ms"] <= budget_ms and not record["forbidden_loaded"]
+        records.append(record)
+        if progress is not None:
+            extra = f"  loads {', '.join(record['forbidden_loaded'])}" if record["forbidden_loaded"] else ""
+            progress.write(f"{'ok  ' if record['ok'] else 'FAIL'} {target:<44} {record['ms']:>8.0f} ms "
+                           f"(budget {budget_ms} ms){extra}\n")
+            progress.flush()
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m simulator.startup",
+                                     description="Check cold-start times of the engine and app pages.")
+    parser.add_argument("--targets", help="only check targets whose name contains this text")
+    parser.add_argument("--repeats", type=int, default=3, help="fresh interpreters per target")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    budgets = {target: budget for target, budget in BUDGETS.items() if args.targets is None or args.targets in target}
+    records = check(budgets, repeats=args.repeats, progress=sys.stdout)
+    if args.output:
+        Path(args.output).write_text(json.dumps({"python": sys.version.split()[0], "targets": records}, indent=1)
+                                     + "\n")
+    return 0 if all(record["ok"] for record in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Parameter sweep over the incentive design space.
+
+Evaluates the full cartesian grid of incentive effect, redeem rate, incentive
+cost and offer month. Trajectories are simulated in fixed-size vectorized
+chunks, so memory stays bounded no matter how many grid points are requested;
+the incentive cost does not change trajectories and is priced analytically.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from simulator import engine
+
+DEFAULT_CHUNK_POINTS = 1_000_000
+
+
+@dataclass
+class SweepResult:
+    """Outcome of ``sweep``: the optimal configuration and the net revenue surface."""
+
+    effects: np.ndarray
+    redeem_rates: np.ndarray
+    incentive_costs: np.ndarray
+    drop_months: np.ndarray
+    surface: np.ndarray
+    break_even_cost: np.ndarray
+    best: dict
+    evaluated: int
+
+
+def sweep(effects, redeem_rates, incentive_costs, drop_months, *, initial_learners, duration_months,
+          drop_off_rate, organic_drop_pre=0.0, organic_drop_post=0.0, revenue_per_month=5.0,
+          redeemers_stay_full=True, chunk_points=DEFAULT_CHUNK_POINTS):
+    """
+    Finds the net-revenue-optimal incentive over a grid of parameters.
+
+    Learner trajectories do not depend on the incentive cost, so only (effect, redeem rate,
+    offer month) points are simulated. Net revenue falls linearly with the cost per
+    redeemer, so the cost axis is priced analytically: the cheapest cost is always optimal,
+    and the informative figure is the break-even cost, the highest cost per redeemer at
+    which a configuration still matches the Baseline's net revenue.
+
+    Parameters:
+    -----------
+    effects, redeem_rates : array of float
+        Grid values for the incentive effectiveness and redemption fractions.
+
+    incentive_costs : array of float
+        Grid values for the incentive cost per redeemer.
+
+    drop_months : array of int
+        Grid values for the month the incentive is offered (and the major drop-off happens).
+
+    chunk_points : int
+        Upper bound on the number of grid points simulated per vectorized batch.
+
+    Returns:
+    --------
+    result : SweepResult
+        ``surface[i, j]`` is the best net revenue for ``effects[i]`` and ``redeem_rates[j]``
+        over all incentive costs and offer months, and ``break_even_cost[i, j]`` the highest
+        break-even cost over the offer months (inf when nobody redeems). ``best`` holds the
+        optimal configuration, its break-even cost and the Baseline net revenue for its
+        offer month.
+
+    Raises:
+    -------
+    ValueError
+        If an axis of the grid is empty or an offer month falls outside the program.
+    """
+    effects = np.asarray(effects, dtype=np.float64)
+    redeem_rates = np.asarray(redeem_rates, dtype=np.float64)
+    incentive_costs = np.asarray(incentive_costs, dtype=np.float64)
+    drop_months = np.asarray(drop_months, dtype=np.int64)
+    axes = {"effects": effects, "redeem_rates": redeem_rates, "incentive_costs": incentive_costs,
+            "drop_months": drop_months}
+    empty = [name for name, values in axes.items() if values.size == 0]
+    if empty:
+        raise ValueError(f"Sweep axes need at least one value: {', '.join(empty)} is empty.")
+    if drop_months.min() < 1 or drop_months.max() > duration_months - 1:
+        raise ValueError(f"Offer months must be between 1 and {duration_months - 1}.")
+
+    cheapest = incentive_costs.min()
+    n_pairs = effects.size * redeem_rates.size
+    surface = np.full((effects.size, redeem_rates.size), -np.inf)
+    break_even_cost = np.full((effects.size, redeem_rates.size), -np.inf)
+    best = {"net_revenue": -np.inf}
+
+    for drop_month in drop_months:
+        drop_rates = engine.drop_schedule(duration_months, drop_month, drop_off_rate,
+                                          organic_drop_pre, organic_drop_post)
+        mask = engine.incentive_mask(duration_months, drop_month)
+        baseline = engine.simulate_learners(initial_learners, drop_rates, 0.0, 0.0, mask, redeemers_stay_full)
+        baseline_revenue = float(baseline.sum() * revenue_per_month)
+
+        for start in range(0, n_pairs, chunk_points):
+            pair = np.arange(start, min(start + chunk_points, n_pairs))
+            i, j = np.divmod(pair, redeem_rates.size)
+
+            learners = engine.simulate_learners(initial_learners, drop_rates, effects[i], redeem_rates[j],
+                                                mask, redeemers_stay_full)
+            redeemed = engine.incentive_redeemers(learners, drop_rates, redeem_rates[j], mask).sum(axis=1)
+            revenue = learners.sum(axis=1) * revenue_per_month
+            net = revenue - redeemed * cheapest
+            surface[i, j] = np.maximum(surface[i, j], net)
+            break_even = np.divide(revenue - baseline_revenue, redeemed, out=np.full(pair.size, np.inf),
+                                   where=redeemed > 0)
+            break_even_cost[i, j] = np.maximum(break_even_cost[i, j], break_even)
+
+            top = net.argmax()
+            if net[top] > best["net_revenue"]:
+                best = {
+                    "effect": float(effects[i[top]]),
+                    "redeem_rate": float(redeem_rates[j[top]]),
+                    "incentive_cost": float(cheapest),
+                    "drop_month": int(drop_month),
+                    "net_revenue": float(net[top]),
+                    "break_even_cost": float(break_even[top]),
+                    "baseline_net_revenue": baseline_revenue,
+                }
+
+    return SweepResult(
+        effects=effects,
+        redeem_rates=redeem_rates,
+        incentive_costs=incentive_costs,
+        drop_months=drop_months,
+        surface=surface,
+        break_even_cost=break_even_cost,
+        best=best,
+        evaluated=n_pairs * incentive_costs.size * drop_months.size,
+    )
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from simulator import engine
+from simulator.agents import ACTIVE, DROPPED, RETAINED, simulate_agents
+
+DROP_RATES = engine.drop_schedule(8, 3, 0.3, 0.05, 0.05)
+MASK = engine.incentive_mask(8, 3)
+
+
+@pytest.mark.parametrize("model", engine.MODELS)
+def test_redeemed_bitmask_round_trips_across_chunks(model):
+    # 1,003 learners in chunks of 64 leave a partial final chunk and a partial final byte
+    result = simulate_agents(1003, DROP_RATES, 0.5, 0.6, MASK, seed=3, chunk_size=64, model=model)
+
+    assert result.redeemed.size == (1003 + 7) // 8
+    redeemed = result.has_redeemed()
+    assert redeemed.shape == (1003,)
+    # One offer, so every redeemer redeems exactly once
+    assert redeemed.sum() == result.redeemers.sum()
+    assert np.all(result.status[~redeemed] != RETAINED)
+    assert np.count_nonzero(result.status != DROPPED) == result.learners[-1]
+    assert set(np.unique(result.status)) <= {ACTIVE, DROPPED, RETAINED}
+
+
+@pytest.mark.parametrize("model", engine.MODELS)
+def test_learner_counts_match_the_engine_on_average(model):
+    # Without redeemers staying, the learner-level model is the engine's model learner by learner
+    result = simulate_agents(200_000, DROP_RATES, 0.5, 0.6, MASK, redeemers_stay_full=False, seed=7, model=model)
+    learners = engine.simulate_learners(200_000, DROP_RATES, 0.5, 0.6, MASK, False, model)
+    redeemers = engine.incentive_redeemers(learners, DROP_RATES, 0.6, MASK, model)
+
+    np.testing.assert_allclose(result.learners, learners[0], rtol=0.01)
+    np.testing.assert_allclose(result.redeemers.sum(), redeemers.sum(), rtol=0.02)
+
+
+def test_runs_are_reproducible_with_a_seed():
+    first = simulate_agents(5000, DROP_RATES, 0.5, 0.6, MASK, seed=11)
+    second = simulate_agents(5000, DROP_RATES, 0.5, 0.6, MASK, seed=11)
+    np.testing.assert_array_equal(first.status, second.status)
+    np.testing.assert_array_equal(first.redeemed, second.redeemed)
+
+
+def test_chunk_size_must_keep_the_bitmask_aligned():
+    with pytest.raises(ValueError, match="multiple of 8"):
+        simulate_agents(100, DROP_RATES, 0.5, 0.6, MASK, chunk_size=12)
@@ -0,0 +1,66 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulator import batch
+from simulator.batch import prepare_scenarios, run_batch
+
+
+def scenarios(stay_full):
+    return pd.DataFrame({"incentive_effect": 50.0, "redeem_rate": 40.0, "redeemers_stay_full": stay_full})
+
+
+@pytest.mark.parametrize("stay_full, expected", [
+    (["False", "no", "0", "NO", " false "], False),
+    (["True", "yes", "1", "Yes", " TRUE "], True),
+    ([False, 0, 0.0], False),
+    ([True, 1, 1.0], True),
+])
+def test_redeemers_stay_full_is_parsed_explicitly(stay_full, expected):
+    parsed = prepare_scenarios(scenarios(stay_full))["redeemers_stay_full"]
+    assert parsed.dtype == bool
+    assert (parsed == expected).all()
+
+
+@pytest.mark.parametrize("stay_full", [["yes", "maybe"], [True, None], [1, 2], ["no", ""]])
+def test_other_redeemers_stay_full_values_are_rejected(stay_full):
+    with pytest.raises(ValueError, match="rows 1: redeemers_stay_full"):
+        prepare_scenarios(scenarios(stay_full))
+
+
+def test_redeemers_stay_full_defaults_to_true():
+    parsed = prepare_scenarios(pd.DataFrame({"incentive_effect": [50.0], "redeem_rate": [40.0]}))
+    assert parsed["redeemers_stay_full"].tolist() == [True]
+
+
+@pytest.mark.parametrize("column", ["initial_learners", "revenue_per_month", "incentive_cost"])
+@pytest.mark.parametrize("value", [float("nan"), -1.0, float("inf")])
+def test_missing_or_negative_amounts_are_rejected(column, value):
+    definitions = pd.DataFrame({"incentive_effect": [50.0, 50.0], "redeem_rate": [40.0, 40.0], column: [10.0, value]})
+    with pytest.raises(ValueError, match="rows 1: .* must be finite and non-negative"):
+        prepare_scenarios(definitions)
+
+
+def test_checkpoints_are_keyed_by_code_version(tmp_path, monkeypatch):
+    definitions = prepare_scenarios(pd.DataFrame({"incentive_effect": [50.0, 100.0], "redeem_rate": [40.0, 100.0]}))
+    run_batch(definitions, workers=1, chunk_size=1, checkpoint_dir=tmp_path)
+    monkeypatch.setattr(batch, "code_version", lambda: "changed")
+    run_batch(definitions, workers=1, chunk_size=1, checkpoint_dir=tmp_path)
+
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_resumed_chunks_count_towards_progress(tmp_path):
+    definitions = prepare_scenarios(pd.DataFrame({"incentive_effect": [50.0, 100.0, 0.0],
+                                                  "redeem_rate": [40.0, 100.0, 50.0]}))
+    expected = run_batch(definitions, workers=1, chunk_size=1, checkpoint_dir=tmp_path)
+    run_dir, = tmp_path.iterdir()
+    (run_dir / "chunk-000001.npz").unlink()
+
+    progress = io.StringIO()
+    resumed = run_batch(definitions, workers=1, chunk_size=1, checkpoint_dir=tmp_path, progress=progress)
+
+    assert progress.getvalue().startswith("\r3/3 chunks · 3 scenarios")
+    np.testing.assert_array_equal(resumed.net_revenue, expected.net_revenue)
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from simulator import benchmark
+
+MACHINE = {"python": "3.11.7", "numpy": "2.2.6", "platform": "Linux", "cpus": 1}
+
+
+def report(throughput, **machine):
+    return {"machine": dict(MACHINE, **machine),
+            "cases": [{"name": name, "throughput": value} for name, value in throughput.items()]}
+
+
+def test_compare_flags_cases_slower_than_the_tolerance():
+    baseline = report({"a": 100.0, "b": 100.0, "gone": 1.0})
+    regressions = benchmark.compare(report({"a": 80.0, "b": 70.0, "new": 1.0}), baseline, tolerance=0.25)
+    assert [r["name"] for r in regressions] == ["b"]
+    assert regressions[0]["ratio"] == pytest.approx(0.7)
+
+
+def test_machine_mismatch_ignores_the_platform_string():
+    assert benchmark.machine_mismatch(report({}, platform="Darwin"), report({})) == {}
+    assert benchmark.machine_mismatch(report({}, numpy="2.4.6", cpus=8), report({})) == {
+        "numpy": ("2.2.6", "2.4.6"), "cpus": (1, 8)}
+
+
+@pytest.fixture
+def stub_suite(monkeypatch):
+    monkeypatch.setattr(benchmark, "run_suite", lambda cases, repeats, progress: report(
+        {case["name"]: 1.0 for case in cases}, numpy="0.0"))
+
+
+def test_main_refuses_a_baseline_from_another_setup(tmp_path, stub_suite, capsys):
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(report({"engine/s=3/t=4": 100.0})))
+    args = ["--cases", "engine/s=3/t=4", "--baseline", str(path)]
+
+    assert benchmark.main(args) == 2
+    assert "MACHINE MISMATCH numpy: baseline 2.2.6, this run 0.0" in capsys.readouterr().out
+    assert benchmark.main(args + ["--allow-machine-mismatch"]) == 1
+
+
+def test_update_baseline_drops_cases_from_another_setup(tmp_path, stub_suite):
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(report({"engine/s=3/t=4": 100.0, "agents/n=1000/t=12": 5.0})))
+
+    assert benchmark.main(["--cases", "engine/s=3/t=4", "--baseline", str(path), "--update-baseline"]) == 0
+    stored = json.loads(path.read_text())
+    assert [case["name"] for case in stored["cases"]] == ["engine/s=3/t=4"]
+    assert stored["machine"]["numpy"] == "0.0"
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulator.cache import ResultCache, canonical_hash, memoize
+from simulator.pipeline import Pipeline
+
+
+def test_cached_arrays_are_read_only():
+    cache = ResultCache()
+    stored = cache.put("k", (np.arange(3.0), {"rates": np.ones(2)}))
+    learners, extra = cache.get("k")
+    for array in (stored[0], learners, extra["rates"]):
+        with pytest.raises(ValueError):
+            array[0] = 99
+    np.testing.assert_array_equal(cache.get("k")[0], [0, 1, 2])
+
+
+def test_callers_get_their_own_tables_and_containers():
+    cache = ResultCache()
+    cache.put("k", {"table": pd.DataFrame({"x": [1, 2]}), "names": ["a", "b"]})
+    first = cache.get("k")
+    first["table"].loc[0, "x"] = 99
+    first["names"].append("c")
+    first["extra"] = 1
+    second = cache.get("k")
+    assert second["table"]["x"].tolist() == [1, 2]
+    assert second["names"] == ["a", "b"]
+    assert "extra" not in second
+
+
+def test_keys_are_salted_with_the_code_version():
+    cache = ResultCache(version="1")
+    cache.put("k", 1)
+    assert ResultCache(version="1").get("k") is None
+    cache.version = "2"
+    assert cache.get("k") is None
+
+
+def test_memoize_misses_when_the_function_changes():
+    cache = ResultCache()
+    calls = []
+
+    def define(offset):
+        if offset == 1:
+            def model(x):
+                calls.append(x)
+                return x + 1
+        else:
+            def model(x):
+                calls.append(x)
+                return x + 2
+        return memoize(cache)(model)
+
+    assert define(1)(1) == 2
+    assert define(1)(1) == 2
+    assert define(2)(1) == 3
+    assert calls == [1, 1]
+
+
+def test_pipeline_returns_read_only_outputs():
+    pipeline = Pipeline("test")
+
+    @pipeline.stage(inputs=("n",))
+    def values(n):
+        return np.arange(n)
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            pipeline.run({"n": 3})["values"][0] = 1
+
+
+def test_disk_tier_is_shared_and_bounded(tmp_path):
+    writer = ResultCache(disk_dir=tmp_path, disk_max_bytes=20_000, version="v")
+    for i in range(20):
+        writer.put(f"k{i}", np.full(500, i, dtype=np.float64))
+    files = list(tmp_path.glob("*/*.pkl"))
+    assert sum(path.stat().st_size for path in files) <= 20_000
+    assert 0 < len(files) < 20
+
+    reader = ResultCache(disk_dir=tmp_path, version="v")
+    value = reader.get("k19")
+    assert reader.stats()["disk_hits"] == 1
+    assert value[0] == 19 and not value.flags.writeable
+    assert reader.get("k0") is None
+
+
+def test_integers_hash_exactly_and_integral_floats_match_them():
+    assert canonical_hash(2**53) != canonical_hash(2**53 + 1)
+    assert canonical_hash(5) == canonical_hash(5.0) == canonical_hash(np.int32(5)) == canonical_hash(np.float32(5))
+    assert canonical_hash(0.5) != canonical_hash(0)
+
+
+def test_object_arrays_hash_by_their_elements():
+    names = np.array(["north", "south"], dtype=object)
+    copied = np.array(["".join(["nor", "th"]), "south"], dtype=object)
+    assert canonical_hash(names) == canonical_hash(copied)
+    assert canonical_hash(names) != canonical_hash(np.array(["north", "east"], dtype=object))
+
+
+def test_disk_tier_is_private_and_refuses_shared_directories(tmp_path):
+    ResultCache(disk_dir=tmp_path / "cache").put("k", 1)
+    assert (tmp_path / "cache").stat().st_mode & 0o777 == 0o700
+
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError, match="writable by other users"):
+        ResultCache(disk_dir=shared)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from simulator import charts
+
+
+@pytest.mark.parametrize("n, n_out", [(10_000, 500), (1001, 3), (50, 49)])
+def test_lttb_keeps_endpoints_and_one_point_per_bucket(n, n_out):
+    x = np.arange(n, dtype=np.float64)
+    y = np.sin(x / 37) + np.random.default_rng(0).normal(0, 0.1, n)
+    kept = charts.lttb(x, y, n_out)
+
+    assert kept.size == n_out
+    assert kept[0] == 0 and kept[-1] == n - 1
+    assert np.all(np.diff(kept) > 0)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    np.testing.assert_array_equal(np.searchsorted(edges, kept[1:-1], side="right") - 1, np.arange(n_out - 2))
+
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(5000)
+    y[2345] = 100.0
+    assert 2345 in charts.lttb(np.arange(5000), y, 100)
+
+
+@pytest.mark.parametrize("n_out", [2, 12, 100])
+def test_short_series_come_out_unchanged(n_out):
+    x, y = charts.downsample(np.arange(12), np.arange(12) ** 2, n_out)
+    np.testing.assert_array_equal(x, np.arange(12))
+    np.testing.assert_array_equal(y, np.arange(12) ** 2)
+
+
+def test_binned_averages_equal_width_bins():
+    x = np.arange(1, 251)
+    values = np.arange(250, dtype=np.float64)
+    starts, (means,), width = charts.binned(x, [values], max_bars=100)
+
+    assert width == 3
+    np.testing.assert_array_equal(starts, x[::3])
+    assert means.size == 84
+    np.testing.assert_allclose(means[:-1], values[:249].reshape(-1, 3).mean(axis=1))
+    # The final partial bin averages only what it holds
+    assert means[-1] == values[249]
+    # Means of equal-width bins preserve the total up to the partial bin
+    assert (means[:-1] * 3).sum() + means[-1] == pytest.approx(values.sum())
+
+
+def test_binned_series_that_fit_are_unchanged():
+    starts, (values,), width = charts.binned(np.arange(1, 13), [np.arange(12)])
+    assert width == 1
+    np.testing.assert_array_equal(values, np.arange(12))
+
+
+def test_scenarios_beyond_the_line_limit_become_percentile_bands():
+    values = np.random.default_rng(1).random((11, 30))
+    lines = charts.scenario_traces(np.arange(30), values[:10], [f"s{i}" for i in range(10)])
+    bands = charts.scenario_traces(np.arange(30), values, [f"s{i}" for i in range(11)])
+
+    assert [trace.name for trace in lines] == [f"s{i}" for i in range(10)]
+    # Two traces per symmetric band pair and the median line
+    assert len(bands) == 2 * (len(charts.BAND_PERCENTILES) // 2) + 1
+    np.testing.assert_allclose(bands[-1].y, np.median(values, axis=0))
+    assert charts.scenario_traces(np.arange(30), values, [f"s{i}" for i in range(11)], max_lines=11)[10].name == "s10"
+
+
+def test_long_lines_are_downsampled_and_drawn_with_webgl():
+    trace = charts.line(np.arange(50_000), np.arange(50_000.0), max_points=1500, name="long")
+    assert type(trace).__name__ == "Scattergl"
+    assert len(trace.x) == 1500
+    assert type(charts.line(np.arange(12), np.arange(12.0))).__name__ == "Scatter"
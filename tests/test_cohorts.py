@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from simulator import engine
+from simulator.cohorts import simulate_cohorts
+
+DROP_RATES = engine.drop_schedule(6, 2, 0.3, 0.0, 0.1)
+MASK = engine.incentive_mask(6, 2)
+
+
+def test_each_cohort_is_the_engine_trajectory_shifted_to_its_start():
+    starts, sizes = np.array([0, 2, 3]), np.array([1000.0, 500.0, 200.0])
+    result = simulate_cohorts(starts, sizes, DROP_RATES, 0.5, 0.4, MASK, 5.0, 3.0)
+
+    learners = engine.simulate_learners(sizes, DROP_RATES, 0.5, 0.4, MASK)
+    redeemers = engine.incentive_redeemers(learners, DROP_RATES, 0.4, MASK)
+    revenue, cost = engine.monthly_financials(learners, redeemers, 5.0, 3.0)
+    liability = engine.monthly_liability(cost, 0.5)
+
+    assert result.learners.shape == (3, 3 + 6)
+    for c, start in enumerate(starts):
+        months = slice(start, start + 6)
+        np.testing.assert_allclose(result.learners[c, months], learners[c])
+        np.testing.assert_allclose(result.revenue[c, months], revenue[c])
+        np.testing.assert_allclose(result.incentive_cost[c, months], cost[c])
+        np.testing.assert_allclose(result.liability[c, months], liability[c])
+        outside = np.ones(9, dtype=bool)
+        outside[months] = False
+        assert not result.learners[c, outside].any()
+
+
+def test_monthly_totals_add_up_the_cohorts():
+    result = simulate_cohorts(np.array([0, 1, 1]), 100.0, DROP_RATES, 1.0, 1.0, MASK, 5.0, 3.0)
+    totals = result.monthly_totals()
+
+    np.testing.assert_allclose(totals["learners"], result.learners.sum(axis=0))
+    np.testing.assert_allclose(totals["net_revenue"], totals["revenue"] - totals["incentive_cost"])
+    # Summed over the calendar, the cohorts earn what the engine's summary reports for them
+    learners = engine.simulate_learners(100.0, DROP_RATES, 1.0, 1.0, MASK)
+    redeemers = engine.incentive_redeemers(learners, DROP_RATES, 1.0, MASK)
+    summary = engine.summarize(learners, redeemers, 1.0, MASK, 5.0, 3.0)
+    assert totals["net_revenue"].sum() == pytest.approx(3 * summary["net_revenue"][0])
+
+
+def test_horizon_drops_later_months():
+    result = simulate_cohorts(np.array([0, 4]), 100.0, DROP_RATES, 0.5, 0.5, MASK, 5.0, 3.0, horizon_months=5)
+    full = simulate_cohorts(np.array([0, 4]), 100.0, DROP_RATES, 0.5, 0.5, MASK, 5.0, 3.0)
+
+    assert result.learners.shape == (2, 5)
+    np.testing.assert_allclose(result.learners, full.learners[:, :5])
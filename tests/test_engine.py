@@ -0,0 +1,176 @@
+"""The shared engine against the per-page loops it replaced, and its two cost and liability models."""
+
+import numpy as np
+import pytest
+
+from simulator import engine
+from simulator.results import ScenarioResults
+
+
+def main_page_learners(initial_learners, duration_months, drop_month, drop_off_rate, organic_drop_pre,
+                       organic_drop_post, effect, rate, redeemers_stay_full):
+    """The main page's loop before the engine; rates and effect in %."""
+    monthly_drop = ([organic_drop_pre / 100] * (drop_month - 1) + [drop_off_rate / 100]
+                    + [organic_drop_post / 100] * (duration_months - drop_month - 1))
+    learners = [initial_learners]
+    for i in range(1, duration_months):
+        drop = monthly_drop[i - 1] * (1 - effect / 100) if i == drop_month - 1 else monthly_drop[i - 1]
+        retained = learners[-1] * (1 - drop)
+        if redeemers_stay_full and i == drop_month:
+            retained += learners[-1] * monthly_drop[i - 1] * (effect / 100) * (rate / 100)
+        learners.append(retained)
+    return learners
+
+
+def main_page_summary(learners, learners_base, duration_months, drop_month, effect, rate, revenue_per_month,
+                      incentive_cost):
+    """The main page's executive summary figures before the engine; effect and rate in %."""
+    cost = learners[drop_month - 1] * (rate / 100) * incentive_cost
+    return {
+        "total_revenue": sum(x * revenue_per_month for x in learners),
+        "incentive_cost": cost,
+        "net_revenue": sum(x * revenue_per_month for x in learners) - cost,
+        "retention_gain": learners[-1] - learners_base[-1],
+        "break_even_learners": cost / (revenue_per_month * (duration_months - drop_month)),
+        "liability": cost if effect == 0 else 0,
+    }
+
+
+def csv_page_learners(initial_learners, drop_rates, effect, rate, redeemers_stay_full):
+    """The custom CSV page's loop before the engine; ``drop_rates`` are fractions per month."""
+    learners = [initial_learners]
+    for i in range(1, len(drop_rates)):
+        prev = learners[-1]
+        drop = drop_rates[i - 1]
+        retained = 0
+        if drop > 0 and redeemers_stay_full:
+            retained = prev * drop * (rate / 100) * (effect / 100)
+        learners.append(prev * (1 - drop) + retained)
+    return learners
+
+
+def run(initial_learners, drop_rates, effect, redeem_rate, mask, redeemers_stay_full=True,
+        revenue_per_month=5.0, incentive_cost=5.0, model=engine.ACTIVE_MODEL):
+    learners = engine.simulate_learners(initial_learners, drop_rates, effect, redeem_rate, mask, redeemers_stay_full,
+                                        model)
+    redeemers = engine.incentive_redeemers(learners, drop_rates, redeem_rate, mask, model)
+    return learners, ScenarioResults.from_simulation(np.arange(len(learners)), learners, redeemers, effect, mask,
+                                                     revenue_per_month, incentive_cost, model=model)
+
+
+MAIN_PAGE_CASES = [
+    (8, 3, 30, 0, 0), (4, 2, 100, 0, 0), (12, 11, 45, 10, 7), (6, 5, 0, 25, 20), (8, 4, 30, 15, 5),
+]
+
+
+@pytest.mark.parametrize("duration_months, drop_month, drop_off_rate, organic_drop_pre, organic_drop_post",
+                         MAIN_PAGE_CASES)
+@pytest.mark.parametrize("redeemers_stay_full", [True, False])
+def test_trajectories_match_main_page_loop(duration_months, drop_month, drop_off_rate, organic_drop_pre,
+                                           organic_drop_post, redeemers_stay_full):
+    effects, rates = np.array([0, 0, 100, 35]), np.array([0, 50, 100, 80])
+    drop_rates = engine.drop_schedule(duration_months, drop_month, drop_off_rate / 100, organic_drop_pre / 100,
+                                      organic_drop_post / 100)
+    learners = engine.simulate_learners(1000, drop_rates, effects / 100, rates / 100,
+                                        engine.incentive_mask(duration_months, drop_month), redeemers_stay_full)
+
+    expected = [main_page_learners(1000, duration_months, drop_month, drop_off_rate, organic_drop_pre,
+                                   organic_drop_post, effect, rate, redeemers_stay_full)
+                for effect, rate in zip(effects, rates)]
+    np.testing.assert_allclose(learners, expected)
+
+
+@pytest.mark.parametrize("duration_months, drop_month, drop_off_rate, organic_drop_pre, organic_drop_post",
+                         MAIN_PAGE_CASES)
+@pytest.mark.parametrize("redeemers_stay_full", [True, False])
+def test_summary_matches_main_page(duration_months, drop_month, drop_off_rate, organic_drop_pre, organic_drop_post,
+                                   redeemers_stay_full):
+    effects, rates = np.array([0, 0, 100, 35]), np.array([0, 50, 100, 80])
+    drop_rates = engine.drop_schedule(duration_months, drop_month, drop_off_rate / 100, organic_drop_pre / 100,
+                                      organic_drop_post / 100)
+    _, results = run(1000, drop_rates, effects / 100, rates / 100, engine.incentive_mask(duration_months, drop_month),
+                     redeemers_stay_full, revenue_per_month=4.0, incentive_cost=7.0)
+
+    learners_base = main_page_learners(1000, duration_months, drop_month, drop_off_rate, organic_drop_pre,
+                                       organic_drop_post, 0, 0, redeemers_stay_full)
+    for row, (effect, rate) in enumerate(zip(effects, rates)):
+        learners = main_page_learners(1000, duration_months, drop_month, drop_off_rate, organic_drop_pre,
+                                      organic_drop_post, effect, rate, redeemers_stay_full)
+        expected = main_page_summary(learners, learners_base, duration_months, drop_month, effect, rate, 4.0, 7.0)
+        for name, value in expected.items():
+            assert getattr(results, name)[row] == pytest.approx(value), name
+
+
+@pytest.mark.parametrize("redeemers_stay_full", [True, False])
+def test_trajectories_match_csv_page_loop(redeemers_stay_full):
+    drop_rates = np.array([0.05, 0.0, 0.25, 0.1, 0.0, 0.1, 0.3, 0.1])
+    effects, rates = np.array([0, 0, 100, 60]), np.array([0, 50, 70, 90])
+    learners = engine.simulate_learners(1000, drop_rates[:-1], effects / 100, rates / 100, drop_rates[:-1] > 0,
+                                        redeemers_stay_full, engine.AT_RISK_MODEL)
+
+    expected = [csv_page_learners(1000, drop_rates, effect, rate, redeemers_stay_full)
+                for effect, rate in zip(effects, rates)]
+    np.testing.assert_allclose(learners, expected)
+
+
+def test_main_page_defaults_cost_and_liability():
+    # 1,000 learners over 8 months, 30% drop-off in month 3, $5 revenue and $5 incentive
+    drop_rates = engine.drop_schedule(8, 3, 0.3)
+    _, results = run(1000, drop_rates, np.array([0.0, 0.0, 1.0]), np.array([0.0, 0.5, 1.0]),
+                     engine.incentive_mask(8, 3))
+
+    # All 1,000 learners active in month 3 are offered the incentive and redeemers are charged
+    # whether or not it works, so the whole cost of the offer without effect is a liability
+    np.testing.assert_allclose(results.total_revenue, [32_500, 32_500, 40_000])
+    np.testing.assert_allclose(results.incentive_cost, [0, 2_500, 5_000])
+    np.testing.assert_allclose(results.net_revenue, [32_500, 30_000, 35_000])
+    np.testing.assert_allclose(results.liability, [0, 2_500, 0])
+    np.testing.assert_allclose(results.retention_gain, [0, 0, 300])
+    np.testing.assert_allclose(results.break_even_learners, [0, 100, 200])
+
+
+def test_pre_offer_month_drop_off_is_cut_by_the_effect():
+    # 10% organic drop-off before the offer in month 3; a 40% effect cuts month 2's to 6%
+    drop_rates = engine.drop_schedule(8, 3, 0.3, 0.1)
+    learners, _ = run(1000, drop_rates, 0.4, 0.0, engine.incentive_mask(8, 3))
+
+    np.testing.assert_allclose(learners[0, :4], [1000, 900, 900 * 0.94, 900 * 0.94 * 0.7])
+
+
+def test_at_risk_defaults_cost_and_liability():
+    drop_rates = engine.drop_schedule(8, 3, 0.3)
+    _, results = run(1000, drop_rates, np.array([0.0, 0.0, 1.0]), np.array([0.0, 0.5, 1.0]),
+                     engine.incentive_mask(8, 3), model=engine.AT_RISK_MODEL)
+
+    # Only the 300 learners about to drop off are eligible; redeemers are charged in the offer month
+    np.testing.assert_allclose(results.total_revenue, [32_500, 32_500, 40_000])
+    np.testing.assert_allclose(results.incentive_cost, [0, 750, 1_500])
+    np.testing.assert_allclose(results.net_revenue, [32_500, 31_750, 38_500])
+    # Redeemers who still leave are a liability: all of them without effect, none with full effect
+    np.testing.assert_allclose(results.liability, [0, 750, 0])
+    np.testing.assert_allclose(results.retention_gain, [0, 0, 300])
+    np.testing.assert_allclose(results.break_even_learners, [0, 750 / 25, 1_500 / 25])
+
+
+def test_partial_effect_liability_is_cost_of_redeemers_who_leave():
+    drop_rates = engine.drop_schedule(8, 3, 0.3)
+    _, results = run(1000, drop_rates, 0.4, 0.5, engine.incentive_mask(8, 3), model=engine.AT_RISK_MODEL)
+
+    np.testing.assert_allclose(results.incentive_cost, [750])
+    np.testing.assert_allclose(results.liability, [750 * 0.6])
+
+
+def test_csv_schedule_costs_every_offer_month_but_the_last():
+    # The final month's rate never applies, so it has no offer and no cost
+    drop_rates = np.array([0.1, 0.0, 0.2, 0.5])
+    learners, results = run(1000, drop_rates[:-1], 0.0, 1.0, drop_rates[:-1] > 0, model=engine.AT_RISK_MODEL)
+
+    at_risk = learners[0, :-1] * drop_rates[:-1]
+    np.testing.assert_allclose(results.incentive_cost, [at_risk.sum() * 5.0])
+    np.testing.assert_allclose(results.incentive_cost, [(100 + 900 * 0.2) * 5.0])
+
+
+def test_unknown_model_is_rejected():
+    with pytest.raises(ValueError, match="Unknown incentive model 'eligible'"):
+        engine.simulate_learners(1000, engine.drop_schedule(8, 3, 0.3), 1.0, 1.0, engine.incentive_mask(8, 3),
+                                 model="eligible")
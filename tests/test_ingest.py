@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from simulator.ingest import last_active_months, profile_activity_log
+
+
+def test_sparse_64_bit_ids_use_memory_per_learner():
+    ids = np.array([2**62, 17, 2**63 - 1, 17], dtype=np.int64)
+    last_month, rows = last_active_months([(ids, np.array([3, 2, 5, 4]))], 6)
+    assert rows == 4
+    assert last_month.nbytes < 1000
+    assert sorted(last_month) == [3, 4, 5]
+
+
+def test_text_and_integer_ids_from_different_chunks_are_distinct_learners():
+    chunks = [(np.array(["a", "b"], dtype=object), np.array([2, 3])), (np.array([0, 1]), np.array([4, 5]))]
+    last_month, _ = last_active_months(chunks, 6)
+    assert sorted(last_month) == [2, 3, 4, 5]
+
+
+def test_same_integer_id_matches_across_dtypes_and_chunks():
+    chunks = [(np.array(["7", "x"], dtype=object), np.array([3, 2])), (np.array([7.0]), np.array([5])),
+              (np.array([7]), np.array([1]))]
+    last_month, _ = last_active_months(chunks, 6)
+    assert sorted(last_month) == [2, 5]
+
+
+def test_infinite_and_huge_float_ids_are_text_ids():
+    chunks = [(np.array([np.inf, 1e30, 3.0]), np.array([2, 3, 4])), (np.array(["inf", "3"], dtype=object),
+                                                                     np.array([5, 6]))]
+    last_month, _ = last_active_months(chunks, 6)
+    assert sorted(last_month) == [3, 5, 6]
+
+
+def test_many_small_chunks_keep_each_learners_last_month():
+    rng = np.random.default_rng(1)
+    ids, months = rng.integers(0, 500, 20_000), rng.integers(1, 9, 20_000)
+    chunks = [(ids[start:start + 37], months[start:start + 37]) for start in range(0, ids.size, 37)]
+    last_month, _ = last_active_months(chunks, 8)
+
+    expected = np.zeros(500, dtype=np.uint16)
+    np.maximum.at(expected, ids, months)
+    np.testing.assert_array_equal(np.sort(last_month), np.sort(expected[np.unique(ids)]))
+
+
+@pytest.mark.parametrize("ids", [np.array([1.0, np.nan, 2.0]), np.array(["a", None, "b"], dtype=object)])
+def test_missing_ids_are_rejected(ids):
+    with pytest.raises(ValueError, match="row 2"):
+        last_active_months([(ids, np.array([1, 2, 3]))], 6)
+
+
+def test_months_are_clipped_to_the_program_and_invalid_months_skipped():
+    chunks = [(np.array([1, 2, 3, 4]), np.array([0, 9, 2, -1]))]
+    last_month, rows = last_active_months(chunks, 6)
+    assert rows == 4
+    assert sorted(last_month) == [2, 6]
+
+
+def test_profile_counts_learners_by_last_active_month(tmp_path):
+    log = tmp_path / "log.csv"
+    log.write_text("learner_id,month\n"
+                   "a,1\nb,1\nc,1\nd,1\n"
+                   "a,2\nb,2\nc,2\n"
+                   "a,3\nb,3\n"
+                   "4,1\n4,3\n")
+    profile = profile_activity_log(log, 3, chunk_rows=4)
+    np.testing.assert_array_equal(profile.active, [5, 4, 3])
+    np.testing.assert_allclose(profile.drop_rates, [1 / 5, 1 / 4])
+    assert profile.rows == 11
+    assert profile.initial_learners == 5
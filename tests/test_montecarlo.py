@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from simulator.montecarlo import Beta, Normal, Uniform, monte_carlo
+
+
+@pytest.mark.parametrize("low, high", [(-0.1, 0.5), (0.5, 1.2), (0.6, 0.4)])
+def test_uniform_rejects_bounds_outside_rates(low, high):
+    with pytest.raises(ValueError, match="Uniform bounds"):
+        Uniform(low, high)
+
+
+@pytest.mark.parametrize("distribution", [Uniform(0.0, 1.0), Normal(0.9, 0.5), Beta(2.0, 5.0)])
+def test_sampled_rates_stay_within_unit_interval(distribution):
+    samples = distribution.sample(np.random.default_rng(0), 10_000)
+    assert samples.min() >= 0.0 and samples.max() <= 1.0
+
+
+def test_retention_never_exceeds_initial_cohort():
+    result = monte_carlo(2_000, initial_learners=1000, duration_months=8, drop_month=3,
+                         drop_off_rate=Uniform(0.0, 1.0), effect=Uniform(0.5, 1.0), redeem_rate=Uniform(0.5, 1.0),
+                         workers=1)
+    assert result.retention_mean.max() <= 1000 + 1e-9
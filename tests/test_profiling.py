@@ -0,0 +1,29 @@
+import tracemalloc
+
+import pytest
+
+from simulator.profiling import TRACE_MEMORY_ENV, trace_memory
+
+
+@pytest.fixture
+def tracing_off():
+    was_tracing = tracemalloc.is_tracing()
+    tracemalloc.stop()
+    yield
+    if was_tracing:
+        tracemalloc.start()
+    else:
+        tracemalloc.stop()
+
+
+def test_trace_memory_follows_the_environment(tracing_off, monkeypatch):
+    monkeypatch.delenv(TRACE_MEMORY_ENV, raising=False)
+    assert not trace_memory()
+    monkeypatch.setenv(TRACE_MEMORY_ENV, "1")
+    assert trace_memory()
+
+
+def test_trace_memory_never_stops_tracing(tracing_off):
+    tracemalloc.start()
+    assert trace_memory(False)
+    assert tracemalloc.is_tracing()
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from simulator import formatting
+from simulator.results import METRICS, ScenarioResults
+
+
+def make_results():
+    metrics = {name: np.zeros(4) for name in METRICS}
+    metrics["net_revenue"] = [30000.0, 35000.0, 35000.0, 20000.0]
+    metrics["total_revenue"] = [32500.0, 37500.0, 40000.0, 21000.0]
+    metrics["incentive_cost"] = [2500.0, 2500.0, 5000.0, 1000.0]
+    metrics["retention_gain"] = [12.4, 20.0, 25.6, 0.0]
+    metrics["retention_gain_pct"] = [12.44, 20.0, 25.56, 0.0]
+    metrics["break_even_learners"] = [100.0, 100.0, 200.0, 40.0]
+    metrics["liability"] = [2500.0, 0.0, 1234.5, 0.0]
+    return ScenarioResults.from_metrics(["a", "b", "c", "d"], metrics)
+
+
+def test_from_metrics_stores_float_arrays():
+    results = make_results()
+    assert len(results) == 4
+    assert results.names.dtype == object
+    for name in METRICS:
+        assert getattr(results, name).dtype == np.float64
+
+
+def test_take_keeps_rows_aligned():
+    results = make_results()
+    taken = results.take([2, 0])
+    assert list(taken.names) == ["c", "a"]
+    np.testing.assert_array_equal(taken.net_revenue, [35000.0, 30000.0])
+    assert list(results.take(results.net_revenue > 25000).names) == ["a", "b", "c"]
+
+
+def test_order_is_stable_and_honours_exclude():
+    results = make_results()
+    np.testing.assert_array_equal(results.order(), [1, 2, 0, 3])
+    np.testing.assert_array_equal(results.order(descending=False), [3, 0, 1, 2])
+    np.testing.assert_array_equal(results.order(exclude=[1]), [2, 0, 3])
+    np.testing.assert_array_equal(results.order(by="liability"), [0, 2, 1, 3])
+
+
+def test_best_and_worst_pick_the_first_row_on_ties():
+    results = make_results()
+    assert results.best() == 1
+    assert results.best(exclude=[1]) == 2
+    assert results.best(exclude=[1, 2]) == 0
+    assert results.worst() == 3
+    assert results.worst(exclude=[3]) == 0
+    assert results.worst(by="liability") == 1
+
+
+def test_to_frame_is_indexed_by_scenario():
+    frame = make_results().to_frame()
+    assert list(frame.index) == ["a", "b", "c", "d"]
+    assert frame.index.name == "scenario"
+    assert list(frame.columns) == list(METRICS)
+
+
+@pytest.mark.parametrize("metric, value, expected", [
+    ("retention_gain", 12.4, "12 learners"),
+    ("retention_gain_pct", 12.44, "12.4%"),
+    ("break_even_learners", 99.6, "100"),
+    ("net_revenue", 1234567.891, "$1,234,568"),
+])
+def test_format_metric(metric, value, expected):
+    assert formatting.format_metric(metric, value) == expected
+
+
+def test_format_row_covers_every_labelled_metric():
+    row = formatting.format_row(make_results(), 2, decimals=2)
+    assert list(row) == ["scenario", *formatting.COLUMN_LABELS]
+    assert row["scenario"] == "c"
+    assert row["liability"] == "$1,234.50"
+    assert row["retention_gain"] == "26 learners"
+
+
+def test_format_summary_shows_only_the_requested_rows_and_columns():
+    table = formatting.format_summary(make_results(), rows=[2, 0], columns=("net_revenue", "retention_gain_pct"))
+    assert list(table.columns) == ["Scenario", "Net Revenue", "Retention Gain (%)"]
+    assert table.values.tolist() == [["c", "$35,000", "25.6%"], ["a", "$30,000", "12.4%"]]
+
+    full = formatting.format_summary(make_results())
+    assert list(full["Scenario"]) == ["a", "b", "c", "d"]
+    assert list(full.columns[1:]) == list(formatting.COLUMN_LABELS.values())
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from simulator import engine
+from simulator.scenarios import Offer, Scenario, compare_scenarios, compile_offers
+
+
+def test_offers_are_laid_out_per_transition():
+    offers = compile_offers([Scenario("Baseline"), Scenario("Two offers", (Offer(3, 5.0, 1.0, 0.5),
+                                                                          Offer(1, 2.0, 0.2, 0.4)))], 6)
+
+    assert offers.names == ["Baseline", "Two offers"]
+    np.testing.assert_array_equal(offers.mask, [[False] * 5, [True, False, True, False, False]])
+    np.testing.assert_array_equal(offers.cost[1], [2.0, 0, 5.0, 0, 0])
+    np.testing.assert_array_equal(offers.effect[1], [0.2, 0, 1.0, 0, 0])
+    np.testing.assert_array_equal(offers.redeem_rate[1], [0.4, 0, 0.5, 0, 0])
+
+
+@pytest.mark.parametrize("offer, message", [
+    (Offer(6, 5.0, 1.0, 0.5), "months 1 to 5"),
+    (Offer(0, 5.0, 1.0, 0.5), "months 1 to 5"),
+    (Offer(3, -1.0, 1.0, 0.5), "cost cannot be negative"),
+    (Offer(3, 5.0, 1.5, 0.5), "between 0 and 1"),
+    (Offer(3, 5.0, 1.0, -0.1), "between 0 and 1"),
+    (Offer(3, float("nan"), 1.0, 0.5), "finite numbers"),
+    (Offer(3, 5.0, float("nan"), 0.5), "finite numbers"),
+    (Offer(3, 5.0, 1.0, float("nan")), "finite numbers"),
+    (Offer(3, float("inf"), 1.0, 0.5), "finite numbers"),
+])
+def test_invalid_offers_name_their_scenario_and_month(offer, message):
+    scenarios = [Scenario("Baseline"), Scenario("Valid", (Offer(2, 5.0, 1.0, 0.5),)), Scenario("Broken", (offer,))]
+    with pytest.raises(ValueError, match=f"^Broken: .*{message}.*\\(offer in month {offer.month}\\)"):
+        compile_offers(scenarios, 6)
+
+
+def test_two_offers_in_one_month_are_rejected():
+    with pytest.raises(ValueError, match="Twice: only one offer per month"):
+        compile_offers([Scenario("Twice", (Offer(2, 5.0, 1.0, 0.5), Offer(2, 1.0, 0.5, 0.5)))], 6)
+
+
+def test_single_offer_scenarios_match_the_engine():
+    drop_rates = engine.drop_schedule(8, 3, 0.3, 0.1, 0.05)
+    results = compare_scenarios([Scenario("Baseline"), Scenario("Offer", (Offer(3, 4.0, 0.6, 0.5),))],
+                                drop_rates, 1000, 5.0)
+
+    mask = engine.incentive_mask(8, 3)
+    learners = engine.simulate_learners(1000, drop_rates, [0.0, 0.6], [0.0, 0.5], mask)
+    redeemers = engine.incentive_redeemers(learners, drop_rates, [0.0, 0.5], mask)
+    expected = engine.summarize(learners, redeemers, [0.0, 0.6], mask, 5.0, 4.0)
+    for name, values in expected.items():
+        np.testing.assert_allclose(getattr(results, name), values, err_msg=name)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from simulator import engine
+from simulator.cache import ResultCache
+from simulator.schedules import DEFAULT_SCHEDULE_ID, compare_schedules, load_schedules, read_schedules
+
+REGIONS = (b"schedule_id,Month,Drop-off Rate (%)\n"
+           b"north,1,5\nnorth,3,25\n"
+           b"south,2,10\nsouth,3,40\nsouth,8,50\n")
+
+
+def test_schedules_compile_into_one_array_in_order_of_appearance():
+    schedules = read_schedules(REGIONS, 8)
+
+    assert schedules.ids.tolist() == ["north", "south"]
+    assert schedules.rates.flags.c_contiguous and schedules.rates.dtype == np.float64
+    np.testing.assert_allclose(schedules.rates, [[0.05, 0, 0.25, 0, 0, 0, 0, 0], [0, 0.1, 0.4, 0, 0, 0, 0, 0.5]])
+    # The final month's rate never applies
+    np.testing.assert_allclose(schedules.drop_rates, schedules.rates[:, :-1])
+
+
+def test_files_without_schedule_ids_hold_one_schedule():
+    schedules = read_schedules(b"Month,Drop-off Rate (%)\n1,5\n2,15\n", 4)
+    assert schedules.ids.tolist() == [DEFAULT_SCHEDULE_ID]
+    np.testing.assert_allclose(schedules.rates, [[0.05, 0.15, 0, 0]])
+    assert schedules.to_frame()["Drop-off Rate (%)"].tolist() == pytest.approx([5, 15, 0, 0])
+
+
+@pytest.mark.parametrize("body, message", [
+    (b"Month,Rate\n1,5\n2.5,10\n", r"Line 3 \(month 2.5\): month must be a whole number"),
+    (b"Month,Rate\n1,5\n9,10\n", r"Line 3 \(month 9\): month is outside the program \(months 1 to 8\)"),
+    (b"Month,Rate\n1,5\n2,101\n", r"Line 3 \(month 2\): drop-off rate must be a number between 0 and 100"),
+    (b"Month,Rate\n1,5\n2,\n", r"Line 3 \(month 2\): drop-off rate must be a number"),
+    (b"Month,Rate\n1,5\n1,10\n", r"Line 3 \(month 1\): month is listed more than once"),
+    (b"schedule_id,Month,Rate\na,1,5\n,2,10\n", r"Line 3 \(month 2\): schedule_id is missing"),
+    (b"schedule_id,Month,Rate\na,1,5\nb,1,5\nb,1,7\n", r"Line 4 \(schedule 'b', month 1\): month is listed"),
+    (b"Month\n1\n", "need a Month and a Drop-off Rate"),
+    (b"", "file is empty"),
+])
+def test_invalid_rows_are_reported_with_their_line(body, message):
+    with pytest.raises(ValueError, match=message):
+        read_schedules(body, 8)
+
+
+def test_uploads_are_cached_by_content():
+    cache = ResultCache()
+    first = load_schedules(REGIONS, 8, cache)
+    second = load_schedules(REGIONS, 8, cache)
+    assert cache.stats()["hits"] == 1
+    np.testing.assert_array_equal(first.rates, second.rates)
+    load_schedules(REGIONS, 9, cache)
+    assert cache.stats()["misses"] == 2
+
+
+def test_every_schedule_is_compared_against_every_scenario():
+    schedules = read_schedules(REGIONS, 8)
+    results = compare_schedules(schedules, [0.0, 1.0], [0.0, 0.5], 1000, 5.0, 2.0,
+                                scenario_names=["Baseline", "Offer"])
+
+    assert results.names.tolist() == ["north: Baseline", "north: Offer", "south: Baseline", "south: Offer"]
+    for i, rates in enumerate(schedules.drop_rates):
+        mask = rates > 0
+        learners = engine.simulate_learners(1000, rates, [0.0, 1.0], [0.0, 0.5], mask, True, engine.AT_RISK_MODEL)
+        redeemers = engine.incentive_redeemers(learners, rates, [0.0, 0.5], mask, engine.AT_RISK_MODEL)
+        expected = engine.summarize(learners, redeemers, [0.0, 1.0], mask, 5.0, 2.0, model=engine.AT_RISK_MODEL)
+        for name, values in expected.items():
+            np.testing.assert_allclose(getattr(results, name)[2 * i:2 * i + 2], values, err_msg=name)
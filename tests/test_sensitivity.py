@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from simulator import engine
+from simulator.sensitivity import sensitivity, tornado
+
+DROP_RATES = engine.drop_schedule(8, 4, 0.3, 0.1, 0.05)
+MASK = engine.incentive_mask(8, 4)
+MONTH = np.arange(7)
+DROP_GROUPS = {"drop_off_rate": MASK, "organic_drop_pre": MONTH < 3, "organic_drop_post": MONTH > 3}
+INPUTS = {"initial_learners": 1000.0, "effect": 0.4, "redeem_rate": 0.6, "revenue_per_month": 5.0,
+          "incentive_cost": 3.0}
+
+
+def net_revenue(model, stay, drop_rates=DROP_RATES, **overrides):
+    p = {**INPUTS, **overrides}
+    learners = engine.simulate_learners(p["initial_learners"], drop_rates, p["effect"], p["redeem_rate"], MASK, stay,
+                                        model)
+    redeemers = engine.incentive_redeemers(learners, drop_rates, p["redeem_rate"], MASK, model)
+    revenue, cost = engine.monthly_financials(learners, redeemers, p["revenue_per_month"], p["incentive_cost"])
+    return (revenue - cost).sum()
+
+
+def solve(model, stay, **overrides):
+    p = {**INPUTS, **overrides}
+    return sensitivity(p["initial_learners"], DROP_RATES, p["effect"], p["redeem_rate"], MASK, p["revenue_per_month"],
+                       p["incentive_cost"], stay, DROP_GROUPS, model=model)
+
+
+@pytest.mark.parametrize("model", engine.MODELS)
+@pytest.mark.parametrize("stay", [True, False])
+def test_gradients_match_central_differences(model, stay):
+    result = solve(model, stay)
+    assert result.net_revenue[0] == pytest.approx(net_revenue(model, stay))
+
+    step = 1e-5
+    for name, value in INPUTS.items():
+        slope = (net_revenue(model, stay, **{name: value + step})
+                 - net_revenue(model, stay, **{name: value - step})) / (2 * step)
+        assert result.gradient[name][0] == pytest.approx(slope, rel=1e-5, abs=1e-4), name
+    for name, group in DROP_GROUPS.items():
+        slope = (net_revenue(model, stay, DROP_RATES + step * group)
+                 - net_revenue(model, stay, DROP_RATES - step * group)) / (2 * step)
+        assert result.gradient[name][0] == pytest.approx(slope, rel=1e-5, abs=1e-3), name
+
+
+@pytest.mark.parametrize("model", engine.MODELS)
+@pytest.mark.parametrize("overrides", [
+    {}, {"effect": 0.3, "incentive_cost": 4.0}, {"effect": 0.9, "incentive_cost": 30.0},
+])
+def test_break_even_thresholds_are_roots_of_the_uplift(model, overrides):
+    result = solve(model, True, **overrides)
+    baseline_learners = engine.simulate_learners(1000, DROP_RATES, 0.0, 0.0, MASK).sum()
+    assert result.baseline_net_revenue[0] == pytest.approx(INPUTS["revenue_per_month"] * baseline_learners)
+
+    solved = 0
+    for name, threshold in result.break_even.items():
+        if np.isnan(threshold[0]):
+            continue
+        solved += 1
+        solved_inputs = {**INPUTS, **overrides, name: threshold[0]}
+        uplift = (net_revenue(model, True, **solved_inputs)
+                  - solved_inputs["revenue_per_month"] * baseline_learners)
+        assert uplift == pytest.approx(0.0, abs=1e-6), name
+    assert solved >= 2
+
+
+def test_announced_offer_without_redemptions_has_no_redeem_rate_root():
+    # Under the active model the offer already cuts the previous month's drop-off at a zero
+    # redeem rate, so the uplift stays positive and there is no break-even redeem rate
+    result = solve(engine.ACTIVE_MODEL, True, effect=0.9, incentive_cost=1.0)
+    assert np.isnan(result.break_even["redeem_rate"][0])
+    assert net_revenue(engine.ACTIVE_MODEL, True, effect=0.9, incentive_cost=1.0, redeem_rate=1e-9) > (
+        INPUTS["revenue_per_month"] * engine.simulate_learners(1000, DROP_RATES, 0.0, 0.0, MASK).sum())
+
+
+@pytest.mark.parametrize("model", engine.MODELS)
+def test_tornado_swings_match_resimulation(model):
+    swings = tornado(INPUTS["initial_learners"], DROP_RATES, INPUTS["effect"], INPUTS["redeem_rate"], MASK,
+                     INPUTS["revenue_per_month"], INPUTS["incentive_cost"], True, DROP_GROUPS, model=model)
+
+    sizes = [abs(high - low) for low, high in swings.values()]
+    assert sizes == sorted(sizes, reverse=True)
+    low, high = swings["effect"]
+    assert low == pytest.approx(net_revenue(model, True, effect=0.36))
+    assert high == pytest.approx(net_revenue(model, True, effect=0.44))
+    low, high = swings["organic_drop_post"]
+    assert low == pytest.approx(net_revenue(model, True, DROP_RATES * np.where(DROP_GROUPS["organic_drop_post"],
+                                                                               0.9, 1.0)))
@@ -0,0 +1,116 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulator import server
+from simulator.batch import INPUT_COLUMNS, evaluate_scenarios, prepare_scenarios
+from simulator.results import METRICS
+from simulator.server import ResultStore, ScenarioServer, ScenarioService, scenario_keys
+
+SCENARIO = {"scenario": "A", "incentive_effect": 50, "redeem_rate": 40}
+
+
+@pytest.fixture
+def service():
+    service = ScenarioService(workers=1)
+    yield service
+    service.close()
+
+
+def route(service, method, path, body):
+    return asyncio.run(ScenarioServer(service)._route(method, path, body))
+
+
+def test_results_match_the_batch_evaluation(service):
+    records = [SCENARIO, {"scenario": "B", "incentive_effect": 100, "redeem_rate": 70}]
+    results = asyncio.run(service.evaluate(records))
+
+    scenarios = prepare_scenarios(pd.DataFrame.from_records(records))
+    expected = evaluate_scenarios({name: scenarios[name].to_numpy() for name in INPUT_COLUMNS})
+    assert [result["scenario"] for result in results] == ["A", "B"]
+    for name in METRICS:
+        np.testing.assert_allclose([result[name] for result in results], expected[name])
+
+
+def test_identical_scenarios_are_computed_once(service):
+    async def concurrent():
+        return await asyncio.gather(service.evaluate([SCENARIO, dict(SCENARIO, scenario="copy")]),
+                                    service.evaluate([SCENARIO]))
+
+    first, second = asyncio.run(concurrent())
+    assert first[0]["net_revenue"] == first[1]["net_revenue"] == second[0]["net_revenue"]
+    assert service.stats["computed"] == 1
+    assert service.stats["stored"] + service.stats["coalesced"] == 2
+
+
+def test_store_answers_after_a_restart(tmp_path):
+    path = tmp_path / "results.sqlite"
+    first = ScenarioService(ResultStore(path), workers=1)
+    expected = asyncio.run(first.evaluate([SCENARIO]))
+    first.close()
+
+    second = ScenarioService(ResultStore(path), workers=1)
+    try:
+        assert asyncio.run(second.evaluate([SCENARIO])) == expected
+        assert second.stats["computed"] == 0 and second.stats["stored"] == 1
+    finally:
+        second.close()
+
+
+def test_keys_change_with_the_code_version(monkeypatch):
+    scenarios = prepare_scenarios(pd.DataFrame.from_records([SCENARIO]))
+    before = scenario_keys(scenarios)
+    monkeypatch.setattr(server, "code_version", lambda: "changed")
+    assert scenario_keys(scenarios) != before
+
+
+def test_keys_ignore_the_scenario_name():
+    scenarios = prepare_scenarios(pd.DataFrame.from_records([SCENARIO, dict(SCENARIO, scenario="other")]))
+    first, second = scenario_keys(scenarios)
+    assert first == second
+
+
+@pytest.mark.parametrize("method, path, body, status", [
+    ("GET", "/nowhere", b"", HTTPStatus.NOT_FOUND),
+    ("GET", "/simulate", b"", HTTPStatus.METHOD_NOT_ALLOWED),
+    ("POST", "/simulate", b"{not json", HTTPStatus.BAD_REQUEST),
+    ("POST", "/batch", b"[]", HTTPStatus.BAD_REQUEST),
+    ("POST", "/simulate", b'{"incentive_effect": 50}', HTTPStatus.BAD_REQUEST),
+    ("POST", "/simulate", b'{"incentive_effect": 150, "redeem_rate": 40}', HTTPStatus.BAD_REQUEST),
+    ("POST", "/simulate", b'{"incentive_effect": 50, "redeem_rate": 40, "duration_months": 100000}',
+     HTTPStatus.BAD_REQUEST),
+    ("POST", "/simulate", b'{"incentive_effect": 50, "redeem_rate": 40, "initial_learners": 1e15}',
+     HTTPStatus.BAD_REQUEST),
+])
+def test_invalid_requests_are_rejected(service, method, path, body, status):
+    code, payload = route(service, method, path, body)
+    assert code == status
+    assert "error" in payload
+
+
+def test_too_many_scenarios_are_rejected(service, monkeypatch):
+    monkeypatch.setattr(server, "MAX_BATCH_SCENARIOS", 2)
+    code, _ = route(service, "POST", "/batch", json.dumps([SCENARIO] * 3).encode())
+    assert code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+def test_http_round_trip(service):
+    async def request():
+        ready = asyncio.get_running_loop().create_future()
+        serving = asyncio.create_task(ScenarioServer(service).serve(port=0, ready=ready.set_result))
+        port = await ready
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        body = json.dumps({"scenarios": [SCENARIO]}).encode()
+        writer.write(b"POST /batch HTTP/1.1\r\nContent-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(body), body))
+        response = await reader.read()
+        writer.close()
+        serving.cancel()
+        return response
+
+    head, _, body = asyncio.run(request()).partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200")
+    assert json.loads(body)["results"][0]["scenario"] == "A"
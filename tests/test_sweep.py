@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from simulator import engine
+from simulator.sweep import sweep
+
+PROGRAM = dict(initial_learners=1000, duration_months=8, drop_off_rate=0.3, revenue_per_month=5.0)
+
+
+def test_cheapest_cost_is_optimal_and_break_even_cost_matches_baseline():
+    result = sweep([0.0, 0.5, 1.0], [0.5, 1.0], [2.0, 8.0, 5.0], [3], **PROGRAM)
+
+    assert result.best["incentive_cost"] == 2.0
+    assert (result.best["effect"], result.best["redeem_rate"]) == (1.0, 1.0)
+    # All 1,000 learners active in month 3 redeem and the 300 at risk stay 5 more months: +$7,500
+    assert result.best["net_revenue"] == pytest.approx(40_000 - 1_000 * 2.0)
+    assert result.best["break_even_cost"] == pytest.approx(7_500 / 1_000)
+    # Without effect nothing is gained, so any positive cost loses money
+    np.testing.assert_allclose(result.break_even_cost[0], [0.0, 0.0])
+    assert result.evaluated == 3 * 2 * 3
+
+
+def test_surface_is_best_net_revenue_over_offer_months():
+    result = sweep([1.0], [1.0], [5.0], [2, 3, 6], **PROGRAM)
+
+    nets = []
+    for month in (2, 3, 6):
+        drop_rates, mask = engine.drop_schedule(8, month, 0.3), engine.incentive_mask(8, month)
+        learners = engine.simulate_learners(1000, drop_rates, 1.0, 1.0, mask)
+        redeemers = engine.incentive_redeemers(learners, drop_rates, 1.0, mask)
+        nets.append(learners.sum() * 5.0 - redeemers.sum() * 5.0)
+    assert result.surface[0, 0] == pytest.approx(max(nets))
+
+
+@pytest.mark.parametrize("axis", ["effects", "redeem_rates", "incentive_costs", "drop_months"])
+def test_empty_axis_is_rejected(axis):
+    grid = {"effects": [0.5], "redeem_rates": [0.5], "incentive_costs": [5.0], "drop_months": [3], axis: []}
+    with pytest.raises(ValueError, match=f"{axis} is empty"):
+        sweep(grid["effects"], grid["redeem_rates"], grid["incentive_costs"], grid["drop_months"], **PROGRAM)